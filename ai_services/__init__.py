@@ -1,7 +1,15 @@
 # utils package init
-from .utils.text_processor import TextPreprocessor
+# TextPreprocessor is resolved on first access: importing it pulls in the
+# text_processor module, and `import ai_services` should stay cheap for
+# callers (cli_chat, the benchmark scripts) that never preprocess text.
 from .utils.logger import logger
 from .utils.config import Config
 
 __all__ = ["TextPreprocessor", "logger", "Config"]
 
+
+def __getattr__(name):
+    if name == "TextPreprocessor":
+        from .utils.text_processor import TextPreprocessor
+        return TextPreprocessor
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,10 +1,17 @@
 # ai_services/app.py
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from ai_services.chatbot.routes import router as chat_router
 import logging
-from ai_services.chatbot.processor import check_llm_health_async
+from ai_services.chatbot.processor import check_llm_health_async, admission, response_cache, semantic_cache, risk_classifier
+from ai_services.chatbot.ai_client import llm_client, conversation_memory, prompt_builder, summarizer
+from ai_services.chatbot.intents import intent_engine
+from ai_services.chatbot.health import health_monitor
+from ai_services.utils.text_processor import get_preprocessor
+from ai_services.chatbot.nlp_pool import nlp_pool
+from ai_services.chatbot.translation import translator
+from ai_services.utils.metrics import metrics
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -15,6 +22,14 @@ app = FastAPI(title="PANAH AI Services - Local LLaMA Edition", version="2.0.0")
 # Include chatbot routes
 app.include_router(chat_router)
 
+# Point-in-time gauges for /metrics (the pipeline's histograms and counters are recorded where the work happens)
+metrics.gauge("panah_llm_active", "LLM slots in use", lambda: admission.stats()["active"])
+metrics.gauge("panah_llm_queue_depth", "Requests waiting for an LLM slot", lambda: admission.stats()["queue_depth"])
+metrics.gauge("panah_nlp_pool_in_flight", "Messages on the NLP pool", lambda: nlp_pool.stats()["in_flight"])
+metrics.gauge("panah_ollama_in_flight", "Open requests to Ollama", lambda: llm_client.pool_stats()["in_flight"])
+metrics.gauge("panah_llm_healthy", "1 if the last Ollama health probe succeeded",
+              lambda: 1 if health_monitor.is_healthy() else 0)
+
 # Enable CORS for Next.js frontend
 app.add_middleware(
     CORSMiddleware,
@@ -98,6 +113,14 @@ async def root():
                     <strong>POST /chat</strong><br>
                     Main chat endpoint - Compatible with your existing frontend
                 </div>
+                <div class="endpoint">
+                    <strong>POST /chat/stream</strong><br>
+                    Streaming chat endpoint - Tokens delivered as Server-Sent Events
+                </div>
+                <div class="endpoint">
+                    <strong>POST /chat/batch</strong><br>
+                    Batch chat endpoint - JSONL of messages in, JSONL results streamed back (see batch_chat.py)
+                </div>
                 <div class="endpoint">
                     <strong>GET /health</strong><br>
                     Check local LLM health status
@@ -106,6 +129,10 @@ async def root():
                     <strong>GET /models</strong><br>
                     List available Ollama models
                 </div>
+                <div class="endpoint">
+                    <strong>GET /metrics</strong><br>
+                    Per-stage latency and Ollama token rates (Prometheus format)
+                </div>
                 
                 <h3>Quick Test:</h3>
                 <p>Test the chat endpoint:</p>
@@ -129,7 +156,20 @@ async def startup_event():
     """
     logger.info("🚀 Starting PANAH AI Services (Local LLaMA Edition)")
 
+    # Open the shared Ollama connection pool before the first request arrives
+    await llm_client.start()
+    semantic_cache.load()
+    await risk_classifier.start()
+
+    # Load NLP models once, up front (in each worker for the process pool),
+    # instead of on the first chat request
+    load_times = await nlp_pool.start()
+    logger.info(f"🧠 Preprocessor warm-up ({nlp_pool.mode} pool): " + ", ".join(
+        f"{component} {seconds * 1000:.0f}ms" for component, seconds in load_times.items()))
+
     try:
+        # First probe runs inline; afterwards the monitor polls in the background
+        await health_monitor.start()
         health = await check_llm_health_async()
         status = health.get("status")
         is_healthy = status == "healthy"
@@ -144,6 +184,27 @@ async def startup_event():
     except Exception as e:
         logger.error(f"Startup health check failed: {e}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    Stop the health monitor and release the shared Ollama connection pool
+    """
+    await health_monitor.stop()
+    await risk_classifier.stop()
+    await nlp_pool.stop()
+    await summarizer.stop()
+    semantic_cache.save()
+    await llm_client.close()
+    logger.info("👋 PANAH AI Services stopped")
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Per-stage latency histograms, Ollama token rates and queue gauges in
+    Prometheus text format
+    """
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/status")
 async def get_status():
     """
@@ -156,7 +217,22 @@ async def get_status():
             "version": "2.0.0",
             "llm_type": "Local LLaMA (Ollama)",
             "status": "operational" if health.get("status") == "healthy" else "degraded",
-            "llm_status": health
+            "llm_status": health,
+            "http_pool": llm_client.pool_stats(),
+            "backends": llm_client.backends.stats(),
+            "llm_policy": llm_client.policy.stats(),
+            "generation": llm_client.generation_stats(),
+            "conversation_memory": conversation_memory.stats(),
+            "prompt": {**prompt_builder.stats(), "summaries": summarizer.stats()},
+            "llm_queue": admission.stats(),
+            "response_cache": response_cache.stats(),
+            "semantic_cache": semantic_cache.stats(),
+            "nlp_pool": nlp_pool.stats(),
+            # With the process pool each worker has its own lemma cache
+            "lemma_cache": get_preprocessor().lemma_cache_stats() if nlp_pool.mode != "process" else None,
+            "risk_classifier": risk_classifier.stats(),
+            "translation": translator.stats(),
+            "suggestion_intents": intent_engine.stats()
         }
     except Exception as e:
         return {
@@ -0,0 +1,164 @@
+"""
+batch_chat.py - Replay a JSONL file of prompts through /chat/batch
+
+Each input line is {"id": ..., "message": ..., "session_id": ...}; "id"
+defaults to the line number and "session_id" to a stateless turn; a line
+that is not such an object is reported as a failed item. Results are
+appended to the output file (one JSON line per item, in completion order)
+as soon as the server streams them back, so an interrupted run can simply
+be started again: ids already in the output are skipped. Failed
+items are skipped too unless --retry-failed is given. When an id appears
+more than once in the output, its last line is the one that counts.
+
+    python -m ai_services.batch_chat prompts.jsonl --output answers.jsonl --concurrency 4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import aiohttp
+
+API_URL = "http://127.0.0.1:8000"
+
+
+def read_items(path):
+    """
+    Items from a JSONL file; as on the server (parse_batch), a line that is
+    not a valid item becomes an item with an "error" instead of stopping the run
+    """
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            item_id = line_number
+            try:
+                data = json.loads(line)
+                if isinstance(data, str):
+                    data = {"message": data}
+                if isinstance(data, dict):
+                    item_id = data.get("id", line_number)
+                if not isinstance(data, dict) or not isinstance(data.get("message"), str):
+                    raise ValueError('expected an object with a "message" string')
+            except ValueError as e:
+                items.append({"id": item_id, "error": f"invalid line: {e}"})
+                continue
+            data["id"] = item_id
+            items.append(data)
+    return items
+
+
+def finished_ids(path, retry_failed=False):
+    """
+    Ids with a result in an earlier run's output (the last line per id wins)
+    """
+    if not os.path.exists(path):
+        return set()
+    latest = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by the interruption
+            if isinstance(result, dict) and result.get("type") == "result":
+                latest[json.dumps(result["id"])] = result
+    return {key for key, result in latest.items() if not (retry_failed and result.get("error"))}
+
+
+class Progress:
+    def __init__(self, total, skipped):
+        self.total = total
+        self.skipped = skipped
+        self.completed = 0
+        self.failed = 0
+        self.started = time.monotonic()
+
+    def update(self, result):
+        self.completed += 1
+        if result.get("error"):
+            self.failed += 1
+        elapsed = time.monotonic() - self.started
+        rate = self.completed / elapsed if elapsed else 0.0
+        remaining = self.total - self.skipped - self.completed
+        eta = f"{remaining / rate:.0f}s" if rate else "?"
+        print(f"\r[{self.skipped + self.completed}/{self.total}] {self.failed} failed, "
+              f"{rate:.2f} items/s, eta {eta}   ", end="", file=sys.stderr, flush=True)
+
+
+async def run(args):
+    items = read_items(args.input)
+    done = finished_ids(args.output, args.retry_failed)
+    todo = [item for item in items if json.dumps(item["id"]) not in done]
+    progress = Progress(len(items), len(items) - len(todo))
+    if progress.skipped:
+        print(f"Resuming: {progress.skipped} of {len(items)} items already in {args.output}", file=sys.stderr)
+    invalid = [item for item in todo if "error" in item]
+    todo = [item for item in todo if "error" not in item]
+
+    timeout = aiohttp.ClientTimeout(total=None, sock_read=args.timeout)
+    with open(args.output, "a", encoding="utf-8") as out:
+        # Lines that are not valid items get their error result without a round trip
+        for item in invalid:
+            result = {"type": "result", "id": item["id"], "error": item["error"]}
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            progress.update(result)
+        out.flush()
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            # One request per chunk keeps uploads small; each result is saved as soon as it arrives
+            for start in range(0, len(todo), args.chunk_size):
+                body = "".join(json.dumps(item, ensure_ascii=False) + "\n" for item in todo[start:start + args.chunk_size])
+                async with session.post(f"{args.url}/chat/batch", data=body.encode("utf-8"),
+                                        params={"concurrency": args.concurrency},
+                                        headers={"Content-Type": "application/x-ndjson"}) as resp:
+                    if resp.status != 200:
+                        raise RuntimeError(f"Server error {resp.status}: {await resp.text()}")
+                    async for line in resp.content:
+                        if not line.strip():
+                            continue
+                        result = json.loads(line)
+                        if result.get("type") != "result":
+                            continue
+                        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                        out.flush()
+                        progress.update(result)
+    print(file=sys.stderr)
+    return progress
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="JSONL file of prompts")
+    parser.add_argument("--output", help="results JSONL (default: <input>.results.jsonl)")
+    parser.add_argument("--url", default=API_URL)
+    parser.add_argument("--concurrency", type=int, default=4, help="items in flight on the server")
+    parser.add_argument("--chunk-size", type=int, default=200, help="items per /chat/batch request")
+    parser.add_argument("--retry-failed", action="store_true", help="re-run items whose earlier result was an error")
+    parser.add_argument("--timeout", type=float, default=600.0, help="seconds to wait for the next result")
+    args = parser.parse_args()
+    args.output = args.output or os.path.splitext(args.input)[0] + ".results.jsonl"
+
+    try:
+        progress = asyncio.run(run(args))
+    except ValueError as e:
+        print(f"⚠️ {e}", file=sys.stderr)
+        sys.exit(2)
+    except RuntimeError as e:
+        print(f"\n⚠️ {e}", file=sys.stderr)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print(f"\nInterrupted; run the same command again to resume from {args.output}", file=sys.stderr)
+        sys.exit(130)
+    except aiohttp.ClientConnectionError:
+        print(f"\n⚠️ Could not connect to chatbot server at {args.url}", file=sys.stderr)
+        sys.exit(1)
+    print(f"{progress.completed} items processed ({progress.failed} failed), "
+          f"{progress.skipped} skipped as already done; results in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# benchmarks package - standalone performance scripts, run with `python -m ai_services.benchmarks.<name>`
@@ -0,0 +1,120 @@
+"""
+bench_clean_pipeline.py - Per-message cost of TextPreprocessor's cleaning steps
+
+Compares the precompiled step list built at construction (_clean_text)
+against a reference copy of the original implementation, which checked
+self.config before every step, looked each pattern up in re's cache on
+every call and rebuilt the punctuation table each time. Output must be
+byte-identical for every config combination measured.
+
+    python -m ai_services.benchmarks.bench_clean_pipeline --messages 20000
+"""
+
+import argparse
+import itertools
+import json
+import random
+import re
+import string
+import time
+
+from ai_services.utils.text_processor import TextPreprocessor
+
+SAMPLES = [
+    "LOL this movie is GR8! 😂 Check out https://example.com BTW",
+    "<p>Hello world!</p> This is a test...",
+    "Numbers 1234 and single letters a i should be removed.",
+    "I feel stressed and can't sleep :( 3 nights in a row",
+    "I'm anxious ALL the time, www.help.org says breathe",
+    "Tab\tand\nnewline   spaces nbsp",
+    "ww<b>w.x.com</b> odd html-made url, x y z a I b",
+    "R2D2 and C3PO are 42 years old, FR FR ASAP!!!",
+    "मनवा ठीक नइखे लागत। 12 बजे",
+    "హలో! నేను మీతో మాట్లాడాలని అనుకుంటున్నాను.",
+]
+
+TOGGLES = ["remove_html", "remove_urls", "expand_slang", "convert_lowercase",
+           "remove_numbers", "remove_punctuation", "remove_single_chars", "normalize_whitespace"]
+
+
+def legacy_clean(preprocessor, text):
+    """The cleaning chain as it was before the step list was precompiled."""
+    config = preprocessor.config
+    processed = text
+    if config['remove_html']:
+        processed = re.sub(r'<.*?>', '', processed)
+    if config['remove_urls']:
+        processed = re.sub(r'https?://\S+|www\.\S+', '', processed)
+    if config['remove_emojis']:
+        processed = preprocessor._remove_emojis(processed)
+    if config['expand_slang']:
+        processed = preprocessor._expand_slang(processed)
+    if config['convert_lowercase']:
+        processed = processed.lower()
+    if config['correct_spelling']:
+        processed = preprocessor._correct_spelling(processed)
+    if config['remove_numbers']:
+        processed = re.sub(r'\b\d+\b', '', processed)
+    if config['remove_punctuation']:
+        processed = processed.translate(str.maketrans('', '', string.punctuation))
+    if config['remove_single_chars']:
+        processed = re.sub(r'\b(?![aI]\b)[a-zA-Z]\b', '', processed)
+    if config['normalize_whitespace']:
+        processed = re.sub(r'\s+', ' ', processed.strip())
+    return processed
+
+
+def make_corpus(n, seed=0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(SAMPLES) for _ in range(rng.randint(1, 3))) for _ in range(n)]
+
+
+def per_message_us(fn, texts):
+    started = time.perf_counter()
+    for text in texts:
+        fn(text)
+    return (time.perf_counter() - started) / len(texts) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument("--all-configs", action="store_true",
+                        help="check byte-identical output for all 2^8 toggle combinations")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    texts = make_corpus(args.messages)
+
+    # Equivalence across config combinations (emoji/spelling steps are left at their defaults)
+    combos = itertools.product([False, True], repeat=len(TOGGLES)) if args.all_configs else [
+        (True,) * len(TOGGLES),
+        (True, True, True, True, True, False, True, True),  # numbers + single chars fused
+    ]
+    checked = 0
+    for values in combos:
+        preprocessor = TextPreprocessor(**dict(zip(TOGGLES, values)))
+        for text in texts[:2000]:
+            assert preprocessor._clean_text(text) == legacy_clean(preprocessor, text), (values, text)
+        checked += 1
+    print(f"byte-identical output for {checked} config combination(s)")
+
+    results = []
+    for name, overrides in [("default", {}), ("remove_numbers", {"remove_numbers": True}),
+                            ("no_punct+numbers", {"remove_numbers": True, "remove_punctuation": False})]:
+        preprocessor = TextPreprocessor(**overrides)
+        legacy = per_message_us(lambda t: legacy_clean(preprocessor, t), texts)
+        compiled = per_message_us(preprocessor._clean_text, texts)
+        results.append({"config": name, "legacy_us": round(legacy, 2), "compiled_us": round(compiled, 2),
+                        "speedup": round(legacy / compiled, 2)})
+
+    for r in results:
+        print(f"{r['config']:<18} legacy {r['legacy_us']:>7} us/msg  compiled {r['compiled_us']:>7} us/msg  "
+              f"x{r['speedup']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+bench_health_under_load.py - /health latency while chats are being preprocessed
+
+Starts the real app under uvicorn once per NLP pool mode, fires rounds of
+concurrent /chat requests with long messages (so preprocessing dominates)
+and probes /health every few milliseconds meanwhile. With preprocessing on
+the event loop ("inline") /health waits behind it; with the thread or
+process pool it should stay close to the idle latency.
+
+Ollama is not needed: fake_ollama.py runs in a background thread and answers
+instantly, so the time measured is the app's own.
+
+    python -m ai_services.benchmarks.bench_health_under_load --chats 50 --modes inline thread process
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+from ai_services.benchmarks.bench_preprocess_batch import make_corpus
+from ai_services.benchmarks.fake_ollama import start_in_thread
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+def long_messages(n, words):
+    corpus = make_corpus(n * words // 8 + n, seed=3)
+    per = len(corpus) // n
+    return [" 😂 ".join(corpus[i * per:(i + 1) * per]) for i in range(n)]
+
+
+async def wait_ready(session, url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async with session.get(url + "/health") as resp:
+                if resp.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not come up")
+
+
+async def probe_health(session, url, interval, stop, samples):
+    while not stop.is_set():
+        started = time.perf_counter()
+        async with session.get(url + "/health") as resp:
+            await resp.read()
+        samples.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(interval)
+
+
+async def measure(url, messages, rounds, interval):
+    async with aiohttp.ClientSession() as session:
+        await wait_ready(session, url)
+        idle, loaded, chat_ms = [], [], []
+
+        stop = asyncio.Event()
+        prober = asyncio.create_task(probe_health(session, url, interval, stop, idle))
+        await asyncio.sleep(1.0)
+        stop.set()
+        await prober
+
+        async def chat(message):
+            started = time.perf_counter()
+            async with session.post(url + "/chat", json={"message": message}) as resp:
+                await resp.read()
+            chat_ms.append((time.perf_counter() - started) * 1000)
+
+        stop = asyncio.Event()
+        prober = asyncio.create_task(probe_health(session, url, interval, stop, loaded))
+        started = time.perf_counter()
+        for _ in range(rounds):
+            await asyncio.gather(*(chat(m) for m in messages))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await prober
+    return {
+        "idle_p50_ms": round(percentile(idle, 0.5), 2),
+        "loaded_p50_ms": round(percentile(loaded, 0.5), 2),
+        "loaded_p99_ms": round(percentile(loaded, 0.99), 2),
+        "loaded_max_ms": round(max(loaded), 2) if loaded else 0.0,
+        "health_probes": len(loaded),
+        "chat_p50_ms": round(percentile(chat_ms, 0.5), 1),
+        "chats_per_s": round(len(chat_ms) / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chats", type=int, default=50, help="concurrent /chat requests per round")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--message-words", type=int, default=400)
+    parser.add_argument("--modes", nargs="+", default=["inline", "thread", "process"])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ollama-port", type=int, default=8766)
+    parser.add_argument("--probe-interval-ms", type=float, default=5)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    messages = long_messages(args.chats, args.message_words)
+    print(f"{args.chats} concurrent chats x {args.rounds} rounds, ~{sum(map(len, messages)) // len(messages)} chars each")
+
+    start_in_thread(args.ollama_port, tokens_per_s=0, latency_ms=0, prefill_tokens_per_s=0,
+                    parallel=args.chats, jitter=0)
+    results = []
+    for mode in args.modes:
+        env = {
+            **os.environ,
+            "NLP_POOL_MODE": mode,
+            "NLP_POOL_WORKERS": str(args.workers),
+            "OLLAMA_BASE_URL": f"http://127.0.0.1:{args.ollama_port}",
+            "OLLAMA_API_MODE": "chat",
+            "RESPONSE_CACHE_ENABLED": "false",
+            "LLM_MAX_QUEUE": str(args.chats * 2),  # measure preprocessing, not admission rejections
+        }
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "ai_services.app:app", "--port", str(args.port), "--log-level", "warning"],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            result = asyncio.run(measure(f"http://127.0.0.1:{args.port}", messages, args.rounds,
+                                         args.probe_interval_ms / 1000))
+        finally:
+            server.terminate()
+            server.wait()
+        results.append({"mode": mode, **result})
+
+    for r in results:
+        print(f"{r['mode']:<8} /health idle p50 {r['idle_p50_ms']:>6} ms | under load p50 {r['loaded_p50_ms']:>7} ms  "
+              f"p99 {r['loaded_p99_ms']:>7} ms  max {r['loaded_max_ms']:>7} ms ({r['health_probes']} probes) | "
+              f"chat p50 {r['chat_p50_ms']} ms, {r['chats_per_s']} chats/s")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
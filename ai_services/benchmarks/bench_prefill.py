@@ -0,0 +1,78 @@
+"""
+bench_prefill.py - Prefill cost per turn: /api/generate vs /api/chat
+
+Replays the same multi-turn conversation against a running Ollama once per
+API mode and prints Ollama's prompt_eval_count / prompt_eval_duration for
+every turn. In "generate" mode the whole flattened prompt (system prompt +
+history) is re-evaluated each turn; in "chat" mode only the tokens after the
+cached prefix should be.
+
+    python -m ai_services.benchmarks.bench_prefill --turns 5
+"""
+
+import argparse
+import asyncio
+import json
+
+from ai_services.chatbot.ai_client import LocalLLMClient, SYSTEM_PROMPT, OLLAMA_BASE_URL, OLLAMA_MODEL
+
+TURNS = [
+    "I have been feeling really stressed lately",
+    "Mostly about exams, I can't switch off at night",
+    "I sleep maybe four or five hours",
+    "Yes, I feel tired most of the day",
+    "What can I do to relax before bed?",
+    "Thanks, can you suggest a breathing exercise?",
+]
+
+
+async def run_mode(api_mode, turns, max_tokens):
+    client = LocalLLMClient(base_url=OLLAMA_BASE_URL, model=OLLAMA_MODEL, api_mode=api_mode)
+    history = []
+    rows = []
+    try:
+        for i, user_input in enumerate(turns, start=1):
+            messages = [{"role": "system", "content": SYSTEM_PROMPT}] + history + [{"role": "user", "content": user_input}]
+            text, stats = await client.completion_with_stats(messages, max_tokens=max_tokens)
+            history += [{"role": "user", "content": user_input}, {"role": "assistant", "content": text.strip()}]
+            rows.append({
+                "mode": api_mode,
+                "turn": i,
+                "prompt_eval_count": stats.get("prompt_eval_count", 0),
+                "prompt_eval_ms": round(stats.get("prompt_eval_duration", 0) / 1e6, 1),
+                "eval_count": stats.get("eval_count", 0),
+                "eval_ms": round(stats.get("eval_duration", 0) / 1e6, 1),
+            })
+            print(f"{api_mode:<9} turn {i}: prefill {rows[-1]['prompt_eval_count']:>5} tok "
+                  f"in {rows[-1]['prompt_eval_ms']:>8.1f} ms | decode {rows[-1]['eval_count']:>4} tok "
+                  f"in {rows[-1]['eval_ms']:>8.1f} ms")
+    finally:
+        await client.close()
+    return rows
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=len(TURNS))
+    parser.add_argument("--max-tokens", type=int, default=64)
+    parser.add_argument("--json", help="write per-turn results to this file")
+    args = parser.parse_args()
+
+    turns = TURNS[:args.turns]
+    rows = []
+    for mode in ("generate", "chat"):
+        rows += await run_mode(mode, turns, args.max_tokens)
+
+    # Turn 1 is a cold prefill in both modes; compare the follow-up turns
+    for mode in ("generate", "chat"):
+        later = [r["prompt_eval_ms"] for r in rows if r["mode"] == mode and r["turn"] > 1]
+        if later:
+            print(f"{mode:<9} mean prefill on turns 2..{len(turns)}: {sum(later) / len(later):.1f} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+"""
+bench_preprocess_batch.py - Throughput of per-message vs batched preprocessing
+
+Times TextPreprocessor.preprocess called once per message against
+preprocess_batch (nlp.pipe / worker processes) on the same synthetic chat
+corpus, and checks that both produce identical output (without a spaCy
+model; with one, batches use spaCy's tokens and lemmas instead of NLTK's).
+
+    python -m ai_services.benchmarks.bench_preprocess_batch --messages 100000 --n-process 1 4
+"""
+
+import argparse
+import json
+import random
+import time
+
+from ai_services.utils.text_processor import TextPreprocessor
+
+OPENERS = [
+    "hi", "hello there", "I feel stressed", "can't sleep", "I'm anxious all the time",
+    "LOL exams are GR8 😂", "I have trouble focusing on my studies.",
+    "Sometimes I can't sleep and feel low.", "<b>help</b> me please",
+    "check https://example.com it says breathe", "FR I'm tired ASAP",
+]
+DETAILS = [
+    "my exams start in 2 weeks", "I keep waking up at 3am", "nobody seems to understand me",
+    "work has been piling up", "I drink coffee all day", "my heart races before class",
+    "I haven't talked to my friends in days", "everything feels like too much",
+]
+
+
+def make_corpus(n, seed=0):
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(OPENERS)}, {rng.choice(DETAILS)}" + (f" and {rng.choice(DETAILS)}" if rng.random() < 0.5 else "")
+        for _ in range(n)
+    ]
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--n-process", type=int, nargs="+", default=[1])
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    texts = make_corpus(args.messages)
+    preprocessor = TextPreprocessor()
+    backend = "spaCy" if preprocessor.nlp is not None else "NLTK/plain"
+    print(f"{args.messages} messages, backend: {backend}")
+
+    baseline, seconds = timed(lambda: [preprocessor.preprocess(t) for t in texts])
+    results = [{"mode": "per-message", "n_process": 1, "seconds": round(seconds, 2),
+                "msgs_per_s": round(len(texts) / seconds)}]
+
+    for n_process in args.n_process:
+        batched, seconds = timed(lambda: preprocessor.preprocess_batch(
+            texts, batch_size=args.batch_size, n_process=n_process))
+        if preprocessor.nlp is None:
+            assert batched == baseline, "batched output differs from per-message output"
+        results.append({"mode": "batch", "n_process": n_process, "seconds": round(seconds, 2),
+                        "msgs_per_s": round(len(texts) / seconds)})
+
+    for r in results:
+        print(f"{r['mode']:<12} n_process={r['n_process']}: {r['seconds']:>8} s  {r['msgs_per_s']:>8} msg/s")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
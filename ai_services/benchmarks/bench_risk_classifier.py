@@ -0,0 +1,95 @@
+"""
+bench_risk_classifier.py - Latency of the micro-batched risk classifier stage
+
+Fires concurrent classify() calls at the shipped model and reports p50/p99
+per-request latency, model-call latency and the average batch size, with
+and without micro-batching. A deliberately slow model shows the deadline
+bounding the added latency (those requests fall back to keywords).
+
+    python -m ai_services.benchmarks.bench_risk_classifier --requests 5000 --concurrency 1 16 64
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from ai_services.utils.config import Config
+from ai_services.utils.text_processor import get_preprocessor
+from ai_services.chatbot.safety import scan
+from ai_services.chatbot.risk_classifier import RiskClassifier, load_risk_model
+from ai_services.benchmarks.bench_preprocess_batch import make_corpus
+
+
+class SlowModel:
+    """Wraps a model and adds a fixed delay to every call"""
+
+    def __init__(self, model, delay):
+        self.model = model
+        self.delay = delay
+        self.thresholds = model.thresholds
+
+    def predict_proba(self, texts):
+        time.sleep(self.delay)
+        return self.model.predict_proba(texts)
+
+
+async def run(model, texts, concurrency, max_batch, deadline):
+    classifier = RiskClassifier(model, fallback=scan, deadline=deadline, max_batch=max_batch,
+                                max_wait=Config.RISK_BATCH_WAIT)
+    await classifier.start()
+    queue = iter(texts)
+
+    async def worker():
+        for text in queue:
+            await classifier.classify(text)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    await classifier.stop()
+    stats = classifier.stats()
+    return {"concurrency": concurrency, "max_batch": max_batch, "deadline_ms": deadline * 1000,
+            "per_s": round(len(texts) / elapsed), **{k: stats[k] for k in (
+                "p50_latency_ms", "p99_latency_ms", "p50_inference_ms", "p99_inference_ms",
+                "avg_batch_size", "fallbacks", "flagged")}}
+
+
+async def main_async(args):
+    model = load_risk_model(Config.RISK_MODEL_PATH)
+    preprocessor = get_preprocessor()
+    texts = [preprocessor.preprocess(t) for t in make_corpus(args.requests)]
+
+    results = []
+    for concurrency in args.concurrency:
+        for max_batch in (1, Config.RISK_BATCH_MAX):
+            results.append(await run(model, texts, concurrency, max_batch, Config.RISK_CLASSIFIER_DEADLINE))
+    # A model slower than the deadline: every request should come back in about the deadline
+    slow = SlowModel(model, args.slow_model_ms / 1000)
+    results.append({**await run(slow, texts[:500], max(args.concurrency), Config.RISK_BATCH_MAX,
+                                Config.RISK_CLASSIFIER_DEADLINE), "slow_model_ms": args.slow_model_ms})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--slow-model-ms", type=float, default=200)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+    for r in results:
+        label = f"slow model ({r['slow_model_ms']:.0f} ms)" if "slow_model_ms" in r else "shipped model"
+        print(f"{label:<22} conc={r['concurrency']:<3} max_batch={r['max_batch']:<3} "
+              f"p50 {r['p50_latency_ms']:>7} ms  p99 {r['p99_latency_ms']:>7} ms  "
+              f"model p50 {r['p50_inference_ms']:>6} ms  batch {r['avg_batch_size']:>5}  "
+              f"{r['per_s']:>6}/s  fallbacks {r['fallbacks']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+bench_safety_matcher.py - Safety keyword matching cost vs number of phrases
+
+Compares the original check (one re.search(rf"\\b{keyword}\\b") per keyword
+per message) against the Aho–Corasick KeywordMatcher at 10 / 1k / 10k
+phrases, and checks both find the same messages.
+
+    python -m ai_services.benchmarks.bench_safety_matcher --messages 2000
+"""
+
+import argparse
+import json
+import random
+import re
+import time
+
+from ai_services.chatbot.matcher import KeywordMatcher, normalize
+from ai_services.chatbot.safety import SUICIDE_KEYWORDS, ELEVATED_RISK_KEYWORDS
+from ai_services.benchmarks.bench_preprocess_batch import make_corpus
+
+VOCAB = ("feel sleep stressed anxious tired exam work friends family alone night heart "
+         "breathe panic cry lost empty numb angry scared future class money help talk").split()
+
+
+def make_phrases(n, seed=0):
+    """The real English phrases plus synthetic 3-4 word phrases (which rarely occur) up to n"""
+    rng = random.Random(seed)
+    phrases = [p for p in ELEVATED_RISK_KEYWORDS + SUICIDE_KEYWORDS if p.isascii() and not p.endswith("*")][:n]
+    seen = set(phrases)
+    while len(phrases) < n:
+        phrase = " ".join(rng.choice(VOCAB) + rng.choice(["", "s", "ed", "ing", "ly"]) for _ in range(rng.randint(3, 4)))
+        if phrase not in seen:
+            seen.add(phrase)
+            phrases.append(phrase)
+    return phrases
+
+
+def regex_loop(phrases):
+    """The original approach: a separate \\b...\\b search per phrase"""
+    def check(text):
+        text_lower = normalize(text)
+        return any(re.search(rf"\b{re.escape(p)}\b", text_lower) for p in phrases)
+    return check
+
+
+def per_message_us(fn, texts):
+    started = time.perf_counter()
+    hits = [bool(fn(t)) for t in texts]
+    return (time.perf_counter() - started) / len(texts) * 1e6, hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    texts = [t + (" and I want to die" if rng.random() < 0.05 else "") for t in make_corpus(args.messages)]
+    avg_len = sum(len(t) for t in texts) / len(texts)
+    print(f"{len(texts)} messages, {avg_len:.0f} chars on average")
+
+    results = []
+    for size in args.sizes:
+        phrases = make_phrases(size)
+        started = time.perf_counter()
+        matcher = KeywordMatcher(phrases)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        ac_us, ac_hits = per_message_us(matcher.search, texts)
+        loop_us, loop_hits = per_message_us(regex_loop(phrases), texts)
+        assert ac_hits == loop_hits, "matcher and regex loop disagree"
+        results.append({"phrases": size, "build_ms": round(build_ms, 1), "regex_loop_us": round(loop_us, 1),
+                        "matcher_us": round(ac_us, 1), "flagged": sum(ac_hits)})
+
+    for r in results:
+        print(f"{r['phrases']:>6} phrases: regex loop {r['regex_loop_us']:>9} us/msg  "
+              f"matcher {r['matcher_us']:>6} us/msg  (build {r['build_ms']} ms, {r['flagged']} flagged)")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+bench_semantic_cache.py - Lookup latency of the semantic cache's vector index
+
+Fills a VectorIndex with random unit vectors and times nearest-neighbour
+searches (one matrix-vector product each) at several index sizes.
+
+    python -m ai_services.benchmarks.bench_semantic_cache --sizes 10000 100000 --dim 768
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from ai_services.chatbot.semantic_cache import VectorIndex
+
+
+def bench(size, dim, queries, rng):
+    index = VectorIndex(dim, size)
+    vectors = rng.standard_normal((size, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    index.vectors[:] = vectors
+    index.size = size
+
+    timings = []
+    for _ in range(queries):
+        query = VectorIndex.normalize(rng.standard_normal(dim, dtype=np.float32))
+        started = time.perf_counter()
+        index.search(query)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "entries": size,
+        "dim": dim,
+        "index_mb": round(index.vectors.nbytes / 1e6, 1),
+        "p50_ms": round(timings[len(timings) // 2], 3),
+        "p99_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.99))], 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    results = [bench(size, args.dim, args.queries, rng) for size in args.sizes]
+    for r in results:
+        print(f"{r['entries']:>8} entries x {r['dim']} dims ({r['index_mb']} MB): "
+              f"p50 {r['p50_ms']} ms, p99 {r['p99_ms']} ms")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
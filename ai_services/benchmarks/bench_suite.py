@@ -0,0 +1,216 @@
+"""
+bench_suite.py - Microbenchmarks for the text and safety hot paths
+
+Times the per-message CPU work of a chat turn on the fixed corpora in
+corpus.py:
+
+  preprocess/<config>/<corpus>  TextPreprocessor.preprocess, per config combination
+  preprocess_batch/<corpus>     TextPreprocessor.preprocess_batch on the corpus
+  safety/<corpus>               check_safety
+  translation_check/<corpus>    the translation stage's ASCII/English fast path
+  prompt/<n>_turns              _convert_messages_to_prompt with n turns of history
+  prompt_build/<n>_turns        PromptBuilder.build (token budgeting) with n turns of history
+  suggestions                   build_suggestions on fixed bot replies
+  suggestions_stream            the same, fed to an IntentTracker a token at a time
+  suggestions/<n>_intents       build_suggestions with n synthetic intents (should stay flat)
+
+Each case runs once untimed (models and caches warm), then --repeat timed
+rounds of enough loops to last --min-time seconds. The median and minimum
+per-operation time go to --json together with the environment. --compare
+checks a run against an earlier file and exits non-zero when any case got
+slower than --threshold, so it can gate CI on the same machine.
+
+    python -m ai_services.benchmarks.bench_suite --json baseline.json
+    python -m ai_services.benchmarks.bench_suite --compare baseline.json --threshold 0.2
+    python -m ai_services.benchmarks.bench_suite --filter safety
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from ai_services.utils.config import Config
+from ai_services.utils.text_processor import TextPreprocessor
+from ai_services.chatbot.safety import check_safety
+from ai_services.chatbot.translation import needs_translation
+from ai_services.chatbot.ai_client import LocalLLMClient, SYSTEM_PROMPT
+from ai_services.chatbot.prompt_builder import PromptBuilder
+from ai_services.chatbot.routes import build_suggestions
+from ai_services.chatbot.intents import IntentEngine, intent_engine
+from ai_services.benchmarks.bench_prefill import TURNS
+from ai_services.benchmarks.corpus import CORPORA, RESPONSES
+
+# TextPreprocessor overrides per benchmarked combination ("default" is what the service runs)
+PREPROCESS_CONFIGS = {
+    "default": {},
+    "stem": {"lemmatize_words": False, "stem_words": True},
+    "no_lemmatize": {"lemmatize_words": False},
+    "keep_stopwords": {"remove_stopwords": False},
+    "no_tokenize": {"tokenize": False},
+    "minimal": {"remove_emojis": False, "expand_slang": False, "remove_stopwords": False, "lemmatize_words": False},
+}
+PROMPT_HISTORY_TURNS = [0, 10, 40]
+SYNTHETIC_INTENTS = [10, 500]
+
+
+def make_cases(selected_corpora):
+    """(name, fn, operations per call) for every case"""
+    corpora = {name: CORPORA[name] for name in selected_corpora}
+    cases = []
+
+    for config_name, overrides in PREPROCESS_CONFIGS.items():
+        preprocessor = TextPreprocessor(**overrides)
+        for corpus_name, texts in corpora.items():
+            cases.append((f"preprocess/{config_name}/{corpus_name}",
+                          lambda p=preprocessor, t=texts: [p.preprocess(x) for x in t], len(texts)))
+
+    preprocessor = TextPreprocessor()
+    for corpus_name, texts in corpora.items():
+        cases.append((f"preprocess_batch/{corpus_name}",
+                      lambda t=texts: preprocessor.preprocess_batch(t), len(texts)))
+
+    for corpus_name, texts in corpora.items():
+        cases.append((f"safety/{corpus_name}", lambda t=texts: [check_safety(x) for x in t], len(texts)))
+    for corpus_name, texts in corpora.items():
+        cases.append((f"translation_check/{corpus_name}", lambda t=texts: [needs_translation(x) for x in t], len(texts)))
+
+    client = LocalLLMClient(api_mode="generate")
+    builder = PromptBuilder(SYSTEM_PROMPT)
+    for turns in PROMPT_HISTORY_TURNS:
+        history = []
+        for i in range(turns):
+            history += [{"role": "user", "content": TURNS[i % len(TURNS)]},
+                        {"role": "assistant", "content": RESPONSES[i % len(RESPONSES)]}]
+        messages = [{"role": "system", "content": SYSTEM_PROMPT}] + history + [{"role": "user", "content": TURNS[0]}]
+        cases.append((f"prompt/{turns}_turns", lambda m=messages: client._convert_messages_to_prompt(m), 1))
+        cases.append((f"prompt_build/{turns}_turns",
+                      lambda h=history: builder.build(TURNS[0], h, RESPONSES[0]), 1))
+
+    cases.append(("suggestions", lambda: [build_suggestions(r) for r in RESPONSES], len(RESPONSES)))
+    tokenized = [r.split(" ") for r in RESPONSES]
+    cases.append(("suggestions_stream", lambda: [stream_suggestions(tokens) for tokens in tokenized], len(RESPONSES)))
+    for count in SYNTHETIC_INTENTS:
+        engine = synthetic_intents(count)
+        cases.append((f"suggestions/{count}_intents", lambda e=engine: [e.suggest(r) for r in RESPONSES], len(RESPONSES)))
+    return cases
+
+
+def stream_suggestions(tokens):
+    tracker = intent_engine.tracker()
+    for token in tokens:
+        tracker.feed(token + " ")
+    return tracker.suggestions()
+
+
+def synthetic_intents(count):
+    """The real intents plus made-up ones, five phrases each, to show matching cost doesn't grow with them"""
+    with open(Config.INTENTS_PATH, encoding="utf-8") as f:
+        data = json.load(f)
+    intents = data["intents"]
+    for n in range(count - len(intents)):
+        intents.append({"name": f"synthetic_{n}", "priority": 1, "suggestions": [f"Suggestion {n}"],
+                        "phrases": [f"zq{n}word{k}" for k in range(5)]})
+    return IntentEngine(intents, data["default_suggestions"])
+
+
+def time_case(fn, ops, repeat, min_time):
+    """Median and min microseconds per operation over `repeat` rounds"""
+    fn()  # warm-up: lazy models, lemma cache, regexes
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    rounds = [elapsed]
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        rounds.append(time.perf_counter() - started)
+    per_op = [seconds / (loops * ops) * 1e6 for seconds in rounds]
+    return {"median_us": round(statistics.median(per_op), 3), "min_us": round(min(per_op), 3),
+            "ops": ops, "loops": loops}
+
+
+def environment():
+    preprocessor = TextPreprocessor()
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "nlp_backend": "spaCy" if preprocessor.nlp is not None else "NLTK/plain",
+        "commit": commit,
+    }
+
+
+def compare(results, baseline_path, threshold):
+    """Print the change per case; returns the names of cases slower than the threshold"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("environment", {}).get("nlp_backend") != results["environment"]["nlp_backend"]:
+        print(f"warning: baseline used the {baseline['environment'].get('nlp_backend')} backend, "
+              f"this run {results['environment']['nlp_backend']}; preprocess numbers are not comparable")
+    before = {case["name"]: case for case in baseline["cases"]}
+    regressions = []
+    print(f"\n{'case':<44} {'before us':>11} {'now us':>11} {'change':>8}")
+    for case in results["cases"]:
+        old = before.get(case["name"])
+        if old is None:
+            print(f"{case['name']:<44} {'-':>11} {case['median_us']:>11} {'new':>8}")
+            continue
+        change = case["median_us"] / old["median_us"] - 1 if old["median_us"] else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(case["name"])
+            flag = "  REGRESSION"
+        print(f"{case['name']:<44} {old['median_us']:>11} {case['median_us']:>11} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpora", nargs="+", default=list(CORPORA), choices=list(CORPORA))
+    parser.add_argument("--filter", help="only cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.05, help="seconds per timed round")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="earlier --json output to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="relative slowdown of the median counted as a regression (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    results = {"environment": environment(), "cases": []}
+    print(f"backend: {results['environment']['nlp_backend']}, python {results['environment']['python']}")
+    for name, fn, ops in make_cases(args.corpora):
+        if args.filter and args.filter not in name:
+            continue
+        result = {"name": name, **time_case(fn, ops, args.repeat, args.min_time)}
+        results["cases"].append(result)
+        print(f"{name:<44} median {result['median_us']:>10} us/op   min {result['min_us']:>10} us/op")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
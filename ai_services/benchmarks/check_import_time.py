@@ -0,0 +1,73 @@
+"""
+check_import_time.py - Import-time budget check for the service modules
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter for
+each module, compares the cumulative import time against its budget and
+checks that none of the heavy NLP dependencies were imported as a side
+effect (they are loaded by TextPreprocessor / warm_up() instead). Exits
+non-zero when a budget is exceeded. tests/test_import_time.py runs the
+same checks under pytest (IMPORT_TIME_BUDGET_SCALE scales the budgets).
+
+    python -m ai_services.benchmarks.check_import_time
+    python -m ai_services.benchmarks.check_import_time --budget-scale 2
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+# module -> budget in milliseconds
+BUDGETS_MS = {
+    "ai_services": 150,
+    "ai_services.utils.text_processor": 150,
+    "ai_services.chatbot.processor": 1000,
+    "ai_services.app": 2000,
+}
+HEAVY_MODULES = ["spacy", "nltk", "emoji", "textblob", "pandas", "googletrans"]
+
+
+def measure(module, cwd=None):
+    """Cumulative import time (ms) of module and the heavy modules it pulled in"""
+    code = f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          capture_output=True, text=True, check=True, cwd=cwd)
+    cumulative_us = 0
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = [p.strip() for p in line[len("import time:"):].split("|")]
+        if parts[2].strip() == module:
+            cumulative_us = int(parts[1])
+    heavy = [m for m in proc.stdout.strip().split(",") if m]
+    return cumulative_us / 1000, heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-scale", type=float, default=1.0,
+                        help="multiply every budget (e.g. for slow CI machines)")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for module, budget in BUDGETS_MS.items():
+        millis, heavy = measure(module)
+        budget = budget * args.budget_scale
+        ok = millis <= budget and not heavy
+        results.append({"module": module, "import_ms": round(millis, 1), "budget_ms": budget,
+                        "heavy_modules": heavy, "ok": ok})
+
+    for r in results:
+        status = "ok" if r["ok"] else "OVER BUDGET"
+        extra = f"  heavy: {', '.join(r['heavy_modules'])}" if r["heavy_modules"] else ""
+        print(f"{r['module']:<36} {r['import_ms']:>8} ms  (budget {r['budget_ms']:.0f} ms)  {status}{extra}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    sys.exit(0 if all(r["ok"] for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+corpus.py - Fixed chat corpora for the benchmark suite
+
+Hand-written, checked-in messages so every run times exactly the same
+input. Kept small on purpose: the suite repeats them, it doesn't need
+volume. Change them only together with a new baseline (bench_suite.py
+--json), otherwise comparisons against older results are meaningless.
+"""
+
+ENGLISH = [
+    "hi",
+    "I can't sleep and I feel stressed about my exams",
+    "I'm anxious all the time and my heart races before class",
+    "Sometimes I can't sleep and feel low, I keep waking up at 3am",
+    "nobody seems to understand me, I haven't talked to my friends in days",
+    "work has been piling up and everything feels like too much right now",
+    "What can I do to relax before bed? I drink coffee all day",
+    "Thanks, that helps. Can you suggest a breathing exercise?",
+    "I feel hopeless about the future and I don't know who to talk to",
+    "My parents keep fighting and I can't focus on my studies at all",
+]
+
+# Chat-speak, markup, links, emoji: exercises every cleaning step
+NOISY = [
+    "LOL exams are GR8 😂😂 not",
+    "<b>help</b> me please, I feel stressed!!!",
+    "check https://example.com it says breathe 4-7-8 🌬️",
+    "FR I'm tired ASAP need sleep 😴😴",
+    "BRB... my mom's calling <i>again</i> 🙄",
+    "idk what 2 do anymore... tbh it's been 3 weeks",
+    "<p>Can't stop overthinking</p> <br> www.example.org/tips",
+    "IMO ppl don't get it 😔 #anxiety #exams",
+]
+
+# Romanized Hindi/English mix (passes the ASCII bypass, no translation)
+HINGLISH = [
+    "yaar bahut tension ho rahi hai exams ki",
+    "mujhe neend nahi aa rahi, raat bhar sochta rehta hoon",
+    "ghar pe sab theek nahi hai, kisi se baat nahi kar pa raha",
+    "kal se bahut udaas feel ho raha hai",
+    "kya karun samajh nahi aa raha, sab kuch bahut zyada lagta hai",
+]
+
+HINDI = [
+    "मुझे आज बहुत उदास लग रहा है",
+    "मुझे रात को नींद नहीं आती और परीक्षा की चिंता रहती है",
+    "मनवा ठीक नइखे लागत।",
+    "मैं किसी से बात नहीं कर पा रहा हूँ, सब कुछ बहुत भारी लगता है",
+    "घर में बहुत झगड़े होते हैं और मैं पढ़ाई पर ध्यान नहीं दे पाता",
+]
+
+TELUGU = [
+    "హలో! నేను మీతో మాట్లాడాలని అనుకుంటున్నాను.",
+    "నాకు నిద్ర పట్టడం లేదు, చాలా ఒత్తిడిగా ఉంది",
+    "పరీక్షల గురించి చాలా భయంగా ఉంది",
+    "ఎవరితోనూ మాట్లాడాలని అనిపించడం లేదు",
+]
+
+# Messages that should trip the safety filter (raw-text and cleaned-text paths)
+AT_RISK = [
+    "I want to die, nothing matters anymore",
+    "sometimes I think about ending my life",
+    "I feel worthless and like a burden to everyone",
+    "मैं मरना चाहता हूँ",
+    "I've been hurting myself again",
+]
+
+CORPORA = {
+    "english": ENGLISH,
+    "noisy": NOISY,
+    "hinglish": HINGLISH,
+    "hindi": HINDI,
+    "telugu": TELUGU,
+    "at_risk": AT_RISK,
+}
+
+# Bot replies for the suggestion scan: keyword hits early, late and not at all
+RESPONSES = [
+    "I hear you. Anxiety can feel overwhelming, let's take a breath together.",
+    "It sounds like you have been carrying a lot lately. Would you like to tell me more about what happened today?",
+    "Getting enough rest matters. " * 6 + "Have you noticed how tired you feel in the afternoon?",
+    "That sounds really hard. Feeling down for weeks is worth talking to someone about, and I'm here to listen.",
+    "Thank you for sharing that with me.",
+    "Let's try a grounding exercise: name five things you can see, four you can touch, three you can hear. " * 3,
+]
@@ -0,0 +1,205 @@
+"""
+fake_ollama.py - Local stand-in for Ollama, for load tests without a model
+
+Serves the endpoints the service uses, with timing that behaves like a
+real model:
+
+  GET  /api/tags                 the configured model names
+  POST /api/generate, /api/chat  streaming (NDJSON, the default) and non-streaming
+  POST /api/embed                deterministic bag-of-words vectors (semantic cache)
+
+Each generation waits --latency-ms plus prompt prefill at --prefill-tokens-per-s,
+then emits --reply-tokens tokens at --tokens-per-s. The final object carries
+the usual prompt_eval_count / eval_count / *_duration fields, computed from
+the simulated times. At most --parallel generations run at once, like
+OLLAMA_NUM_PARALLEL; the rest queue. --jitter randomizes every delay by up
+to that fraction. --error-rate answers a request with HTTP 500.
+--stream-error-rate breaks a stream part-way with an {"error": ...} line.
+
+    python -m ai_services.benchmarks.fake_ollama --port 11434 --tokens-per-s 30 --error-rate 0.01
+
+No network access or model download is needed. Other benchmarks can also
+run the server in-process with start_in_thread().
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+import zlib
+
+from aiohttp import web
+
+from ai_services.utils.config import Config
+
+REPLY_WORDS = (
+    "I hear you . It sounds like things have been really heavy lately , and it makes sense to feel "
+    "tired and worried . Would you like to try a short breathing exercise together , or tell me more "
+    "about what has been on your mind today ?"
+).split()
+EMBEDDING_DIM = 64
+
+
+class FakeOllama:
+    def __init__(self, models=None, tokens_per_s=30.0, reply_tokens=40, latency_ms=20.0,
+                 prefill_tokens_per_s=2000.0, parallel=4, jitter=0.1, error_rate=0.0,
+                 stream_error_rate=0.0, seed=None):
+        self.models = models or [Config.OLLAMA_MODEL]
+        self.tokens_per_s = tokens_per_s
+        self.reply_tokens = reply_tokens
+        self.latency = latency_ms / 1000
+        self.prefill_tokens_per_s = prefill_tokens_per_s
+        self.parallel = parallel
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.stream_error_rate = stream_error_rate
+        self.rng = random.Random(seed)
+        self._slots = None
+        self.counters = {"requests": 0, "errors_injected": 0, "stream_errors_injected": 0, "tokens": 0}
+
+    def _delay(self, seconds):
+        if self.jitter and seconds:
+            seconds *= 1 + self.rng.uniform(-self.jitter, self.jitter)
+        return max(0.0, seconds)
+
+    def _token_delay(self):
+        return self._delay(1 / self.tokens_per_s) if self.tokens_per_s > 0 else 0.0
+
+    def make_app(self):
+        app = web.Application()
+        app.router.add_get("/api/tags", self.tags)
+        app.router.add_post("/api/generate", self.generate)
+        app.router.add_post("/api/chat", self.generate)
+        app.router.add_post("/api/embed", self.embed)
+        app.router.add_get("/fake/stats", self.stats)
+        return app
+
+    async def tags(self, request):
+        return web.json_response({"models": [{"name": name, "model": name} for name in self.models]})
+
+    async def stats(self, request):
+        return web.json_response(self.counters)
+
+    async def generate(self, request):
+        body = await request.json()
+        self.counters["requests"] += 1
+        chat = request.path.endswith("/chat")
+        if body.get("model") not in self.models:
+            return web.json_response({"error": f"model '{body.get('model')}' not found"}, status=404)
+        if self.rng.random() < self.error_rate:
+            self.counters["errors_injected"] += 1
+            return web.json_response({"error": "injected failure"}, status=500)
+
+        if chat:
+            prompt = " ".join(m.get("content", "") for m in body.get("messages", []))
+        else:
+            prompt = body.get("prompt", "")
+        prompt_tokens = max(1, len(prompt.split()))
+        limit = body.get("options", {}).get("num_predict") or self.reply_tokens
+        words = [REPLY_WORDS[i % len(REPLY_WORDS)] for i in range(min(self.reply_tokens, limit))]
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.parallel)
+        async with self._slots:
+            started = time.perf_counter()
+            prefill = self._delay(self.latency + (prompt_tokens / self.prefill_tokens_per_s if self.prefill_tokens_per_s else 0))
+            await asyncio.sleep(prefill)
+            prefill_done = time.perf_counter()
+
+            def final(text=""):
+                now = time.perf_counter()
+                piece = {"message": {"role": "assistant", "content": text}} if chat else {"response": text}
+                return {
+                    "model": body["model"], **piece, "done": True, "done_reason": "stop",
+                    "total_duration": int((now - started) * 1e9),
+                    "prompt_eval_count": prompt_tokens, "prompt_eval_duration": int((prefill_done - started) * 1e9),
+                    "eval_count": len(words), "eval_duration": int((now - prefill_done) * 1e9),
+                }
+
+            if not body.get("stream", True):
+                await asyncio.sleep(sum(self._token_delay() for _ in words))
+                self.counters["tokens"] += len(words)
+                return web.json_response(final(" ".join(words)))
+
+            response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+            await response.prepare(request)
+            break_at = self.rng.randrange(len(words)) if words and self.rng.random() < self.stream_error_rate else None
+            for i, word in enumerate(words):
+                if i == break_at:
+                    self.counters["stream_errors_injected"] += 1
+                    await response.write(json.dumps({"error": "injected stream failure"}).encode() + b"\n")
+                    await response.write_eof()
+                    return response
+                await asyncio.sleep(self._token_delay())
+                text = word if i == 0 else " " + word
+                piece = {"message": {"role": "assistant", "content": text}} if chat else {"response": text}
+                await response.write(json.dumps({"model": body["model"], **piece, "done": False}).encode() + b"\n")
+                self.counters["tokens"] += 1
+            await response.write(json.dumps(final()).encode() + b"\n")
+            await response.write_eof()
+            return response
+
+    async def embed(self, request):
+        body = await request.json()
+        inputs = body.get("input") or ""
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        await asyncio.sleep(self._delay(self.latency))
+        return web.json_response({"model": body.get("model"), "embeddings": [_embed(text) for text in inputs]})
+
+
+def _embed(text):
+    """Hashed bag of words: same words -> same vector, so paraphrases overlap"""
+    vector = [0.0] * EMBEDDING_DIM
+    for word in text.lower().split():
+        vector[zlib.crc32(word.encode()) % EMBEDDING_DIM] += 1.0
+    return vector
+
+
+def start_in_thread(port, host="127.0.0.1", **settings):
+    """Serve a FakeOllama on a daemon thread (for benchmarks); returns it once listening"""
+    fake = FakeOllama(**settings)
+    ready = threading.Event()
+
+    def serve():
+        loop = asyncio.new_event_loop()
+        runner = web.AppRunner(fake.make_app(), access_log=None)
+        loop.run_until_complete(runner.setup())
+        loop.run_until_complete(web.TCPSite(runner, host, port).start())
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=serve, daemon=True).start()
+    ready.wait()
+    return fake
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--models", nargs="+", default=[Config.OLLAMA_MODEL, Config.EMBEDDING_MODEL])
+    parser.add_argument("--tokens-per-s", type=float, default=30.0, help="generation speed (0 = instant)")
+    parser.add_argument("--reply-tokens", type=int, default=40)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="fixed delay before the first token")
+    parser.add_argument("--prefill-tokens-per-s", type=float, default=2000.0, help="prompt processing speed (0 = free)")
+    parser.add_argument("--parallel", type=int, default=4, help="generations served at once (OLLAMA_NUM_PARALLEL)")
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with HTTP 500")
+    parser.add_argument("--stream-error-rate", type=float, default=0.0, help="fraction of streams broken part-way")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    fake = FakeOllama(models=args.models, tokens_per_s=args.tokens_per_s, reply_tokens=args.reply_tokens,
+                      latency_ms=args.latency_ms, prefill_tokens_per_s=args.prefill_tokens_per_s,
+                      parallel=args.parallel, jitter=args.jitter, error_rate=args.error_rate,
+                      stream_error_rate=args.stream_error_rate, seed=args.seed)
+    print(f"Fake Ollama on http://{args.host}:{args.port} ({', '.join(args.models)}), "
+          f"{args.tokens_per_s} tok/s, {args.parallel} parallel")
+    web.run_app(fake.make_app(), host=args.host, port=args.port, print=None, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+load_test.py - End-to-end load generator for /chat and /chat/stream
+
+Sends requests to a running app at a fixed target rate (open loop: new
+requests start on schedule whether or not earlier ones have finished, so
+queueing shows up as latency rather than as a lower send rate). Messages
+cycle through the fixed corpora in corpus.py. Reports:
+- achieved throughput;
+- p50/p95/p99 end-to-end latency;
+- time to first token (the first SSE `token` event; for /chat, the full reply);
+- error rates by kind (HTTP 429, other HTTP errors, timeouts, connection
+  errors, SSE `error` events).
+
+Without a real model, point the app at fake_ollama.py. --start-app does it
+all on one machine: it starts a fake Ollama in-process and the app under
+uvicorn, and needs no network:
+
+    python -m ai_services.benchmarks.load_test --start-app --rps 20 --duration 30 --endpoint stream
+    python -m ai_services.benchmarks.load_test --url http://127.0.0.1:8000 --rps 5 --sessions 10 --json run.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+from ai_services.benchmarks.corpus import CORPORA
+from ai_services.benchmarks.fake_ollama import start_in_thread
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+class Results:
+    def __init__(self):
+        self.latency = []
+        self.ttft = []
+        self.errors = {"http_429": 0, "http_error": 0, "timeout": 0, "connection": 0, "stream_error": 0}
+        self.ok = 0
+        self.sent = 0
+
+    def summary(self, elapsed):
+        failed = sum(self.errors.values())
+        ms = lambda values, q: round(percentile(values, q) * 1000, 1)
+        return {
+            "sent": self.sent,
+            "ok": self.ok,
+            "achieved_rps": round(self.sent / elapsed, 2) if elapsed else 0.0,
+            "ok_rps": round(self.ok / elapsed, 2) if elapsed else 0.0,
+            "latency_p50_ms": ms(self.latency, 0.50),
+            "latency_p95_ms": ms(self.latency, 0.95),
+            "latency_p99_ms": ms(self.latency, 0.99),
+            "ttft_p50_ms": ms(self.ttft, 0.50),
+            "ttft_p95_ms": ms(self.ttft, 0.95),
+            "ttft_p99_ms": ms(self.ttft, 0.99),
+            "error_rate": round(failed / self.sent, 4) if self.sent else 0.0,
+            "errors": self.errors,
+        }
+
+
+async def send_chat(session, url, payload, results):
+    started = time.perf_counter()
+    async with session.post(url + "/chat", json=payload) as resp:
+        await resp.read()
+        if resp.status == 429:
+            results.errors["http_429"] += 1
+            return
+        if resp.status != 200:
+            results.errors["http_error"] += 1
+            return
+    elapsed = time.perf_counter() - started
+    results.latency.append(elapsed)
+    results.ttft.append(elapsed)
+    results.ok += 1
+
+
+async def send_stream(session, url, payload, results):
+    started = time.perf_counter()
+    first_token = None
+    stream_error = False
+    async with session.post(url + "/chat/stream", json=payload) as resp:
+        if resp.status == 429:
+            await resp.read()
+            results.errors["http_429"] += 1
+            return
+        if resp.status != 200:
+            await resp.read()
+            results.errors["http_error"] += 1
+            return
+        async for line in resp.content:
+            if line.startswith(b"event: "):
+                event = line[len(b"event: "):].strip()
+                if event == b"token" and first_token is None:
+                    first_token = time.perf_counter() - started
+                elif event == b"error":
+                    stream_error = True
+    if stream_error:
+        results.errors["stream_error"] += 1
+        return
+    results.latency.append(time.perf_counter() - started)
+    results.ttft.append(first_token if first_token is not None else time.perf_counter() - started)
+    results.ok += 1
+
+
+async def one_request(session, url, endpoint, payload, results):
+    results.sent += 1
+    try:
+        if endpoint == "stream":
+            await send_stream(session, url, payload, results)
+        else:
+            await send_chat(session, url, payload, results)
+    except asyncio.TimeoutError:
+        results.errors["timeout"] += 1
+    except aiohttp.ClientError:
+        results.errors["connection"] += 1
+
+
+async def run(args):
+    messages = itertools.cycle([m for name in args.corpora for m in CORPORA[name]])
+    sessions = itertools.cycle([f"load-{i}" for i in range(args.sessions)] or [None])
+    rng = random.Random(args.seed)
+    results = Results()
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        await wait_ready(session, args.url)
+        tasks = []
+        started = time.perf_counter()
+        next_at = started
+        while next_at - started < args.duration:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            payload = {"message": next(messages), "session_id": next(sessions)}
+            tasks.append(asyncio.create_task(one_request(session, args.url, args.endpoint, payload, results)))
+            gap = 1 / args.rps
+            next_at += rng.expovariate(1 / gap) if args.poisson else gap
+        send_window = time.perf_counter() - started
+        await asyncio.gather(*tasks)
+    return {"endpoint": args.endpoint, "target_rps": args.rps, "duration_s": args.duration,
+            "send_window_s": round(send_window, 2), **results.summary(send_window)}
+
+
+async def wait_ready(session, url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async with session.get(url + "/health") as resp:
+                if resp.status == 200 and (await resp.json()).get("status") == "healthy":
+                    return
+        except (aiohttp.ClientError, ValueError):
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} did not report healthy within {timeout}s")
+
+
+def start_app(args):
+    """Fake Ollama in this process + the app under uvicorn; returns the server process"""
+    start_in_thread(args.ollama_port, tokens_per_s=args.tokens_per_s, reply_tokens=args.reply_tokens,
+                    error_rate=args.error_rate, stream_error_rate=args.stream_error_rate, seed=args.seed)
+    env = {**os.environ, "OLLAMA_BASE_URL": f"http://127.0.0.1:{args.ollama_port}"}
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "ai_services.app:app", "--port", str(args.port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--endpoint", choices=["chat", "stream"], default="chat")
+    parser.add_argument("--rps", type=float, default=10.0, help="target requests per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to keep sending")
+    parser.add_argument("--poisson", action="store_true", help="exponential gaps instead of a fixed interval")
+    parser.add_argument("--sessions", type=int, default=0, help="spread requests over this many session ids (0 = stateless)")
+    parser.add_argument("--corpora", nargs="+", default=["english", "noisy", "hinglish"], choices=list(CORPORA))
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write results to this file")
+    local = parser.add_argument_group("--start-app (fake Ollama + local app)")
+    local.add_argument("--start-app", action="store_true")
+    local.add_argument("--port", type=int, default=8765)
+    local.add_argument("--ollama-port", type=int, default=8766)
+    local.add_argument("--tokens-per-s", type=float, default=30.0)
+    local.add_argument("--reply-tokens", type=int, default=40)
+    local.add_argument("--error-rate", type=float, default=0.0)
+    local.add_argument("--stream-error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = None
+    if args.start_app:
+        server = start_app(args)
+        args.url = f"http://127.0.0.1:{args.port}"
+    try:
+        result = asyncio.run(run(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print(f"{result['endpoint']}: {result['sent']} sent at {result['achieved_rps']}/s "
+          f"(target {result['target_rps']}/s), {result['ok']} ok, error rate {result['error_rate']:.2%}")
+    print(f"  latency p50 {result['latency_p50_ms']} ms  p95 {result['latency_p95_ms']} ms  p99 {result['latency_p99_ms']} ms")
+    print(f"  ttft    p50 {result['ttft_p50_ms']} ms  p95 {result['ttft_p95_ms']} ms  p99 {result['ttft_p99_ms']} ms")
+    print(f"  errors  {result['errors']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
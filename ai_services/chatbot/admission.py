@@ -0,0 +1,167 @@
+"""
+admission.py - Admission control in front of the LLM backend
+
+A local Ollama instance on CPU only handles a few generations at once.
+AdmissionController caps concurrent LLM calls, keeps a bounded priority
+queue for the rest (at-risk sessions jump ahead), and rejects up front when
+the queue is full or the expected wait would exceed the deadline, instead
+of letting overload turn into timeouts and retries.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from ai_services.utils.metrics import observe_stage
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BATCH = 2  # offline /chat/batch runs queue behind interactive users
+
+
+class ServerBusyError(Exception):
+    """Raised when a request cannot get an LLM slot within its deadline."""
+
+    def __init__(self, message, retry_after=5):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    def __init__(self, max_concurrency=2, max_queue=32, queue_timeout=20.0):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._active = 0
+        self._waiters = []  # heap of (priority, seq, future); cancelled entries are skipped lazily
+        self._queued = 0
+        self._seq = itertools.count()
+        self._service_time = None  # moving average of seconds a slot is held
+        self._waits = deque(maxlen=1000)
+        self._counters = {
+            "admitted": 0, "admitted_high_priority": 0,
+            "rejected_queue_full": 0, "rejected_deadline": 0, "timed_out": 0
+        }
+
+    def estimated_wait(self, priority=PRIORITY_NORMAL):
+        """
+        Rough wait before a new request of this priority would get a slot
+        """
+        if self._active < self.max_concurrency and not self._queued:
+            return 0.0
+        if self._service_time is None:
+            return 0.0  # nothing measured yet, don't guess
+        ahead = sum(1 for p, _, f in self._waiters if p <= priority and not f.done())
+        return (ahead // self.max_concurrency + 1) * self._service_time
+
+    def check(self, priority=PRIORITY_NORMAL):
+        """
+        Reason a request would be rejected right now, or None if it would be queued.
+        High-priority (at-risk) requests are never turned away up front.
+        """
+        if priority == PRIORITY_HIGH or (self._active < self.max_concurrency and not self._queued):
+            return None
+        if self._queued >= self.max_queue:
+            return "queue_full"
+        if self.estimated_wait(priority) > self.queue_timeout:
+            return "deadline"
+        return None
+
+    @asynccontextmanager
+    async def slot(self, priority=PRIORITY_NORMAL, timeout=None):
+        """
+        Hold one LLM slot for the duration of the block; raises ServerBusyError.
+        timeout: wait at most this long (and never longer than queue_timeout)
+        """
+        await self._acquire(priority, self.queue_timeout if timeout is None else min(timeout, self.queue_timeout))
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(time.monotonic() - started)
+
+    def try_acquire(self, priority=PRIORITY_BATCH) -> bool:
+        """
+        Take a slot only if one is free and nobody is queued for it; pair
+        with release(). For optional extra work (hedged calls) that should
+        never delay a queued request.
+        """
+        if self._active < self.max_concurrency and not self._queued:
+            self._active += 1
+            self._admitted(priority, 0.0)
+            return True
+        return False
+
+    def release(self):
+        """Give back a slot taken with try_acquire()"""
+        self._release(None)
+
+    async def _acquire(self, priority, timeout):
+        queued_at = time.monotonic()
+        if self._active < self.max_concurrency and not self._queued:
+            self._active += 1
+            self._admitted(priority, 0.0)
+            return
+
+        reason = self.check(priority)
+        if reason is not None:
+            self._counters[f"rejected_{reason}"] += 1
+            raise ServerBusyError("LLM queue is full" if reason == "queue_full" else "Expected wait exceeds deadline",
+                                  retry_after=self._retry_after())
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self._queued += 1
+        try:
+            await asyncio.wait_for(future, timeout=max(0.0, timeout))
+        except asyncio.TimeoutError:
+            self._queued -= 1
+            self._counters["timed_out"] += 1
+            raise ServerBusyError("Timed out waiting for an LLM slot", retry_after=self._retry_after())
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release(None)  # slot was handed over just as we were cancelled
+            else:
+                self._queued -= 1
+            raise
+        # The releasing request handed its slot straight to us (_active unchanged)
+        self._admitted(priority, time.monotonic() - queued_at)
+
+    def _release(self, held_for):
+        if held_for is not None:
+            self._service_time = held_for if self._service_time is None else 0.8 * self._service_time + 0.2 * held_for
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self._queued -= 1
+                future.set_result(None)
+                return
+        self._active -= 1
+
+    def _admitted(self, priority, waited):
+        self._counters["admitted"] += 1
+        if priority == PRIORITY_HIGH:
+            self._counters["admitted_high_priority"] += 1
+        self._waits.append(waited)
+        observe_stage("llm_queue", waited)
+
+    def _retry_after(self):
+        return max(1, round(self._service_time or 5))
+
+    def stats(self):
+        waits = sorted(self._waits)
+        return {
+            **self._counters,
+            "active": self._active,
+            "queue_depth": self._queued,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "avg_wait_ms": round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+            "p95_wait_ms": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 1) if waits else 0.0,
+            "max_wait_ms": round(waits[-1] * 1000, 1) if waits else 0.0,
+            "avg_service_ms": round(self._service_time * 1000, 1) if self._service_time else None,
+        }
@@ -1,60 +1,345 @@
 # processor.py
 import os
 import json
+import time
+import asyncio
+import logging
 import aiohttp
-from ai_services.utils.text_processor import TextPreprocessor
-from .safety import check_safety
-from googletrans import Translator
+from contextlib import asynccontextmanager
+from ai_services.utils.config import Config
+from ai_services.utils.metrics import observe_stage, observe_ollama_stats, LLM_REQUESTS
+from .safety import check_safety, CRISIS, CRISIS_MESSAGE
+from .nlp_pool import nlp_pool
+from .translation import translator
+from .memory import ConversationMemory
+from .backends import BackendPool
+from .errors import LLMError, LLMConnectionError, LLMTimeoutError, LLMResponseError
+from .llm_policy import LLMCallPolicy
+from .prompt_builder import PromptBuilder, RollingSummarizer, load_tokenizer
+
+# Short per-session conversation memory (last few exchanges per session id)
+conversation_memory = ConversationMemory(
+    max_messages=Config.MEMORY_MAX_MESSAGES,
+    max_sessions=Config.MEMORY_MAX_SESSIONS,
+    ttl_seconds=Config.MEMORY_SESSION_TTL,
+    max_session_bytes=Config.MEMORY_MAX_SESSION_BYTES,
+    max_total_bytes=Config.MEMORY_MAX_TOTAL_BYTES
+)
+
+logger = logging.getLogger(__name__)
 
-# Initialize text preprocessor
-preprocessor = TextPreprocessor()
+# Ollama configuration
+OLLAMA_BASE_URL = Config.OLLAMA_BASE_URL
+OLLAMA_MODEL = Config.OLLAMA_MODEL  # Override with the OLLAMA_MODEL env var
 
-# Optional: maintain short conversation memory (last few messages)
-conversation_history = []
+# Prefix of the reply process_user_message gives when the LLM call failed
+LLM_ERROR_PREFIX = "⚠️ Sorry, I had an issue reaching"
 
-# Ollama configuration
-OLLAMA_BASE_URL = "http://localhost:11434"
-OLLAMA_MODEL = "llama3.2:latest"  # You can change this to your preferred model
+# Timing fields Ollama reports on a finished generation (durations in nanoseconds)
+OLLAMA_STATS_FIELDS = (
+    "total_duration", "load_duration",
+    "prompt_eval_count", "prompt_eval_duration",
+    "eval_count", "eval_duration"
+)
 
 class LocalLLMClient:
-    def __init__(self, base_url=OLLAMA_BASE_URL, model=OLLAMA_MODEL):
-        self.base_url = base_url
+    def __init__(self, base_url=None, model=OLLAMA_MODEL, api_mode=Config.OLLAMA_API_MODE, base_urls=None):
+        # One or more Ollama servers (OLLAMA_BASE_URLS); see backends.py for routing
+        urls = list(base_urls or ([base_url] if base_url else Config.OLLAMA_BASE_URLS))
+        self.backends = BackendPool(
+            urls,
+            failure_threshold=Config.BACKEND_FAILURE_THRESHOLD,
+            reset_timeout=Config.BACKEND_RESET_TIMEOUT
+        )
+        self.base_url = urls[0]
+        self.policy = LLMCallPolicy(
+            retries=Config.LLM_RETRIES,
+            backoff=Config.LLM_RETRY_BACKOFF,
+            hedge=Config.LLM_HEDGE_ENABLED,
+            hedge_min_delay=Config.LLM_HEDGE_MIN_DELAY,
+            hedge_max_ratio=Config.LLM_HEDGE_MAX_RATIO,
+            available_backends=self.backends.available
+        )
         self.model = model
+        self.api_mode = api_mode
+        # One long-lived session (and connection pool) shared by every Ollama call.
+        # Opened by the app startup hook, or lazily on first use outside the app.
+        self._session = None
+        self._stats = {"requests": 0, "in_flight": 0, "errors": 0, "sessions_created": 0}
+        # Running totals of Ollama's prefill/decode timings
+        self._generation = {
+            "completions": 0, "prompt_tokens": 0, "prompt_eval_ns": 0,
+            "eval_tokens": 0, "eval_ns": 0
+        }
+
+    async def start(self):
+        """
+        Open the shared keep-alive connection pool if it is not already open
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=Config.HTTP_POOL_LIMIT,
+                limit_per_host=Config.HTTP_POOL_LIMIT_PER_HOST,
+                keepalive_timeout=Config.HTTP_KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=Config.HTTP_DNS_CACHE_TTL,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(
+                    total=Config.HTTP_REQUEST_TIMEOUT,
+                    connect=Config.HTTP_CONNECT_TIMEOUT
+                )
+            )
+            self._stats["sessions_created"] += 1
+        return self._session
+
+    async def close(self):
+        """
+        Close the shared connection pool (called from the app shutdown hook)
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    @asynccontextmanager
+    async def request(self, method, path, backend=None, **kwargs):
+        """
+        Issue a request to Ollama over the shared pool, e.g.
+        `async with llm_client.request("GET", "/api/tags") as response: ...`
+        Goes to the least busy available backend, and the outcome (connection
+        error, timeout, HTTP 5xx, an error part-way through a stream) feeds
+        its circuit breaker; 4xx replies and errors raised by the caller
+        don't count against the backend. Pass `backend` to target one server
+        directly, outside the breaker (health probes).
+        """
+        session = await self.start()
+        routed = backend is None
+        if routed:
+            backend = self.backends.acquire()
+        self._stats["requests"] += 1
+        self._stats["in_flight"] += 1
+        started = time.perf_counter()
+        ok, error = None, None
+        try:
+            async with session.request(method, f"{backend.url}{path}", **kwargs) as response:
+                ok = response.status < 500
+                error = None if ok else f"HTTP {response.status}"
+                yield response
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self._stats["errors"] += 1
+            ok, error = False, e
+            raise
+        except LLMResponseError as e:
+            # HTTP 5xx or an error line part-way through a stream; a 4xx is the request's fault
+            if e.retryable:
+                ok, error = False, error or e
+            raise
+        except BaseException:  # cancelled, the consumer stopped reading or failed: says nothing about the backend
+            ok = None
+            raise
+        finally:
+            self._stats["in_flight"] -= 1
+            if routed:
+                self.backends.release(backend, ok, time.perf_counter() - started, error)
+
+    def pool_stats(self):
+        """
+        Connection pool usage, for sizing the HTTP_POOL_* settings
+        """
+        stats = dict(self._stats)
+        stats.update({
+            "open": self._session is not None and not self._session.closed,
+            "limit": Config.HTTP_POOL_LIMIT,
+            "limit_per_host": Config.HTTP_POOL_LIMIT_PER_HOST,
+            "keepalive_timeout": Config.HTTP_KEEPALIVE_TIMEOUT,
+            "connections_in_use": 0,
+            "connections_idle": 0,
+        })
+        if stats["open"]:
+            connector = self._session.connector
+            # aiohttp has no public accessor for these counts
+            stats["connections_in_use"] = len(getattr(connector, "_acquired", ()))
+            stats["connections_idle"] = sum(len(conns) for conns in getattr(connector, "_conns", {}).values())
+        return stats
+
+    def generation_stats(self):
+        """
+        Average prefill (prompt evaluation) and decode cost across completions
+        """
+        g = self._generation
+        completions = g["completions"] or 1
+        return {
+            "api_mode": self.api_mode,
+            "completions": g["completions"],
+            "avg_prompt_tokens": round(g["prompt_tokens"] / completions, 1),
+            "avg_prefill_ms": round(g["prompt_eval_ns"] / completions / 1e6, 1),
+            "prefill_tokens_per_s": round(g["prompt_tokens"] / (g["prompt_eval_ns"] / 1e9), 1) if g["prompt_eval_ns"] else 0.0,
+            "decode_tokens_per_s": round(g["eval_tokens"] / (g["eval_ns"] / 1e9), 1) if g["eval_ns"] else 0.0,
+        }
+
+    def _record_stats(self, result):
+        """
+        Pull Ollama's timing fields out of a finished response and add them to the totals
+        """
+        stats = {field: result[field] for field in OLLAMA_STATS_FIELDS if field in result}
+        g = self._generation
+        g["completions"] += 1
+        g["prompt_tokens"] += stats.get("prompt_eval_count", 0)
+        g["prompt_eval_ns"] += stats.get("prompt_eval_duration", 0)
+        g["eval_tokens"] += stats.get("eval_count", 0)
+        g["eval_ns"] += stats.get("eval_duration", 0)
+        observe_ollama_stats(stats)
+        return stats
+
+    async def chat_completion(self, messages, max_tokens=400, temperature=0.7, deadline=None):
+        """
+        Send chat completion request to local Ollama instance, with the
+        client's retry/hedging policy. deadline: time.monotonic() by which
+        the reply is needed. Raises LLMError.
+        """
+        text, _ = await self.policy.run(
+            lambda call_deadline: self.completion_with_stats(messages, max_tokens, temperature, call_deadline),
+            deadline
+        )
+        return text
+
+    async def completion_with_stats(self, messages, max_tokens=400, temperature=0.7, deadline=None):
+        """
+        One attempt at a completion (no retries), also returning Ollama's
+        timing fields (prompt_eval_duration etc.). Raises LLMError.
+        """
+        payload = self._build_payload(messages, max_tokens, temperature, stream=False)
+
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            async with self.request("POST", self._endpoint(), json=payload, **self._timeout(deadline)) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    outcome = "ok"
+                    return self._chunk_text(result), self._record_stats(result)
+                else:
+                    error_text = await response.text()
+                    raise LLMResponseError(f"Ollama API error: {response.status} - {error_text}", status=response.status)
+        except aiohttp.ClientError as e:
+            raise LLMConnectionError(f"Connection error to Ollama: {str(e)}") from e
+        except asyncio.TimeoutError as e:
+            raise LLMTimeoutError("Ollama did not answer before the request deadline") from e
+        except ValueError as e:
+            raise LLMResponseError(f"Malformed response from Ollama: {e}") from e
+        finally:
+            LLM_REQUESTS.inc(outcome=outcome)
+            observe_stage("llm_request", time.perf_counter() - started)
     
-    async def chat_completion(self, messages, max_tokens=400, temperature=0.7):
+    async def stream_completion(self, messages, max_tokens=400, temperature=0.7, deadline=None):
         """
-        Send chat completion request to local Ollama instance
+        Stream a completion from the local Ollama instance, yielding text
+        chunks as they are generated (Ollama streams one JSON object per line).
+        One attempt, no retries; raises LLMError.
+        """
+        payload = self._build_payload(messages, max_tokens, temperature, stream=True)
+
+        started = time.perf_counter()
+        first_token = True
+        outcome = "error"
+        try:
+            async with self.request("POST", self._endpoint(), json=payload, **self._timeout(deadline)) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise LLMResponseError(f"Ollama API error: {response.status} - {error_text}", status=response.status)
+
+                async for line in response.content:
+                    if not line.strip():
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("error"):
+                        raise LLMResponseError(f"Ollama API error: {chunk['error']}")
+                    text = self._chunk_text(chunk)
+                    if text:
+                        if first_token:
+                            first_token = False
+                            observe_stage("llm_first_token", time.perf_counter() - started)
+                        yield text
+                    if chunk.get("done"):
+                        self._record_stats(chunk)
+                        outcome = "ok"
+                        break
+        except aiohttp.ClientError as e:
+            raise LLMConnectionError(f"Connection error to Ollama: {str(e)}") from e
+        except asyncio.TimeoutError as e:
+            raise LLMTimeoutError("Ollama did not finish before the request deadline") from e
+        except ValueError as e:
+            raise LLMResponseError(f"Malformed response from Ollama: {e}") from e
+        finally:
+            # A consumer that stops reading early (client disconnected) ends up here too
+            LLM_REQUESTS.inc(outcome=outcome)
+            observe_stage("llm_request", time.perf_counter() - started)
+
+    async def embed(self, text, model=Config.EMBEDDING_MODEL):
+        """
+        Embed text with a local Ollama embedding model
+        """
+        payload = {"model": model, "input": text, "keep_alive": Config.OLLAMA_KEEP_ALIVE}
+        try:
+            async with self.request("POST", "/api/embed", json=payload) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise LLMResponseError(f"Ollama API error: {response.status} - {error_text}", status=response.status)
+                result = await response.json()
+                return result["embeddings"][0]
+        except aiohttp.ClientError as e:
+            raise LLMConnectionError(f"Connection error to Ollama: {str(e)}") from e
+        except asyncio.TimeoutError as e:
+            raise LLMTimeoutError("Ollama embedding request timed out") from e
+
+    @staticmethod
+    def _timeout(deadline):
+        """
+        request() kwargs bounding a call by the request deadline (none: the session default)
+        """
+        if deadline is None:
+            return {}
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise LLMTimeoutError("Request deadline passed before calling Ollama")
+        return {"timeout": aiohttp.ClientTimeout(total=remaining, connect=min(Config.HTTP_CONNECT_TIMEOUT, remaining))}
+
+    def _endpoint(self):
+        return "/api/chat" if self.api_mode == "chat" else "/api/generate"
+
+    @staticmethod
+    def _chunk_text(chunk):
+        """
+        Generated text from an /api/chat or /api/generate response object
+        """
+        if "message" in chunk:
+            return chunk["message"].get("content", "")
+        return chunk.get("response", "")
+
+    def _build_payload(self, messages, max_tokens, temperature, stream):
+        """
+        Build the Ollama request body for the configured API mode.
+        Chat mode passes the messages through unchanged: the system prompt is
+        byte-identical on every turn and history only grows at the end, so
+        Ollama can reuse the cached prefix instead of re-running prefill on it.
         """
-        # Convert messages to Ollama format
-        prompt = self._convert_messages_to_prompt(messages)
-        
         payload = {
             "model": self.model,
-            "prompt": prompt,
-            "stream": False,
+            "stream": stream,
+            "keep_alive": Config.OLLAMA_KEEP_ALIVE,
             "options": {
                 "temperature": temperature,
                 "num_predict": max_tokens,
+                "num_ctx": Config.LLM_CONTEXT_TOKENS,
                 "top_p": 0.9
             }
         }
-        
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.post(
-                    f"{self.base_url}/api/generate",
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=60)
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        return result.get("response", "")
-                    else:
-                        error_text = await response.text()
-                        raise Exception(f"Ollama API error: {response.status} - {error_text}")
-            except aiohttp.ClientError as e:
-                raise Exception(f"Connection error to Ollama: {str(e)}")
-    
+        if self.api_mode == "chat":
+            payload["messages"] = messages
+        else:
+            payload["prompt"] = self._convert_messages_to_prompt(messages)
+        return payload
+
     def _convert_messages_to_prompt(self, messages):
         """
         Convert OpenAI-style messages to a single prompt for Ollama
@@ -77,13 +362,10 @@ class LocalLLMClient:
 
 # Initialize local LLM client
 llm_client = LocalLLMClient()
+llm_client.backends.register_metrics()
 
-async def get_llm_response(user_input: str) -> str:
-    """
-    Sends the user input to local LLaMA with conversation memory and context-gathering system prompt.
-    """
-    try:
-        system_prompt = f"""
+# Context-gathering system prompt sent ahead of every conversation
+SYSTEM_PROMPT = """
 <context_gathering>
 Goal: Gather enough user context efficiently to perform a preliminary mental health assessment and provide actionable support.
 Role: You are a supportive AI mental health assistant.  
@@ -201,52 +483,130 @@ Your job:
 </context_gathering>
         """
 
-        # Build messages with conversation history
-        messages = [{"role": "system", "content": system_prompt}]
-        messages.extend(conversation_history)
-        messages.append({"role": "user", "content": user_input})
 
-        # Call local LLM
-        response = await llm_client.chat_completion(
-            messages=messages,
-            max_tokens=400,
-            temperature=0.7
-        )
+# Fits each turn into the context budget; older turns live on as a rolling summary
+count_tokens = load_tokenizer(Config.PROMPT_TOKENIZER)
+prompt_builder = PromptBuilder(
+    SYSTEM_PROMPT,
+    context_tokens=Config.LLM_CONTEXT_TOKENS,
+    reply_tokens=Config.LLM_REPLY_TOKENS,
+    history_tokens=Config.PROMPT_HISTORY_TOKENS,
+    summary_tokens=Config.PROMPT_SUMMARY_TOKENS,
+    count_tokens=count_tokens
+)
+summarizer = RollingSummarizer(
+    conversation_memory,
+    complete=llm_client.completion_with_stats if Config.PROMPT_SUMMARY_LLM else None,
+    max_tokens=Config.PROMPT_SUMMARY_TOKENS,
+    timeout=Config.PROMPT_SUMMARY_TIMEOUT,
+    count_tokens=count_tokens
+)
+
+
+def _build_messages(user_input: str, session_id=None):
+    """
+    System prompt + the session's summary and recent turns + the new user
+    turn, within the prompt token budget
+    """
+    return prompt_builder.build(
+        user_input,
+        conversation_memory.get(session_id),
+        conversation_memory.get_summary(session_id)
+    )
 
-        response = response.strip()
 
-        # Update conversation memory (keep last 5 exchanges)
-        conversation_history.append({"role": "user", "content": user_input})
-        conversation_history.append({"role": "assistant", "content": response})
-        if len(conversation_history) > 10:
-            conversation_history[:] = conversation_history[-10:]
+def _remember_exchange(session_id, user_input: str, response: str):
+    """
+    Update the session's conversation memory; turns pushed out of the window
+    or the history budget go to the rolling summary
+    """
+    dropped = conversation_memory.append(session_id, user_input, response)
+    dropped += conversation_memory.trim(session_id, Config.PROMPT_HISTORY_TOKENS, prompt_builder.message_tokens)
+    summarizer.schedule(session_id, dropped)
 
-        return response
 
-    except Exception as e:
-        return f"⚠️ Sorry, I had an issue reaching the local AI service: {str(e)}"
+async def get_llm_response(user_input: str, session_id=None, deadline=None) -> str:
+    """
+    Sends the user input to local LLaMA with the session's conversation memory
+    and context-gathering system prompt. Without a session id the turn is stateless.
+    deadline: time.monotonic() by which the reply is needed. Raises LLMError
+    once the client's retries (and hedge, if enabled) have failed.
+    """
+    # Build messages with conversation history
+    messages = _build_messages(user_input, session_id)
 
+    # Call local LLM
+    response = await llm_client.chat_completion(
+        messages=messages,
+        max_tokens=Config.LLM_REPLY_TOKENS,
+        temperature=0.7,
+        deadline=deadline
+    )
 
-async def process_user_message(user_input: str) -> str:
+    response = response.strip()
+    _remember_exchange(session_id, user_input, response)
+
+    return response
+
+
+async def stream_llm_response(user_input: str, session_id=None, deadline=None):
+    """
+    Streaming variant of get_llm_response: yields response chunks as the model
+    generates them and updates conversation memory once generation finishes.
+    A failed call is retried only before its first chunk (nothing has been
+    sent yet); later errors are raised to the caller, which owns the open
+    stream.
+    """
+    messages = _build_messages(user_input, session_id)
+    chunks = []
+    attempt = 0
+    while True:
+        try:
+            async for chunk in llm_client.stream_completion(
+                messages=messages,
+                max_tokens=Config.LLM_REPLY_TOKENS,
+                temperature=0.7,
+                deadline=deadline
+            ):
+                chunks.append(chunk)
+                yield chunk
+            break
+        except LLMError as e:
+            delay = None if chunks else llm_client.policy.retry_delay(attempt, e, deadline)
+            if delay is None:
+                llm_client.policy.record(error=e)
+                raise
+            llm_client.policy.record(retried=True)
+            logger.warning(f"LLM stream failed before the first token ({e}); retry {attempt + 1} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    _remember_exchange(session_id, user_input, "".join(chunks).strip())
+
+
+async def process_user_message(user_input: str, session_id=None) -> str:
     """
     Full pipeline: preprocess, safety check, and LLM response with memory.
     """
-    translator = Translator()
-    user_input = translator.translate(user_input, dest='en').text
-    
-    # Step 1: Preprocess input
-    clean_text = preprocessor.preprocess(user_input)
-    if not clean_text.strip():
-        return "Please enter a valid message."
-
-    # Step 2: Safety check
-    flagged, warning = check_safety(clean_text)
+    # Check the raw message before translation can soften crisis wording
+    flagged, warning = check_safety(user_input)
     if flagged:
         return warning
 
+    user_input, _ = await translator.to_english(user_input)
+
+    # Step 1 + 2: Preprocess and safety-check the translation (CPU work, on the NLP pool)
+    signals, clean_text = await nlp_pool.analyze(user_input)
+    if CRISIS in signals:
+        return CRISIS_MESSAGE
+    if not clean_text.strip():
+        return "Please enter a valid message."
+
     # Step 3: Get LLM response
-    response = await get_llm_response(clean_text)
-    return response
+    try:
+        return await get_llm_response(clean_text, session_id)
+    except LLMError as e:
+        return f"{LLM_ERROR_PREFIX} the local AI service: {str(e)}"
 
 
 # Health check function for the local LLM
@@ -255,17 +615,16 @@ async def check_llm_health():
     Check if Ollama is running and the model is available
     """
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{OLLAMA_BASE_URL}/api/tags") as response:
-                if response.status == 200:
-                    models = await response.json()
-                    model_names = [model["name"] for model in models.get("models", [])]
-                    if OLLAMA_MODEL in model_names:
-                        return True, f"✅ LLaMA model '{OLLAMA_MODEL}' is ready"
-                    else:
-                        return False, f"❌ Model '{OLLAMA_MODEL}' not found. Available models: {model_names}"
+        async with llm_client.request("GET", "/api/tags") as response:
+            if response.status == 200:
+                models = await response.json()
+                model_names = [model["name"] for model in models.get("models", [])]
+                if OLLAMA_MODEL in model_names:
+                    return True, f"✅ LLaMA model '{OLLAMA_MODEL}' is ready"
                 else:
-                    return False, f"❌ Ollama server responded with status {response.status}"
+                    return False, f"❌ Model '{OLLAMA_MODEL}' not found. Available models: {model_names}"
+            else:
+                return False, f"❌ Ollama server responded with status {response.status}"
     except Exception as e:
         return False, f"❌ Cannot connect to Ollama: {str(e)}"
 
@@ -291,7 +650,13 @@ if __name__ == "__main__":
             "I have trouble focusing on my studies."
         ]
         for msg in examples:
-            resp = await process_user_message(msg)
+            resp = await process_user_message(msg, session_id="demo")
             print(f"User: {msg}\nAI: {resp}\n{'-'*50}")
 
-    asyncio.run(demo())
\ No newline at end of file
+    async def main():
+        try:
+            await demo()
+        finally:
+            await llm_client.close()
+
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,151 @@
+"""
+backends.py - Pool of Ollama servers with least-outstanding routing and circuit breakers
+
+Each request goes to the available backend with the fewest requests in
+flight (ties: the one that has served fewest so far). Every backend has
+its own circuit breaker:
+
+  closed     normal routing
+  open       ejected after `failure_threshold` consecutive failures
+             (connection errors, timeouts, HTTP 5xx, error responses
+             such as a broken stream); no traffic
+  half_open  `reset_timeout` after opening, a single trial request is let
+             through: success closes the breaker, failure re-opens it
+
+The health monitor probes every backend as well; a good probe closes an
+open breaker straight away and a backend missing the model is skipped.
+"""
+
+import logging
+import time
+from collections import deque
+
+from ai_services.utils.metrics import metrics
+from .errors import LLMError
+
+logger = logging.getLogger(__name__)
+
+BACKEND_REQUESTS = metrics.counter("panah_backend_requests_total", "Requests per Ollama backend by outcome",
+                                   ("backend", "outcome"))
+BACKEND_SECONDS = metrics.histogram("panah_backend_request_seconds", "Request duration per Ollama backend",
+                                    ("backend",))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class NoBackendAvailableError(LLMError):
+    """Raised when every Ollama backend is ejected or known not to serve the model."""
+
+    kind = "no_backend"
+
+
+class Backend:
+    def __init__(self, url):
+        self.url = url
+        self.state = CLOSED
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.has_model = None  # from the last health probe; None = not probed yet
+        self.last_error = None
+        self._latency = deque(maxlen=1000)
+        self._counters = {"requests": 0, "failures": 0, "ejections": 0}
+
+    def stats(self):
+        latency = sorted(self._latency)
+        return {
+            **self._counters,
+            "url": self.url,
+            "state": self.state,
+            "outstanding": self.outstanding,
+            "consecutive_failures": self.consecutive_failures,
+            "has_model": self.has_model,
+            "last_error": self.last_error,
+            "p50_latency_ms": round(latency[len(latency) // 2] * 1000, 1) if latency else 0.0,
+            "p99_latency_ms": round(latency[min(len(latency) - 1, int(len(latency) * 0.99))] * 1000, 1) if latency else 0.0,
+        }
+
+
+class BackendPool:
+    def __init__(self, urls, failure_threshold=3, reset_timeout=15.0):
+        if not urls:
+            raise ValueError("BackendPool needs at least one backend URL")
+        self.backends = [Backend(url) for url in urls]
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+    def acquire(self) -> Backend:
+        """
+        Pick a backend for one request and count it as outstanding; pair
+        with release(). Raises NoBackendAvailableError.
+        """
+        now = time.monotonic()
+        candidates = []
+        for backend in self.backends:
+            if backend.state == OPEN and now - backend.opened_at >= self.reset_timeout:
+                backend.state = HALF_OPEN
+                logger.info(f"Ollama backend {backend.url}: trying again (half-open)")
+            if backend.state == CLOSED or (backend.state == HALF_OPEN and not backend.trial_in_flight):
+                candidates.append(backend)
+        # Backends known to lack the model only get traffic if nothing else is left
+        serving = [b for b in candidates if b.has_model is not False] or candidates
+        if not serving:
+            raise NoBackendAvailableError(f"All {len(self.backends)} Ollama backend(s) are unavailable")
+        backend = min(serving, key=lambda b: (b.outstanding, b._counters["requests"]))
+        if backend.state == HALF_OPEN:
+            backend.trial_in_flight = True
+        backend.outstanding += 1
+        backend._counters["requests"] += 1
+        return backend
+
+    def release(self, backend, ok, seconds=None, error=None):
+        """
+        Finish a request from acquire(). ok=None means the outcome says
+        nothing about the backend (the caller went away)
+        """
+        backend.outstanding -= 1
+        backend.trial_in_flight = False  # an unfinished trial leaves the backend half-open for the next one
+        if ok is None:
+            return
+        BACKEND_REQUESTS.inc(backend=backend.url, outcome="ok" if ok else "error")
+        if seconds is not None:
+            BACKEND_SECONDS.observe(seconds, backend=backend.url)
+        if ok:
+            if seconds is not None:
+                backend._latency.append(seconds)
+            self.record_success(backend)
+        else:
+            self.record_failure(backend, error)
+
+    def record_success(self, backend):
+        if backend.state != CLOSED:
+            logger.info(f"✅ Ollama backend {backend.url} re-admitted")
+        backend.state = CLOSED
+        backend.consecutive_failures = 0
+        backend.opened_at = None
+
+    def record_failure(self, backend, error=None):
+        backend._counters["failures"] += 1
+        backend.consecutive_failures += 1
+        backend.last_error = str(error) if error is not None else backend.last_error
+        if backend.state == HALF_OPEN or (backend.state == CLOSED and backend.consecutive_failures >= self.failure_threshold):
+            if backend.state == CLOSED:
+                backend._counters["ejections"] += 1
+            logger.warning(f"⚠️ Ollama backend {backend.url} ejected after {backend.consecutive_failures} "
+                           f"consecutive failure(s): {backend.last_error}")
+            backend.state = OPEN
+            backend.opened_at = time.monotonic()
+
+    def available(self) -> int:
+        return sum(1 for b in self.backends if b.state != OPEN and b.has_model is not False)
+
+    def stats(self):
+        return [backend.stats() for backend in self.backends]
+
+    def register_metrics(self, registry=metrics):
+        registry.gauge("panah_backend_outstanding", "Requests in flight per Ollama backend",
+                       lambda: {(b.url,): b.outstanding for b in self.backends}, ("backend",))
+        registry.gauge("panah_backend_circuit_state", "Circuit breaker per Ollama backend (0 closed, 1 half-open, 2 open)",
+                       lambda: {(b.url,): _STATE_VALUES[b.state] for b in self.backends}, ("backend",))
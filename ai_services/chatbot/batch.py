@@ -0,0 +1,117 @@
+"""
+batch.py - Offline batch runs of the chat pipeline (/chat/batch)
+
+A batch is a JSONL body, one object per line:
+
+    {"id": "q-17", "message": "I can't sleep before exams", "session_id": "eval-3"}
+
+("id" defaults to the line number, "session_id" to a stateless turn).
+run_batch() pushes the items through the normal pipeline with at most
+`concurrency` in flight, and yields one result per item as soon as it
+finishes, so results come back out of order. Each result carries the
+batch's progress counters. Items sharing a session_id run one after
+another in input order, so multi-turn transcripts replay correctly.
+
+Batch items ask for LLM slots at PRIORITY_BATCH, behind interactive users.
+An item turned away by admission control waits and tries again, for up to
+BATCH_MAX_WAIT seconds. Resuming after an interruption is the client's
+job: it skips the ids it already has results for (see batch_chat.py).
+"""
+
+import asyncio
+import json
+import logging
+import time
+
+from ai_services.utils.metrics import metrics
+from .admission import ServerBusyError
+
+logger = logging.getLogger(__name__)
+
+BATCH_ITEMS = metrics.counter("panah_batch_items_total", "Batch items processed by outcome", ("outcome",))
+
+
+def parse_batch(body: bytes):
+    """
+    Items from a JSONL body; a line that is not a valid item becomes an
+    item with an "error" instead of failing the whole batch
+    """
+    items = []
+    for line_number, line in enumerate(body.decode("utf-8", errors="replace").splitlines(), 1):
+        if not line.strip():
+            continue
+        item_id = line_number
+        try:
+            data = json.loads(line)
+            if isinstance(data, dict):
+                item_id = data.get("id", line_number)
+            if not isinstance(data, dict) or not isinstance(data.get("message"), str):
+                raise ValueError('expected an object with a "message" string')
+            items.append({"id": item_id, "message": data["message"], "session_id": data.get("session_id")})
+        except ValueError as e:
+            items.append({"id": item_id, "message": None, "session_id": None, "error": f"invalid line: {e}"})
+    return items
+
+
+async def run_batch(items, process, concurrency=4, max_wait=300.0):
+    """
+    Yield a result dict per item as it completes, then a final summary.
+    process: async (message, session_id) -> result dict
+    """
+    started = time.monotonic()
+    progress = {"total": len(items), "completed": 0, "failed": 0, "in_flight": 0}
+    results = asyncio.Queue()
+    pending = iter(enumerate(items))
+    session_locks = {}
+
+    async def run_item(index, item):
+        item_started = time.monotonic()
+        result = {"error": item["error"]} if "error" in item else None
+        while result is None:
+            try:
+                result = await process(item["message"], item["session_id"])
+            except ServerBusyError as e:
+                if time.monotonic() - item_started + e.retry_after > max_wait:
+                    result = {"error": "busy"}
+                else:
+                    await asyncio.sleep(e.retry_after)
+            except Exception as e:
+                logger.exception(f"Batch item {item['id']!r} failed: {e}")
+                result = {"error": "internal"}
+        return {"id": item["id"], "index": index, **result, "seconds": round(time.monotonic() - item_started, 3)}
+
+    async def worker():
+        for index, item in pending:  # the iterator is shared, so workers take items in input order
+            lock = session_locks.setdefault(item["session_id"], asyncio.Lock()) if item["session_id"] else None
+            progress["in_flight"] += 1
+            try:
+                if lock is None:
+                    result = await run_item(index, item)
+                else:
+                    async with lock:
+                        result = await run_item(index, item)
+            finally:
+                progress["in_flight"] -= 1
+            progress["completed"] += 1
+            if result.get("error"):
+                progress["failed"] += 1
+            BATCH_ITEMS.inc(outcome="error" if result.get("error") else "ok")
+            await results.put({"type": "result", **result, "progress": dict(progress)})
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, min(concurrency, len(items))))]
+    try:
+        for _ in range(len(items)):
+            yield await results.get()
+    finally:
+        # Also reached when the client goes away mid-batch: stop the remaining items
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    elapsed = time.monotonic() - started
+    yield {
+        "type": "summary",
+        **{key: progress[key] for key in ("total", "completed", "failed")},
+        "seconds": round(elapsed, 3),
+        "items_per_s": round(progress["completed"] / elapsed, 2) if elapsed else 0.0,
+    }
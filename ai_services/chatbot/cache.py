@@ -0,0 +1,85 @@
+"""
+cache.py - Exact-match LLM response cache
+
+Common first-turn openers ("hi", "I feel stressed", "can't sleep") collapse
+to the same preprocessed text, so their replies can be reused instead of
+paying for a full generation each time. Entries are keyed on
+(model, normalized clean text, history fingerprint) and bounded by count,
+total size and age.
+"""
+
+import hashlib
+import json
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    def __init__(self, max_entries=1024, ttl_seconds=3600, max_bytes=4 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (response, stored_at, size), least recently used first
+        self._bytes = 0
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0, "bypassed": 0}
+
+    @staticmethod
+    def make_key(model, clean_text, history=None):
+        normalized = " ".join(clean_text.lower().split())
+        fingerprint = ""
+        if history:
+            fingerprint = hashlib.sha1(json.dumps(history, sort_keys=True).encode("utf-8")).hexdigest()
+        return (model, normalized, fingerprint)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self._counters["misses"] += 1
+            return None
+        response, stored_at, _ = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            self._remove(key)
+            self._counters["expired"] += 1
+            self._counters["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self._counters["hits"] += 1
+        return response
+
+    def put(self, key, response):
+        size = len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (response, time.monotonic(), size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self._counters["evictions"] += 1
+
+    def bypass(self):
+        """
+        Count a turn that was deliberately not served from cache
+        """
+        self._counters["bypassed"] += 1
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self):
+        lookups = self._counters["hits"] + self._counters["misses"]
+        return {
+            **self._counters,
+            "hit_rate": round(self._counters["hits"] / lookups, 3) if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+        }
@@ -0,0 +1,37 @@
+"""
+errors.py - Typed errors for calls to the LLM backend
+
+LocalLLMClient raises these instead of returning error strings, so callers
+can tell a failed call from a reply and decide what is worth retrying:
+
+  LLMConnectionError  could not reach Ollama / connection dropped (retryable)
+  LLMTimeoutError     the request's deadline ran out (not retryable)
+  LLMResponseError    Ollama answered with an error: HTTP 5xx and errors
+                      part-way through a stream are retryable, 4xx are not
+"""
+
+
+class LLMError(Exception):
+    """Base class for failed LLM calls."""
+
+    retryable = False
+    kind = "llm_error"
+
+
+class LLMConnectionError(LLMError):
+    retryable = True
+    kind = "connection"
+
+
+class LLMTimeoutError(LLMError):
+    kind = "timeout"
+
+
+class LLMResponseError(LLMError):
+    kind = "response"
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+        # No status: an error reported in the middle of a stream
+        self.retryable = status is None or status >= 500
@@ -0,0 +1,157 @@
+"""
+health.py - Background health monitor for the local LLM (Ollama)
+
+A single asyncio task polls /api/tags on every Ollama backend on an
+interval and keeps a cached snapshot. Request handlers read the snapshot
+instead of probing Ollama themselves, so no request ever waits on a health
+check. Probe results also feed each backend's circuit breaker: a good
+probe re-admits an ejected backend, a backend without the model is
+routed around.
+"""
+
+import asyncio
+import logging
+import time
+
+import aiohttp
+
+from ai_services.utils.config import Config
+from ai_services.utils.metrics import observe_stage
+from .ai_client import llm_client, OLLAMA_MODEL
+
+logger = logging.getLogger(__name__)
+
+
+class LLMHealthMonitor:
+    def __init__(self, client, interval=10.0, timeout=5.0, stale_after=30.0):
+        self.client = client
+        self.interval = interval
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self._task = None
+        self._checked_at = None
+        self._snapshot = {
+            "status": "unknown",
+            "error": "Health not checked yet",
+            "available_models": 0,
+            "models": [],
+            "model_ready": False,
+        }
+        self._last_error = None
+        self._last_error_at = None
+        self._consecutive_failures = 0
+
+    async def start(self):
+        """
+        Probe once (so the first requests see a real state), then keep polling
+        """
+        await self.refresh()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh()
+            except Exception as e:  # keep polling whatever happens
+                logger.error(f"Health monitor probe crashed: {e}")
+
+    async def refresh(self) -> dict:
+        """
+        Probe every Ollama backend now and update the cached snapshot
+        """
+        started = time.perf_counter()
+        backends = self.client.backends.backends
+        results = await asyncio.gather(*(self._probe(backend) for backend in backends))
+        observe_stage("health_probe", time.perf_counter() - started)
+
+        reachable = [names for _, names, _ in results if names is not None]
+        if reachable:
+            names = list(dict.fromkeys(name for backend_names in reachable for name in backend_names))
+            snapshot = {
+                "status": "healthy",
+                "available_models": len(names),
+                "models": names,
+                "model_ready": any(backend.has_model for backend in backends),
+            }
+        else:
+            status, _, error = results[0]
+            snapshot = self._failure(status, error if len(backends) == 1 else f"No Ollama backend reachable ({error})")
+        snapshot["backends"] = {"total": len(backends), "reachable": len(reachable),
+                                "available": self.client.backends.available()}
+
+        if snapshot["status"] == "healthy":
+            if self._consecutive_failures:
+                logger.info("✅ Local LLM is reachable again")
+            self._consecutive_failures = 0
+        else:
+            if self._consecutive_failures == 0:
+                logger.warning(f"⚠️ Local LLM health check failed: {snapshot['error']}")
+            self._consecutive_failures += 1
+
+        self._snapshot = snapshot
+        self._checked_at = time.time()
+        return self.snapshot()
+
+    async def _probe(self, backend):
+        """
+        (status, model names or None, error) for one backend
+        """
+        try:
+            async with self.client.request(
+                "GET", "/api/tags", backend=backend, timeout=aiohttp.ClientTimeout(total=self.timeout)
+            ) as response:
+                if response.status == 200:
+                    models = (await response.json()).get("models", [])
+                    names = [model.get("name", "Unknown") for model in models]
+                    backend.has_model = OLLAMA_MODEL in names
+                    self.client.backends.record_success(backend)
+                    return "healthy", names, None
+                status, error = "unhealthy", f"HTTP {response.status}"
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            status, error = "unavailable", "Cannot connect to Ollama service"
+        except Exception as e:
+            status, error = "error", str(e)
+        self.client.backends.record_failure(backend, error)
+        return status, None, error
+
+    def _failure(self, status, error):
+        self._last_error = error
+        self._last_error_at = time.time()
+        return {"status": status, "error": error, "available_models": 0, "models": [], "model_ready": False}
+
+    def snapshot(self) -> dict:
+        """
+        Cached health state plus its age; never touches the network
+        """
+        age = time.time() - self._checked_at if self._checked_at else None
+        return {
+            **self._snapshot,
+            "checked_at": self._checked_at,
+            "age_seconds": round(age, 1) if age is not None else None,
+            "stale": age is None or age > self.stale_after,
+            "last_error": self._last_error,
+            "last_error_at": self._last_error_at,
+            "consecutive_failures": self._consecutive_failures,
+        }
+
+    def is_healthy(self) -> bool:
+        return self._snapshot["status"] == "healthy"
+
+
+health_monitor = LLMHealthMonitor(
+    llm_client,
+    interval=Config.HEALTH_CHECK_INTERVAL,
+    timeout=Config.HEALTH_CHECK_TIMEOUT,
+    stale_after=Config.HEALTH_STALE_AFTER
+)
@@ -0,0 +1,123 @@
+"""
+intents.py - Quick-reply suggestions from the intents in the bot's reply
+
+Intents, their phrases, suggestions and priorities live in
+chatbot/data/intents.json (INTENTS_PATH overrides):
+
+  {"default_suggestions": [...], "max_suggestions": 4, "max_intent_suggestions": 1,
+   "intents": [{"name": "sleep", "priority": 20, "phrases": ["sleep*", "rest"],
+                "suggestions": ["Sleep tips please"]}, ...]}
+
+All phrases go into one KeywordMatcher, so tagging is a single pass over
+the reply however many intents there are, with whole-word matching ("rest"
+does not match "interest"; "sleep*" also matches "sleepless"). The stream
+endpoint feeds tokens to an IntentTracker as they are generated, so the
+suggestions are ready as soon as the reply ends.
+
+Suggestions: those of the matched intents (highest priority first, then
+earliest in the reply), up to max_intent_suggestions, ahead of the defaults.
+"""
+
+import json
+import logging
+
+from ai_services.utils.config import Config
+from .matcher import KeywordMatcher
+
+logger = logging.getLogger(__name__)
+
+
+class IntentEngine:
+    def __init__(self, intents, default_suggestions=(), max_suggestions=4, max_intent_suggestions=1):
+        """
+        intents: list of {"name", "phrases", "suggestions", "priority"} dicts
+        """
+        self.intents = [
+            {"name": i["name"], "priority": i.get("priority", 0), "suggestions": list(i.get("suggestions", []))}
+            for i in intents
+        ]
+        self.default_suggestions = list(default_suggestions)
+        self.max_suggestions = max_suggestions
+        self.max_intent_suggestions = max_intent_suggestions
+        phrases = {}
+        for index, intent in enumerate(intents):
+            for phrase in intent.get("phrases", []):
+                # A phrase listed under two intents keeps the higher-priority one
+                if phrase not in phrases or self.intents[index]["priority"] > self.intents[phrases[phrase]]["priority"]:
+                    phrases[phrase] = index
+        self._matcher = KeywordMatcher(phrases)
+
+    def tracker(self) -> "IntentTracker":
+        return IntentTracker(self)
+
+    def tag(self, text: str) -> list:
+        """Names of the intents found in a complete reply, best first"""
+        return [self.intents[index]["name"] for index in self._ranked(self._find(text))]
+
+    def suggest(self, text: str) -> list:
+        """Suggestions for a complete reply"""
+        return self._suggestions(self._find(text))
+
+    def _find(self, text: str) -> dict:
+        found = {}  # intent index -> offset of its first match
+        for match in self._matcher.iter_matches(text):
+            found.setdefault(match.value, match.start)
+        return found
+
+    def _ranked(self, found: dict) -> list:
+        """Intent indexes, highest priority first, then earliest in the reply"""
+        return sorted(found, key=lambda index: (-self.intents[index]["priority"], found[index]))
+
+    def _suggestions(self, found: dict) -> list:
+        picked = []
+        for index in self._ranked(found):
+            for suggestion in self.intents[index]["suggestions"]:
+                if len(picked) < self.max_intent_suggestions and suggestion not in picked:
+                    picked.append(suggestion)
+        picked += [s for s in self.default_suggestions if s not in picked]
+        return picked[:self.max_suggestions]
+
+    def stats(self):
+        return {"intents": len(self.intents), "phrases": self._matcher.size}
+
+
+class IntentTracker:
+    """Intents of one reply, fed chunk by chunk as it is generated"""
+
+    def __init__(self, engine: IntentEngine):
+        self.engine = engine
+        self._scanner = engine._matcher.scanner()
+        self._found = {}  # intent index -> offset of its first match
+
+    def feed(self, chunk: str):
+        self._record(self._scanner.feed(chunk))
+
+    def _record(self, matches):
+        for match in matches:
+            self._found.setdefault(match.value, match.start)
+
+    def intents(self) -> list:
+        """Names of the intents found, best first; call once the reply is complete"""
+        self._record(self._scanner.finish())
+        return [self.engine.intents[index]["name"] for index in self.engine._ranked(self._found)]
+
+    def suggestions(self) -> list:
+        """Suggestions for the reply so far; call once the reply is complete"""
+        self._record(self._scanner.finish())
+        return self.engine._suggestions(self._found)
+
+
+def load_intents(path: str) -> IntentEngine:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    engine = IntentEngine(
+        data.get("intents", []),
+        default_suggestions=data.get("default_suggestions", []),
+        max_suggestions=data.get("max_suggestions", 4),
+        max_intent_suggestions=data.get("max_intent_suggestions", 1)
+    )
+    logger.info(f"Loaded {len(engine.intents)} suggestion intents from {path}")
+    return engine
+
+
+intent_engine = load_intents(Config.INTENTS_PATH)
@@ -0,0 +1,162 @@
+"""
+llm_policy.py - Retries and hedging around a single LLM call
+
+Only the Ollama call is retried, never translation or preprocessing, and
+only for errors that are worth retrying (LLMError.retryable). Every
+attempt shares the request's deadline, and a retry is not started if its
+backoff would not fit in the time that is left.
+
+Hedging (optional, LLM_HEDGE_ENABLED) targets tail latency. If a call is
+still running after the recent p95 latency, a second identical call is
+started. Routing sends it to another backend, since the first one is now
+busier. The first success wins and the loser is cancelled. Hedges are
+capped at LLM_HEDGE_MAX_RATIO of calls, and are only sent when more than
+one backend is available, so extra load stays bounded. With a single
+Ollama a hedge would only queue behind the original. A hedge also needs a
+free admission slot (taken at PRIORITY_BATCH, never queued for), so it
+cannot push generations past the concurrency cap when Ollama is slow.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+
+from .admission import PRIORITY_BATCH
+from .errors import LLMError, LLMTimeoutError
+
+logger = logging.getLogger(__name__)
+
+
+class LLMCallPolicy:
+    def __init__(self, retries=2, backoff=0.5, hedge=False, hedge_min_delay=0.5, hedge_max_ratio=0.1,
+                 min_samples=20, available_backends=lambda: 1, admission=None):
+        """
+        retries: extra attempts after the first for retryable errors
+        backoff: seconds before the first retry, doubled (with jitter) after each
+        hedge_min_delay: lower bound on the p95-based hedge delay
+        hedge_max_ratio: at most this fraction of calls may be hedged
+        min_samples: successful calls needed before the p95 is trusted
+        available_backends: callable returning how many backends can take traffic
+        admission: AdmissionController a hedge takes a free slot from
+                   (try_acquire/release), or None to hedge without one
+        """
+        self.retries = retries
+        self.backoff = backoff
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_max_ratio = hedge_max_ratio
+        self.min_samples = min_samples
+        self.available_backends = available_backends
+        self.admission = admission
+        self._latency = deque(maxlen=500)  # seconds per successful call
+        self._counters = {"calls": 0, "retries": 0, "failures": 0, "deadline_exceeded": 0,
+                          "hedges": 0, "hedge_wins": 0, "hedges_skipped_busy": 0}
+
+    def retry_delay(self, attempt, error, deadline=None):
+        """
+        Seconds to wait before retrying after `error` on attempt `attempt`
+        (0-based), or None if the call should fail now
+        """
+        if not isinstance(error, LLMError) or not error.retryable or attempt >= self.retries:
+            return None
+        delay = self.backoff * (2 ** attempt) * random.uniform(0.5, 1.0)
+        if deadline is not None and deadline - time.monotonic() <= delay:
+            return None
+        return delay
+
+    def record(self, seconds=None, error=None, retried=False):
+        """Count the outcome of one attempt (run() does this itself)"""
+        if retried:
+            self._counters["retries"] += 1
+        elif error is not None:
+            self._counters["failures"] += 1
+            if isinstance(error, LLMTimeoutError):
+                self._counters["deadline_exceeded"] += 1
+        elif seconds is not None:
+            self._latency.append(seconds)
+
+    async def run(self, call, deadline=None):
+        """
+        Await call(deadline) under the policy; returns its result or raises
+        the last LLMError
+        """
+        self._counters["calls"] += 1
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            try:
+                result = await self._attempt(call, deadline)
+            except LLMError as e:
+                delay = self.retry_delay(attempt, e, deadline)
+                if delay is None:
+                    self.record(error=e)
+                    raise
+                self.record(retried=True)
+                logger.warning(f"LLM call failed ({e}); retry {attempt + 1}/{self.retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            self.record(seconds=time.monotonic() - started)
+            return result
+
+    def hedge_delay(self):
+        """The recent p95 call latency (floored at hedge_min_delay); None until there are enough samples"""
+        if len(self._latency) < self.min_samples:
+            return None
+        latency = sorted(self._latency)
+        return max(self.hedge_min_delay, latency[min(len(latency) - 1, int(len(latency) * 0.95))])
+
+    def _may_hedge(self, deadline):
+        if self._counters["hedges"] >= self.hedge_max_ratio * self._counters["calls"]:
+            return False
+        if deadline is not None and deadline <= time.monotonic():
+            return False
+        return self.available_backends() > 1
+
+    async def _attempt(self, call, deadline):
+        delay = self.hedge_delay() if self.hedge else None
+        if delay is None:
+            return await call(deadline)
+
+        primary = asyncio.ensure_future(call(deadline))
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or not self._may_hedge(deadline):
+                return await primary
+            if self.admission is not None and not self.admission.try_acquire(PRIORITY_BATCH):
+                self._counters["hedges_skipped_busy"] += 1
+                return await primary
+            self._counters["hedges"] += 1
+            hedge = asyncio.ensure_future(call(deadline))
+            if self.admission is not None:
+                hedge.add_done_callback(lambda _: self.admission.release())
+            tasks.append(hedge)
+            pending, error = set(tasks), None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._counters["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:  # the loser (or both, if we were cancelled)
+                if not task.done():
+                    task.cancel()
+
+    def stats(self):
+        latency = sorted(self._latency)
+        hedge_delay = self.hedge_delay() if self.hedge else None
+        return {
+            **self._counters,
+            "max_retries": self.retries,
+            "hedge_enabled": self.hedge,
+            "hedge_delay_ms": round(hedge_delay * 1000, 1) if hedge_delay is not None else None,
+            "p50_ms": round(latency[len(latency) // 2] * 1000, 1) if latency else 0.0,
+            "p95_ms": round(latency[min(len(latency) - 1, int(len(latency) * 0.95))] * 1000, 1) if latency else 0.0,
+        }
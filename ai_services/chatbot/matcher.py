@@ -0,0 +1,184 @@
+"""
+matcher.py - Multi-phrase keyword matcher (Aho–Corasick)
+
+Finds every occurrence of any of a set of phrases in one left-to-right pass
+over the text, so the cost grows with the length of the message and not
+with the number of phrases. Matching is case-insensitive, treats curly and
+straight apostrophes alike, collapses runs of whitespace and respects word
+boundaries like the r"\\b...\\b" regexes it replaces.
+
+A phrase ending in "*" only needs a boundary at its start, which is useful
+for agglutinative languages ("ఆత్మహత్య*" also matches "ఆత్మహత్యకు").
+
+Used by the safety filter and the suggestion intents; the automaton is
+built once and is read-only afterwards, so one instance can be shared
+across threads. scanner() matches text that arrives in chunks (streamed
+LLM tokens), keeping its own position in the automaton.
+"""
+
+import unicodedata
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+_APOSTROPHES = str.maketrans({"’": "'", "‘": "'", "ʼ": "'", "＇": "'"})
+
+
+def normalize(text: str) -> str:
+    """Lowercase, unify apostrophes and collapse whitespace (applied to phrases and text alike)"""
+    return " ".join(text.lower().translate(_APOSTROPHES).split())
+
+
+def _is_word_char(ch: str) -> bool:
+    # Like re's \w, but combining marks (Devanagari/Telugu vowel signs) count as part of a word
+    return ch.isalnum() or ch == "_" or unicodedata.category(ch)[0] == "M"
+
+
+class Match(NamedTuple):
+    start: int  # offsets into normalize(text)
+    end: int
+    phrase: str
+    value: Any
+
+
+class KeywordMatcher:
+    def __init__(self, phrases: Union[Dict[str, Any], Iterable[str]]):
+        """
+        phrases: iterable of phrases, or dict phrase -> value reported with each
+        match (e.g. a category or language code)
+        """
+        items = phrases.items() if isinstance(phrases, dict) else ((p, None) for p in phrases)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # state -> (length, prefix_only, phrase, value) for every phrase ending there
+        self._out: List[List[Tuple[int, bool, str, Any]]] = [[]]
+        self.size = 0
+        self.max_length = 0
+        for phrase, value in items:
+            self._add(phrase, value)
+        self._build_fail_links()
+
+    def _add(self, phrase: str, value: Any):
+        prefix_only = phrase.endswith("*")
+        key = normalize(phrase.rstrip("*") if prefix_only else phrase)
+        if not key:
+            return
+        state = 0
+        for ch in key:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(key), prefix_only, phrase, value))
+        self.size += 1
+        self.max_length = max(self.max_length, len(key))
+
+    def _build_fail_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                # Phrases that are suffixes of this one end here too
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, text: str) -> Iterator[Match]:
+        """Yield matches in order of where they end"""
+        text = normalize(text)
+        goto, fail, out = self._goto, self._fail, self._out
+        last = len(text) - 1
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not out[state]:
+                continue
+            for length, prefix_only, phrase, value in out[state]:
+                start = i - length + 1
+                if start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if not prefix_only and i < last and _is_word_char(text[i + 1]):
+                    continue
+                yield Match(start, i + 1, phrase, value)
+
+    def find_all(self, text: str) -> List[Match]:
+        return list(self.iter_matches(text))
+
+    def search(self, text: str) -> Optional[Match]:
+        """First match (by end position), or None; stops scanning as soon as one is found"""
+        return next(self.iter_matches(text), None)
+
+    def scanner(self) -> "StreamScanner":
+        return StreamScanner(self)
+
+
+class StreamScanner:
+    """
+    iter_matches() over text fed in chunks: feeding "I feel anx" then
+    "ious" finds the same matches as iter_matches("I feel anxious"). A
+    match at the very end of a chunk waits for the next character
+    (or finish()) to check its end boundary. Not thread-safe; use one per
+    stream.
+    """
+
+    def __init__(self, matcher: KeywordMatcher):
+        self._matcher = matcher
+        self._state = 0
+        self._pos = 0  # characters of normalized text seen so far
+        self._recent = ""  # the latest normalized characters, enough to check start boundaries
+        self._space = False  # the previous chunk ended in whitespace
+        self._waiting: List[Match] = []  # matches whose end boundary depends on the next character
+
+    def feed(self, chunk: str) -> List[Match]:
+        # Normalize like normalize(): whitespace runs, also across chunks, become one space
+        text = chunk.lower().translate(_APOSTROPHES)
+        words = text.split()
+        if not words:
+            self._space = self._space or (bool(text) and self._pos > 0)
+            return []
+        body = " ".join(words)
+        if self._pos and (self._space or text[0].isspace()):
+            body = " " + body
+        self._space = text[-1].isspace()
+
+        goto, fail, out = self._matcher._goto, self._matcher._fail, self._matcher._out
+        buffer = self._recent + body  # previous characters, for start boundaries
+        offset = len(self._recent)
+        state, pos, waiting = self._state, self._pos, self._waiting
+        matches = []
+        for i, ch in enumerate(body):
+            if waiting:
+                if not _is_word_char(ch):
+                    matches.extend(waiting)
+                waiting = []
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            pos += 1
+            if not out[state]:
+                continue
+            for length, prefix_only, phrase, value in out[state]:
+                before = offset + i - length
+                if before >= 0 and _is_word_char(buffer[before]):
+                    continue
+                match = Match(pos - length, pos, phrase, value)
+                if prefix_only:
+                    matches.append(match)
+                else:
+                    waiting.append(match)
+        self._state, self._pos, self._waiting = state, pos, waiting
+        self._recent = buffer[-(self._matcher.max_length + 1):]
+        return matches
+
+    def finish(self) -> List[Match]:
+        """Matches still waiting on an end boundary (the text ends here)"""
+        matches, self._waiting = self._waiting, []
+        return matches
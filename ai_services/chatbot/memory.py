@@ -0,0 +1,177 @@
+"""
+memory.py - Per-session conversation memory
+
+Each chat session keeps its own bounded window of recent messages, capped
+by message count and by bytes (max_session_bytes). Idle sessions expire
+after a TTL, and the least recently used sessions are evicted once the
+session count or the bytes stored across all sessions (max_total_bytes)
+exceed their limits, so memory scales with active users rather than
+growing without bound.
+
+Exchanges that fall out of the window are handed back to the caller, which
+folds them into the session's rolling summary (see prompt_builder.py).
+"""
+
+import time
+from collections import OrderedDict
+
+
+class ConversationMemory:
+    def __init__(self, max_messages=10, max_sessions=1000, ttl_seconds=1800,
+                 max_session_bytes=64 * 1024, max_total_bytes=8 * 1024 * 1024):
+        self.max_messages = max_messages
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_session_bytes = max_session_bytes
+        self.max_total_bytes = max_total_bytes
+        # session_id -> {"messages": [...], "summary": str, "bytes": int, "last_seen": float, "at_risk": bool},
+        # least recently used first
+        self._sessions = OrderedDict()
+        self._bytes = 0
+        self._evictions = 0
+        self._expired = 0
+
+    @staticmethod
+    def _size(message):
+        return len(message["content"].encode("utf-8"))
+
+    def get(self, session_id):
+        """
+        Return a copy of the session's recent messages (empty for unknown or
+        anonymous sessions)
+        """
+        if session_id is None:
+            return []
+        self._expire()
+        session = self._sessions.get(session_id)
+        if session is None:
+            return []
+        session["last_seen"] = time.monotonic()
+        self._sessions.move_to_end(session_id)
+        return list(session["messages"])
+
+    def append(self, session_id, user_input, response):
+        """
+        Record one user/assistant exchange. Anonymous (None) sessions are not stored.
+        Returns the older messages pushed out of the window (oldest first).
+        """
+        if session_id is None:
+            return []
+        session = self._session(session_id)
+
+        for message in ({"role": "user", "content": user_input},
+                        {"role": "assistant", "content": response}):
+            session["messages"].append(message)
+            session["bytes"] += self._size(message)
+            self._bytes += self._size(message)
+
+        # Keep the per-session window bounded, dropping whole exchanges so no
+        # reply loses its question. The byte cap always keeps the latest
+        # exchange, even one larger than the cap on its own (as trim() does).
+        dropped = []
+        while session["messages"] and (
+            len(session["messages"]) > self.max_messages
+            or (len(session["messages"]) > 2 and session["bytes"] > self.max_session_bytes)
+        ):
+            dropped.extend(self._drop_oldest_exchange(session))
+
+        session["last_seen"] = time.monotonic()
+        self._sessions.move_to_end(session_id)
+        self._expire()
+        self._evict_lru()
+        return dropped
+
+    def trim(self, session_id, max_tokens, count_tokens):
+        """
+        Drop the oldest exchanges until the session's messages fit in
+        max_tokens (by count_tokens), always keeping the latest exchange.
+        Returns the dropped messages (oldest first).
+        """
+        session = self._sessions.get(session_id) if session_id is not None else None
+        if session is None:
+            return []
+        dropped = []
+        while len(session["messages"]) > 2 and sum(count_tokens(m["content"]) for m in session["messages"]) > max_tokens:
+            dropped.extend(self._drop_oldest_exchange(session))
+        return dropped
+
+    def _drop_oldest_exchange(self, session):
+        dropped = session["messages"][:2]
+        for message in dropped:
+            session["bytes"] -= self._size(message)
+            self._bytes -= self._size(message)
+        del session["messages"][:2]
+        return dropped
+
+    def get_summary(self, session_id):
+        """
+        The session's rolling summary of turns no longer in the window ("" if none)
+        """
+        session = self._sessions.get(session_id) if session_id is not None else None
+        return session["summary"] if session else ""
+
+    def set_summary(self, session_id, summary):
+        session = self._sessions.get(session_id) if session_id is not None else None
+        if session is None:
+            return  # expired or evicted meanwhile
+        size = len(summary.encode("utf-8")) - len(session["summary"].encode("utf-8"))
+        session["summary"] = summary
+        session["bytes"] += size
+        self._bytes += size
+
+    def _session(self, session_id):
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = {"messages": [], "summary": "", "bytes": 0, "last_seen": time.monotonic(), "at_risk": False}
+            self._sessions[session_id] = session
+        return session
+
+    def mark_at_risk(self, session_id):
+        """
+        Remember that this session raised a safety/risk signal
+        """
+        if session_id is None:
+            return
+        self._session(session_id)["at_risk"] = True
+        self._sessions.move_to_end(session_id)
+        self._evict_lru()
+
+    def is_at_risk(self, session_id):
+        session = self._sessions.get(session_id) if session_id is not None else None
+        return bool(session and session["at_risk"])
+
+    def clear(self, session_id):
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            self._bytes -= session["bytes"]
+
+    def _expire(self):
+        """
+        Drop sessions idle for longer than the TTL (oldest are at the front)
+        """
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session["last_seen"] >= cutoff:
+                break
+            self.clear(session_id)
+            self._expired += 1
+
+    def _evict_lru(self):
+        while self._sessions and (len(self._sessions) > self.max_sessions or self._bytes > self.max_total_bytes):
+            session_id = next(iter(self._sessions))
+            self.clear(session_id)
+            self._evictions += 1
+
+    def stats(self):
+        return {
+            "sessions": len(self._sessions),
+            "bytes": self._bytes,
+            "evictions": self._evictions,
+            "expired": self._expired,
+            "max_sessions": self.max_sessions,
+            "max_session_bytes": self.max_session_bytes,
+            "max_total_bytes": self.max_total_bytes,
+            "max_messages": self.max_messages,
+            "ttl_seconds": self.ttl_seconds,
+        }
@@ -0,0 +1,160 @@
+"""
+nlp_pool.py - Runs CPU-bound NLP stages off the asyncio event loop
+
+spaCy/NLTK preprocessing and the safety scan are plain CPU work. Run
+inline in an async handler, one long message stalls every other in-flight
+request on the loop, /health included. NLPWorkerPool sends that work to
+an executor instead:
+
+  "thread"  - a thread pool sharing the process-wide TextPreprocessor. The
+              loop stays responsive; throughput is still bound by the GIL.
+  "process" - a process pool; each worker builds and warms its own
+              preprocessor once, in the pool initializer. Uses all cores,
+              costs one model copy per worker.
+  "inline"  - run on the loop (the old behaviour; also used until start()).
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from ai_services.utils.config import Config
+from ai_services.utils.metrics import observe_stage
+from ai_services.utils.text_processor import get_preprocessor, warm_up
+from .safety import scan, CRISIS
+
+logger = logging.getLogger(__name__)
+
+
+# --- Work units (module level so process workers can unpickle them) ---
+def analyze_message(text: str):
+    """
+    Safety scan of the raw text, preprocessing, then a scan of the cleaned
+    text. Returns (signals, clean_text, seconds per stage); clean_text is
+    None when the raw text already contains a crisis phrase (no need to
+    preprocess it).
+    """
+    started = time.perf_counter()
+    signals = scan(text)
+    timings = {"safety": time.perf_counter() - started}
+    if CRISIS in signals:
+        return signals, None, timings
+    started = time.perf_counter()
+    clean_text = get_preprocessor().preprocess(text, return_tokens=False)
+    timings["preprocess"] = time.perf_counter() - started
+    if clean_text and clean_text.strip():
+        started = time.perf_counter()
+        signals |= scan(clean_text)
+        timings["safety"] += time.perf_counter() - started
+    return signals, clean_text, timings
+
+
+def preprocess_text(text: str) -> str:
+    return get_preprocessor().preprocess(text, return_tokens=False)
+
+
+_worker_load_times = {}
+
+
+def _init_worker():
+    # Load the NLP models once per worker process, before its first task
+    global _worker_load_times
+    _worker_load_times = warm_up()
+
+
+def _get_worker_load_times():
+    return _worker_load_times
+
+
+class NLPWorkerPool:
+    MODES = ("inline", "thread", "process")
+
+    def __init__(self, mode="thread", workers=2):
+        if mode not in self.MODES:
+            raise ValueError(f"NLP pool mode must be one of {self.MODES}, got {mode!r}")
+        self.mode = mode
+        self.workers = workers
+        self._executor = None
+        self._in_flight = 0
+        self._counters = {"tasks": 0, "errors": 0}
+
+    async def start(self):
+        """
+        Create the executor and load the NLP models where they will run (this
+        process, or each worker process) rather than on the first chat.
+        Returns the warm-up's per-component load times in seconds.
+        """
+        if self._executor is not None:
+            return {}
+        if self.mode != "process":
+            if self.mode == "thread":
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="nlp")
+            return await asyncio.to_thread(warm_up)
+        # spawn, not fork: the parent already runs an event loop and I/O threads
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker
+        )
+        loop = asyncio.get_running_loop()
+        try:
+            load_times = await asyncio.gather(*(
+                loop.run_in_executor(self._executor, _get_worker_load_times) for _ in range(self.workers)))
+        except Exception as e:
+            logger.warning(f"NLP process pool failed to start ({e!r}); using threads instead")
+            await self.stop()
+            self.mode = "thread"
+            return await self.start()
+        return load_times[0]
+
+    async def stop(self):
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown, True, cancel_futures=True)
+
+    async def run(self, fn, *args):
+        """
+        fn(*args) on the pool (inline before start() or in "inline" mode).
+        fn must be a module-level function for the process pool.
+        """
+        self._counters["tasks"] += 1
+        self._in_flight += 1
+        try:
+            if self._executor is None:
+                return fn(*args)
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        except Exception:
+            self._counters["errors"] += 1
+            raise
+        finally:
+            self._in_flight -= 1
+
+    async def analyze(self, text: str):
+        """
+        (signals, clean_text) for a message; records the safety, preprocess
+        and pool wait times
+        """
+        started = time.perf_counter()
+        signals, clean_text, timings = await self.run(analyze_message, text)
+        for stage, seconds in timings.items():
+            observe_stage(stage, seconds)
+        observe_stage("nlp_queue", max(0.0, time.perf_counter() - started - sum(timings.values())))
+        return signals, clean_text
+
+    async def preprocess(self, text: str) -> str:
+        return await self.run(preprocess_text, text)
+
+    def stats(self):
+        return {
+            **self._counters,
+            "mode": self.mode,
+            "workers": self.workers if self.mode != "inline" else 0,
+            "running": self._executor is not None,
+            "in_flight": self._in_flight,
+        }
+
+
+# --- Shared pool (started/stopped by the app lifecycle hooks) ---
+nlp_pool = NLPWorkerPool(mode=Config.NLP_POOL_MODE, workers=Config.NLP_POOL_WORKERS)
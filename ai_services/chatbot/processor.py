@@ -3,92 +3,193 @@ processor.py - Demo and async message processing for chatbot
 """
 
 import asyncio
-import requests
-from ai_services.utils.text_processor import TextPreprocessor
-from .safety import check_safety
-from .ai_client import get_llm_response
+import logging
+import time
+from ai_services.utils.config import Config
+from ai_services.utils.metrics import observe_stage, timed_stage
+from .safety import scan as scan_safety, CRISIS, CRISIS_MESSAGE
+from .nlp_pool import nlp_pool
+from .translation import translator
+from .ai_client import get_llm_response, stream_llm_response, llm_client, conversation_memory, summarizer, LLM_ERROR_PREFIX
+from .health import health_monitor
+from .admission import AdmissionController, ServerBusyError, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_BATCH
+from .errors import LLMError
+from .cache import ResponseCache
+from .semantic_cache import SemanticCache
+from .risk_classifier import RiskClassifier, load_risk_model
 
-# --- Preprocessor instance ---
-preprocessor = TextPreprocessor()
+logger = logging.getLogger(__name__)
 
-# --- Synchronous health check (basic ping) ---
-def check_llm_health_sync() -> bool:
+# --- Concurrency limit + priority queue in front of the LLM ---
+admission = AdmissionController(
+    max_concurrency=Config.LLM_MAX_CONCURRENCY,
+    max_queue=Config.LLM_MAX_QUEUE,
+    queue_timeout=Config.LLM_QUEUE_TIMEOUT
+)
+# Hedged LLM calls only run on a free slot; background summaries queue behind every user turn
+llm_client.policy.admission = admission
+summarizer.admit = lambda: admission.slot(PRIORITY_BATCH, timeout=Config.PROMPT_SUMMARY_TIMEOUT)
+
+# --- Exact-match cache for stateless first-turn replies ---
+response_cache = ResponseCache(
+    max_entries=Config.RESPONSE_CACHE_MAX_ENTRIES,
+    ttl_seconds=Config.RESPONSE_CACHE_TTL,
+    max_bytes=Config.RESPONSE_CACHE_MAX_BYTES
+)
+
+# --- Optional semantic cache: paraphrases of earlier first-turn messages ---
+semantic_cache = SemanticCache(
+    llm_client.embed,
+    model=llm_client.model,
+    threshold=Config.SEMANTIC_CACHE_THRESHOLD,
+    capacity=Config.SEMANTIC_CACHE_CAPACITY,
+    path=Config.SEMANTIC_CACHE_PATH,
+    enabled=Config.SEMANTIC_CACHE_ENABLED
+)
+
+# --- ML risk classifier, with the keyword matcher as fallback past its deadline ---
+risk_classifier = RiskClassifier(
+    load_risk_model(Config.RISK_MODEL_PATH) if Config.RISK_CLASSIFIER_ENABLED else None,
+    fallback=scan_safety,
+    deadline=Config.RISK_CLASSIFIER_DEADLINE,
+    max_batch=Config.RISK_BATCH_MAX,
+    max_wait=Config.RISK_BATCH_WAIT
+)
+
+# --- Health check (cached) ---
+async def check_llm_health_async() -> dict:
     """
-    Quick sync check if Ollama API is reachable.
-    Returns True if service is accessible, False otherwise.
+    Returns the health monitor's cached snapshot: service status, available
+    models, staleness and last error. Never probes Ollama on the request path.
     """
-    try:
-        response = requests.get("http://localhost:11434/api/tags", timeout=5)
-        return response.status_code == 200
-    except Exception as e:
-        print(f"LLM sync health check failed: {e}")
-        return False
+    return health_monitor.snapshot()
 
-# --- Async health check (detailed) ---
-async def check_llm_health_async() -> dict:
+# --- Pre-generation stages (shared by /chat and /chat/stream) ---
+async def prepare_user_message(user_input: str, session_id=None) -> dict:
     """
-    Async detailed health check that returns service status and available models.
+    Runs translation, NLP preprocessing, safety checks and the response
+    cache lookup ahead of generation. Returns the cleaned text, the LLM
+    queue priority, the cache key to store the reply under (None if not
+    cacheable), the time spent translating and, when the message must not
+    reach the LLM, the reply to send instead ("response" is None otherwise).
     """
-    try:
-        response = requests.get("http://localhost:11434/api/tags", timeout=5)
-        if response.status_code == 200:
-            models = response.json().get("models", [])
-            return {
-                "status": "healthy",
-                "available_models": len(models),
-                "models": [model.get("name", "Unknown") for model in models] if models else []
-            }
-        else:
-            return {
-                "status": "unhealthy",
-                "error": f"HTTP {response.status_code}",
-                "available_models": 0,
-                "models": []
-            }
-    except requests.exceptions.ConnectionError:
-        return {
-            "status": "unavailable",
-            "error": "Cannot connect to Ollama service",
-            "available_models": 0,
-            "models": []
-        }
-    except Exception as e:
-        return {
-            "status": "error",
-            "error": str(e),
-            "available_models": 0,
-            "models": []
-        }
+    # The raw message is always scanned first: the keyword lists cover the
+    # user's own language, translation can soften a non-English message's
+    # wording, and a crisis phrase shouldn't wait for the translation backend
+    raw_signals = scan_safety(user_input)
+    if CRISIS in raw_signals:
+        conversation_memory.mark_at_risk(session_id)
+        return {"clean_text": "", "response": CRISIS_MESSAGE, "priority": PRIORITY_HIGH, "cache_key": None}
+
+    text, translation_seconds = await translator.to_english(user_input)
+    translation_ms = round(translation_seconds * 1000, 2)
+    observe_stage("translation", translation_seconds)
+
+    # Safety runs on the (translated) message before preprocessing: stopword
+    # removal and lemmatization can break phrases like "kill myself". The
+    # cleaned text is scanned too (expanded slang, stripped markup). All of
+    # it is CPU work, so it runs on the NLP pool.
+    signals, clean_text = await nlp_pool.analyze(text)
+    signals |= raw_signals
+    if clean_text is None:
+        conversation_memory.mark_at_risk(session_id)
+        return {"clean_text": "", "response": CRISIS_MESSAGE, "priority": PRIORITY_HIGH, "cache_key": None,
+                "translation_ms": translation_ms}
+
+    if not clean_text or not clean_text.strip():
+        return {"clean_text": "", "response": "Please enter a valid message.", "priority": PRIORITY_NORMAL,
+                "cache_key": None, "translation_ms": translation_ms}
+
+    # The classifier covers wording the keyword lists don't
+    if CRISIS not in signals:
+        with timed_stage("risk_classifier"):
+            signals |= await risk_classifier.classify(clean_text)
+    if CRISIS in signals:
+        conversation_memory.mark_at_risk(session_id)
+        return {"clean_text": clean_text, "response": CRISIS_MESSAGE, "priority": PRIORITY_HIGH, "cache_key": None,
+                "translation_ms": translation_ms}
+
+    if signals:
+        conversation_memory.mark_at_risk(session_id)
+
+    priority = PRIORITY_HIGH if conversation_memory.is_at_risk(session_id) else PRIORITY_NORMAL
+
+    cache_key = _response_cache_key(clean_text, session_id, priority)
+    embedding = None
+    if cache_key is not None:
+        with timed_stage("cache_lookup"):
+            cached = response_cache.get(cache_key)
+            if cached is None and semantic_cache.enabled:
+                cached, embedding = await semantic_cache.lookup(clean_text)
+        if cached is not None:
+            conversation_memory.append(session_id, clean_text, cached)
+            return {"clean_text": clean_text, "response": cached, "priority": priority, "cache_key": None,
+                    "translation_ms": translation_ms}
+
+    return {
+        "clean_text": clean_text, "response": None, "priority": priority,
+        "cache_key": cache_key, "embedding": embedding, "translation_ms": translation_ms
+    }
+
+def _response_cache_key(clean_text: str, session_id, priority):
+    """
+    Cache key for this turn, or None when it must be generated fresh:
+    only stateless first turns of sessions without risk signals are cached.
+    """
+    if not Config.RESPONSE_CACHE_ENABLED:
+        return None
+    history = conversation_memory.get(session_id)
+    if priority != PRIORITY_NORMAL or history:
+        response_cache.bypass()
+        return None
+    return response_cache.make_key(llm_client.model, clean_text, history)
+
+def store_cached_response(prepared: dict, response: str):
+    """
+    Cache a freshly generated reply if the turn was cacheable and the call succeeded
+    """
+    if prepared.get("cache_key") is not None and response and not response.startswith(LLM_ERROR_PREFIX):
+        response_cache.put(prepared["cache_key"], response)
+        semantic_cache.store(prepared.get("embedding"), response)
 
 # --- Async message processing function ---
-async def process_user_message(user_input: str) -> dict:
+async def process_user_message(user_input: str, session_id=None, deadline=None, priority=None) -> dict:
     """
     Processes user input through NLP preprocessing, performs safety checks,
-    and returns both cleaned text and LLM response.
+    and returns both cleaned text and LLM response. deadline
+    (time.monotonic()) bounds the LLM queue wait and the Ollama call; when
+    the call fails (after the client's retries) the result carries "error".
+    priority overrides the admission priority (PRIORITY_BATCH for batch runs).
+    Raises ServerBusyError when no LLM slot is available in time.
     """
-    clean_text = preprocessor.preprocess(user_input, return_tokens=False)
-    
-    if not clean_text or not clean_text.strip():
-        return {"clean_text": "", "response": "Please enter a valid message."}
+    prepared = await prepare_user_message(user_input, session_id)
+    clean_text = prepared["clean_text"]
+    if prepared["response"] is not None:
+        return {"clean_text": clean_text, "response": prepared["response"]}
 
-    flagged, warning = check_safety(clean_text)
-    if flagged:
-        return {"clean_text": clean_text, "response": warning}
-
-    # Use sync quick check before attempting LLM response
-    if not check_llm_health_sync():
+    # Cached health state from the background monitor (no network call)
+    if not health_monitor.is_healthy():
         return {
             "clean_text": clean_text, 
             "response": "⚠️ AI service is currently unavailable. Please try again later."
         }
 
+    remaining = deadline - time.monotonic() if deadline is not None else None
     try:
-        print(f"Sending to LLM: {clean_text}")  # Debug print
-        response = await get_llm_response(clean_text)
-        print(f"LLM Response: {response}")  # Debug print
-    except Exception as e:
-        print(f"LLM Error: {str(e)}")  # Debug print
-        response = f"⚠️ Sorry, I had an issue reaching the AI service: {str(e)}"
+        async with admission.slot(prepared["priority"] if priority is None else priority, timeout=remaining):
+            logger.debug(f"Sending to LLM: {clean_text}")
+            response = await get_llm_response(clean_text, session_id, deadline=deadline)
+            logger.debug(f"LLM Response: {response}")
+        store_cached_response(prepared, response)
+    except ServerBusyError:
+        raise
+    except LLMError as e:
+        logger.error(f"LLM Error ({e.kind}): {e}")
+        return {
+            "clean_text": clean_text,
+            "response": f"{LLM_ERROR_PREFIX} the AI service: {str(e)}",
+            "error": e.kind
+        }
 
     return {"clean_text": clean_text, "response": response}
 
@@ -98,7 +199,7 @@ async def demo():
     Demo function to test message processing with various inputs.
     """
     print("=== LLM Health Check ===")
-    health_status = await check_llm_health_async()
+    health_status = await health_monitor.refresh()
     print(f"Service Status: {health_status['status']}")
     if health_status.get("models"):
         print(f"Available Models: {', '.join(health_status['models'])}")
@@ -116,12 +217,14 @@ async def demo():
 
     print("\n=== Message Processing Demo ===")
     for msg in test_messages:
-        result = await process_user_message(msg)
+        result = await process_user_message(msg, session_id="demo")
         print(f"Original:  '{msg}'")
         print(f"Cleaned:   '{result['clean_text']}'")
         print(f"Response:  {result['response']}")
         print("-" * 50)
 
+    await llm_client.close()
+
 # --- Run demo if executed as module ---
 if __name__ == "__main__":
     asyncio.run(demo())
@@ -0,0 +1,280 @@
+"""
+prompt_builder.py - Token-budgeted prompts with a rolling summary of older turns
+
+Every turn's prompt is laid out within a fixed context budget
+(LLM_CONTEXT_TOKENS, which is also sent to Ollama as num_ctx):
+
+  system prompt           byte-identical on every turn (KV-cache prefix)
+  summary of older turns  at most PROMPT_SUMMARY_TOKENS
+  recent exchanges        newest first, whole exchanges, at most PROMPT_HISTORY_TOKENS
+  user message            cut in the middle if it would not fit
+  (reply)                 LLM_REPLY_TOKENS kept free for generation
+
+so prefill stays roughly the same size however long a session runs.
+Token counts are an estimate (about 4 characters per token for ASCII,
+fewer for other scripts) unless PROMPT_TOKENIZER names a real one.
+
+Exchanges that fall out of the history budget are folded into the
+session's summary by RollingSummarizer, off the request path: a cheap
+extractive summary is written straight away, and a background task asks
+the LLM for a better one when it gets to it. Those calls take an LLM slot
+at batch priority (see processor.py), behind every user turn.
+"""
+
+import asyncio
+import importlib
+import logging
+import time
+
+from ai_services.utils.metrics import metrics
+from .admission import ServerBusyError
+from .errors import LLMError
+
+logger = logging.getLogger(__name__)
+
+PROMPT_TOKENS = metrics.histogram(
+    "panah_prompt_tokens", "Estimated prompt tokens per LLM turn",
+    buckets=(64, 128, 256, 512, 768, 1024, 1536, 2048, 3072, 4096, 8192)
+)
+
+MESSAGE_OVERHEAD_TOKENS = 4  # role markers / separators per chat message
+SUMMARY_HEADER = "Summary of the earlier conversation:\n"
+TRUNCATION_MARK = " [...] "
+
+SUMMARY_PROMPT = (
+    "You maintain a short running summary of a supportive mental health conversation. "
+    "Merge the new messages into the current summary. Keep what the user shared about "
+    "their situation, feelings, answers to screening questions, coping strategies already "
+    "suggested, and any mention of self-harm or crisis. Write plain sentences in English, "
+    "no more than {words} words."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count: ~4 ASCII characters per token, ~1.5 characters per
+    token for other scripts (Devanagari, Telugu...), which BPE splits finely
+    """
+    if text.isascii():
+        return -(-len(text) // 4)
+    # Indic scripts are 3 bytes per character in UTF-8, ASCII 1: count them without a Python loop
+    other = (len(text.encode("utf-8")) - len(text)) // 2
+    return -(-(len(text) - other) // 4) + int(other / 1.5 + 0.5)
+
+
+def load_tokenizer(spec: str):
+    """
+    "estimate" or "package.module:function" (text -> token count); falls
+    back to the estimate (logged) if the function can't be loaded
+    """
+    if spec in ("", "estimate"):
+        return estimate_tokens
+    try:
+        module_name, _, attr = spec.partition(":")
+        return getattr(importlib.import_module(module_name), attr)
+    except Exception as e:
+        logger.warning(f"Tokenizer {spec!r} unavailable ({e}); estimating token counts")
+        return estimate_tokens
+
+
+def truncate_to_tokens(text: str, max_tokens: int, count_tokens=estimate_tokens, keep_tail=True) -> str:
+    """
+    Shorten text to about max_tokens, cutting from the middle (keep_tail)
+    or from the end
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+    # Binary search on characters kept; the count is monotonic enough for that
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if keep_tail:
+            candidate = text[:mid - mid // 3] + TRUNCATION_MARK + text[len(text) - mid // 3:]
+        else:
+            candidate = text[:mid] + TRUNCATION_MARK
+        if count_tokens(candidate) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    if keep_tail:
+        return text[:low - low // 3] + TRUNCATION_MARK + text[len(text) - low // 3:]
+    return text[:low] + TRUNCATION_MARK
+
+
+class PromptBuilder:
+    def __init__(self, system_prompt, context_tokens=4096, reply_tokens=400, history_tokens=1024,
+                 summary_tokens=200, count_tokens=estimate_tokens):
+        """
+        context_tokens: the model's context window (num_ctx)
+        reply_tokens: kept free for the generated reply (num_predict)
+        history_tokens: budget for recent exchanges sent verbatim
+        summary_tokens: budget for the summary of older turns
+        """
+        self.system_prompt = system_prompt
+        self.context_tokens = context_tokens
+        self.reply_tokens = reply_tokens
+        self.history_tokens = history_tokens
+        self.summary_tokens = summary_tokens
+        self.count_tokens = count_tokens
+        self.system_tokens = self.message_tokens(system_prompt)
+        self._counters = {"prompts": 0, "prompt_tokens": 0, "truncated_user": 0,
+                          "history_messages_skipped": 0, "with_summary": 0}
+
+    def message_tokens(self, content: str) -> int:
+        return self.count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+
+    def build(self, user_input: str, history=(), summary=""):
+        """
+        Messages for one turn: system prompt, summary, as many of the most
+        recent exchanges in `history` as fit, and the user message
+        """
+        available = self.context_tokens - self.reply_tokens - self.system_tokens
+
+        # Cut an oversized user message rather than the reply or the system prompt, but
+        # leave room for the summary and history (or at least half the space) as well
+        user_budget = max(available // 2, available - self.summary_tokens - self.history_tokens)
+        user_tokens = self.message_tokens(user_input)
+        if user_tokens > user_budget:
+            user_input = truncate_to_tokens(user_input, user_budget - MESSAGE_OVERHEAD_TOKENS, self.count_tokens)
+            user_tokens = self.message_tokens(user_input)
+            self._counters["truncated_user"] += 1
+        available -= user_tokens
+
+        messages = [{"role": "system", "content": self.system_prompt}]
+        if summary and available > MESSAGE_OVERHEAD_TOKENS:
+            summary = truncate_to_tokens(summary, min(self.summary_tokens, available - MESSAGE_OVERHEAD_TOKENS),
+                                         self.count_tokens, keep_tail=False)
+            messages.append({"role": "system", "content": SUMMARY_HEADER + summary})
+            available -= self.message_tokens(messages[-1]["content"])
+            self._counters["with_summary"] += 1
+
+        # Whole exchanges, newest first, so no reply loses its question
+        budget = min(self.history_tokens, available)
+        recent = []
+        history = list(history)
+        for start in range(len(history) - 2, -1, -2):
+            exchange = history[start:start + 2]
+            cost = sum(self.message_tokens(m["content"]) for m in exchange)
+            if cost > budget:
+                break
+            recent[:0] = exchange
+            budget -= cost
+        self._counters["history_messages_skipped"] += len(history) - len(recent)
+        messages.extend(recent)
+        messages.append({"role": "user", "content": user_input})
+
+        prompt_tokens = sum(self.message_tokens(m["content"]) for m in messages)
+        self._counters["prompts"] += 1
+        self._counters["prompt_tokens"] += prompt_tokens
+        PROMPT_TOKENS.observe(prompt_tokens)
+        return messages
+
+    def stats(self):
+        prompts = self._counters["prompts"] or 1
+        return {
+            **self._counters,
+            "avg_prompt_tokens": round(self._counters["prompt_tokens"] / prompts, 1),
+            "system_tokens": self.system_tokens,
+            "context_tokens": self.context_tokens,
+            "reply_tokens": self.reply_tokens,
+            "history_tokens": self.history_tokens,
+            "summary_tokens": self.summary_tokens,
+        }
+
+
+def extractive_summary(summary: str, messages, max_tokens: int, count_tokens=estimate_tokens) -> str:
+    """
+    Cheap stand-in for an LLM summary: the previous summary plus a short
+    line per dropped user message, oldest lines dropped to fit
+    """
+    lines = [summary] if summary else []
+    for message in messages:
+        if message["role"] == "user":
+            lines.append("The user said: " + truncate_to_tokens(message["content"], 40, count_tokens, keep_tail=False))
+    while len(lines) > 1 and count_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return truncate_to_tokens("\n".join(lines), max_tokens, count_tokens, keep_tail=False)
+
+
+class RollingSummarizer:
+    def __init__(self, memory, complete=None, max_tokens=200, timeout=30.0, count_tokens=estimate_tokens, admit=None):
+        """
+        memory: the ConversationMemory whose sessions get summaries
+        complete: async (messages, max_tokens, temperature, deadline) -> (text, stats),
+                  or None for extractive summaries only
+        admit: () -> async context manager held around each LLM call
+               (an admission slot), or None to call the LLM straight away
+        """
+        self.memory = memory
+        self.complete = complete
+        self.admit = admit
+        self.max_tokens = max_tokens
+        self.timeout = timeout
+        self.count_tokens = count_tokens
+        # session_id -> {"base": summary the new messages are merged into, "messages": [...]}
+        self._pending = {}
+        self._task = None
+        self._counters = {"scheduled": 0, "llm_summaries": 0, "llm_failures": 0, "superseded": 0}
+
+    def schedule(self, session_id, dropped):
+        """
+        Fold messages dropped from the session's window into its summary:
+        the extractive version now, the LLM version in the background
+        """
+        if session_id is None or not dropped:
+            return
+        self._counters["scheduled"] += 1
+        current = self.memory.get_summary(session_id)
+        self.memory.set_summary(session_id, extractive_summary(current, dropped, self.max_tokens, self.count_tokens))
+        if self.complete is None:
+            return
+        pending = self._pending.setdefault(session_id, {"base": current, "messages": []})
+        pending["messages"].extend(dropped)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._drain())
+
+    async def _drain(self):
+        """One summary at a time, so this never takes more than one extra LLM slot"""
+        while self._pending:
+            session_id = next(iter(self._pending))
+            job = self._pending.pop(session_id)
+            try:
+                summary = await self._summarize(job["base"], job["messages"])
+            except (LLMError, ServerBusyError) as e:
+                self._counters["llm_failures"] += 1
+                logger.warning(f"Conversation summary failed ({e}); keeping the extractive summary")
+                continue
+            self._counters["llm_summaries"] += 1
+            if session_id in self._pending:
+                # More turns dropped meanwhile: merge those into this summary next
+                self._pending[session_id]["base"] = summary
+                self._counters["superseded"] += 1
+            else:
+                self.memory.set_summary(session_id, summary)
+
+    async def _summarize(self, base, messages):
+        transcript = "\n".join(f"{m['role'].capitalize()}: {m['content']}" for m in messages)
+        prompt = [
+            {"role": "system", "content": SUMMARY_PROMPT.format(words=max(20, int(self.max_tokens * 0.7)))},
+            {"role": "user", "content": f"Current summary:\n{base or '(none)'}\n\nNew messages:\n{transcript}"},
+        ]
+        if self.admit is None:
+            text, _ = await self.complete(prompt, self.max_tokens, 0.2, time.monotonic() + self.timeout)
+        else:
+            async with self.admit():
+                text, _ = await self.complete(prompt, self.max_tokens, 0.2, time.monotonic() + self.timeout)
+        return truncate_to_tokens(text.strip(), self.max_tokens, self.count_tokens, keep_tail=False)
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    def stats(self):
+        return {**self._counters, "pending": len(self._pending), "llm_enabled": self.complete is not None}
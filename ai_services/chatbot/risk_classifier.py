@@ -0,0 +1,209 @@
+"""
+risk_classifier.py - CPU risk classifier stage next to the keyword safety filter
+
+Keyword lists only catch wording someone thought of in advance. This stage
+scores the preprocessed message with a small model and returns the same
+categories as safety.scan(). It runs behind a micro-batching queue: requests
+that arrive together are scored in one model call on a worker thread, so
+the event loop never runs inference.
+
+Every request has a hard deadline. If the score isn't back in time (or the
+model fails), the stage falls back to the keyword matcher for that turn,
+so a slow model can cost at most the deadline and never drops a crisis
+phrase.
+
+Models are pluggable: anything with predict_proba(list of texts) -> list of
+floats. Built in are a logistic model over unigram/bigram tokens stored as
+JSON (no extra dependencies) and, if scikit-learn is installed, a pickled
+sklearn pipeline (.joblib / .pkl).
+"""
+
+import asyncio
+import json
+import logging
+import math
+import time
+from collections import deque
+
+from .safety import ELEVATED_RISK
+
+logger = logging.getLogger(__name__)
+
+
+class LogisticRiskModel:
+    """
+    Logistic regression over TextPreprocessor tokens, loaded from JSON:
+    {"bias": float, "weights": {"token": w, "token token": w, ...},
+     "thresholds": {"elevated_risk": p, "crisis": p}}
+    """
+
+    def __init__(self, weights, bias=0.0, thresholds=None):
+        self.weights = weights
+        self.bias = bias
+        self.thresholds = thresholds or {ELEVATED_RISK: 0.5}
+        self.bigrams = any(" " in feature for feature in weights)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["weights"], data.get("bias", 0.0), data.get("thresholds"))
+
+    def predict_proba(self, texts):
+        weights = self.weights
+        scores = []
+        for text in texts:
+            tokens = text.split()
+            z = self.bias + sum(weights.get(t, 0.0) for t in tokens)
+            if self.bigrams:
+                z += sum(weights.get(f"{a} {b}", 0.0) for a, b in zip(tokens, tokens[1:]))
+            scores.append(1.0 / (1.0 + math.exp(-z)))
+        return scores
+
+
+class SklearnRiskModel:
+    """
+    A fitted scikit-learn pipeline (vectorizer + classifier) saved with joblib
+    """
+
+    def __init__(self, pipeline, thresholds=None):
+        self.pipeline = pipeline
+        self.thresholds = thresholds or {ELEVATED_RISK: 0.5}
+
+    @classmethod
+    def load(cls, path):
+        import joblib  # only needed for this backend
+        return cls(joblib.load(path))
+
+    def predict_proba(self, texts):
+        return [float(p[1]) for p in self.pipeline.predict_proba(list(texts))]
+
+
+def load_risk_model(path):
+    """
+    Pick the backend from the file extension; None (stage disabled) if the
+    model can't be loaded
+    """
+    try:
+        if path.endswith((".joblib", ".pkl")):
+            return SklearnRiskModel.load(path)
+        return LogisticRiskModel.load(path)
+    except Exception as e:
+        logger.warning(f"Risk classifier disabled, could not load {path}: {e}")
+        return None
+
+
+class RiskClassifier:
+    def __init__(self, model, fallback, deadline=0.05, max_batch=32, max_wait=0.0, enabled=True):
+        """
+        model: object with predict_proba(texts) and a thresholds dict
+        fallback: text -> set of categories, used when the deadline is missed
+        deadline: seconds a request may wait for its score
+        max_batch / max_wait: a batch takes whatever queued up while the
+        previous model call ran (up to max_batch); max_wait > 0 additionally
+        holds a batch open that long for more requests
+        """
+        self.model = model
+        self.fallback = fallback
+        self.deadline = deadline
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.enabled = enabled and model is not None
+        self._queue = None
+        self._task = None
+        self._inference = deque(maxlen=1000)  # seconds per model call
+        self._latency = deque(maxlen=1000)    # seconds classify() waited, per request (incl. fallbacks)
+        self._batch_sizes = deque(maxlen=1000)
+        self._counters = {"classified": 0, "fallbacks": 0, "errors": 0, "flagged": 0}
+
+    async def start(self):
+        if self.enabled and self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def classify(self, text):
+        """
+        Categories (CRISIS / ELEVATED_RISK) for a preprocessed message; the
+        keyword fallback's result if the model misses the deadline
+        """
+        if not self.enabled or self._task is None:
+            return self.fallback(text)
+        started = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((text, future))
+        try:
+            score = await asyncio.wait_for(asyncio.shield(future), self.deadline)
+        except asyncio.TimeoutError:
+            score = None
+        finally:
+            self._latency.append(time.perf_counter() - started)
+        if score is None:  # past the deadline, or the model failed
+            self._counters["fallbacks"] += 1
+            return self.fallback(text)
+        self._counters["classified"] += 1
+        categories = {category for category, threshold in self.model.thresholds.items() if score >= threshold}
+        if categories:
+            self._counters["flagged"] += 1
+        return categories
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            batch_deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = batch_deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Requests that already gave up don't need scoring
+            batch = [(text, future) for text, future in batch if not future.done()]
+            if not batch:
+                continue
+            started = time.perf_counter()
+            try:
+                scores = await loop.run_in_executor(None, self.model.predict_proba, [text for text, _ in batch])
+            except Exception as e:
+                logger.warning(f"Risk classifier failed on a batch of {len(batch)}: {e}")
+                self._counters["errors"] += 1
+                scores = [None] * len(batch)  # waiters fall back to keywords
+            else:
+                self._inference.append(time.perf_counter() - started)
+                self._batch_sizes.append(len(batch))
+            for (_, future), score in zip(batch, scores):
+                if not future.done():
+                    future.set_result(score)
+
+    def stats(self):
+        inference = sorted(self._inference)
+        latency = sorted(self._latency)
+        return {
+            **self._counters,
+            "enabled": self.enabled,
+            "deadline_ms": round(self.deadline * 1000, 1),
+            "avg_batch_size": round(sum(self._batch_sizes) / len(self._batch_sizes), 2) if self._batch_sizes else 0.0,
+            "p50_inference_ms": _percentile_ms(inference, 0.50),
+            "p99_inference_ms": _percentile_ms(inference, 0.99),
+            "p50_latency_ms": _percentile_ms(latency, 0.50),
+            "p99_latency_ms": _percentile_ms(latency, 0.99),
+        }
+
+
+def _percentile_ms(sorted_seconds, q):
+    if not sorted_seconds:
+        return 0.0
+    return round(sorted_seconds[min(len(sorted_seconds) - 1, int(len(sorted_seconds) * q))] * 1000, 3)
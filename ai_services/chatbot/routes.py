@@ -1,23 +1,47 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from ai_services.chatbot.processor import process_user_message, check_llm_health_async
-import asyncio
+from typing import Optional
+from ai_services.chatbot.processor import (
+    process_user_message, prepare_user_message, stream_llm_response, check_llm_health_async,
+    admission, ServerBusyError, store_cached_response, PRIORITY_BATCH
+)
+from ai_services.chatbot.ai_client import llm_client
+from ai_services.chatbot.errors import LLMError
+from ai_services.chatbot.batch import parse_batch, run_batch
+from ai_services.chatbot.intents import intent_engine
+from ai_services.utils.config import Config
+from ai_services.utils.metrics import observe_stage, timed_stage
+import json
 import logging
+import time
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+BUSY_MESSAGE = "⚠️ I'm getting a lot of messages right now. Please try again in a few seconds."
+
 class ChatRequest(BaseModel):
     message: str
+    # Conversation memory is kept per session; omit for a stateless turn
+    session_id: Optional[str] = None
 
-async def safe_process_message(message: str, retries: int = 3, delay: float = 1.0):
+async def safe_process_message(message: str, session_id: Optional[str] = None, deadline: Optional[float] = None,
+                               priority: Optional[int] = None):
     """
-    Calls process_user_message with retry logic for transient failures.
-    Optimized for local LLaMA instead of API rate limits.
+    Calls process_user_message behind the cached health check. Retries and
+    hedging happen inside the LLM client, around the Ollama call only;
+    translation and preprocessing run once. deadline (time.monotonic())
+    defaults to REQUEST_DEADLINE from now; priority overrides the LLM
+    queue priority.
     """
+    if deadline is None:
+        deadline = time.monotonic() + Config.REQUEST_DEADLINE
+
     # First check if local LLM is healthy
     try:
-        health = await check_llm_health_async()
+        with timed_stage("health_check"):
+            health = await check_llm_health_async()
         if health.get("status") != "healthy":
             logger.error(f"Local LLM not ready: {health.get('error', 'Unknown error')}")
             return {
@@ -32,63 +56,179 @@ async def safe_process_message(message: str, retries: int = 3, delay: float = 1.
             "clean_text": "",
             "error": str(e)
         }
-    
-    # Process message with retries for transient issues
-    for attempt in range(retries):
-        try:
-            result = await process_user_message(message)
-            
-            # Check if the result indicates an error
-            if "⚠️ Sorry, I had an issue reaching" in result.get("response", ""):
-                raise Exception("AI service error")
-            
-            return result
-            
-        except Exception as e:
-            logger.warning(f"Attempt {attempt+1} failed: {e}")
-            
-            if attempt < retries - 1:  # Don't sleep on the last attempt
-                await asyncio.sleep(delay)
-                delay *= 1.5  # Moderate backoff for local LLM
-    
-    # Return a clear error message if all retries fail
-    logger.error("Failed to process message after multiple retries.")
-    return {
-        "response": "I'm sorry, I couldn't process your message right now. Please try again in a moment.",
-        "clean_text": "",
-        "error": "Failed after multiple retries"
-    }
+
+    try:
+        result = await process_user_message(message, session_id, deadline=deadline, priority=priority)
+    except ServerBusyError:
+        raise  # overloaded: the caller answers 429
+    except Exception as e:
+        logger.exception(f"Chat pipeline failed: {e}")
+        result = {"clean_text": "", "error": "internal"}
+
+    if result.get("error"):
+        logger.error(f"Failed to process message: {result['error']}")
+        return {
+            "response": "I'm sorry, I couldn't process your message right now. Please try again in a moment.",
+            "clean_text": result.get("clean_text", ""),
+            "error": result["error"]
+        }
+    return result
+
+def build_suggestions(response: str) -> list:
+    """
+    Quick-reply suggestions based on the bot's response (see intents.py)
+    """
+    return intent_engine.suggest(response)
 
 @router.post("/chat")
 async def chat_endpoint(req: ChatRequest):
     """
     Receives user message, processes it through the AI pipeline,
     and returns the AI response along with quick suggestions.
+    Responds 429 straight away when the LLM queue can't take the request.
     """
-    result = await safe_process_message(req.message)
-    
-    # Dynamic suggestions based on context
-    base_suggestions = [
-        "Tell me more",
-        "That helps, thank you", 
-        "I need different strategies",
-        "Can we talk about something else?"
-    ]
-    
-    # Add context-aware suggestions
-    response_text = result.get("response", "").lower()
-    if any(word in response_text for word in ["anxiety", "anxious", "worry"]):
-        base_suggestions.insert(0, "What helps with anxiety?")
-    elif any(word in response_text for word in ["sleep", "tired", "rest"]):
-        base_suggestions.insert(0, "Sleep tips please")
-    elif any(word in response_text for word in ["sad", "depressed", "down"]):
-        base_suggestions.insert(0, "I need emotional support")
+    try:
+        with timed_stage("total"):
+            result = await safe_process_message(req.message, req.session_id)
+    except ServerBusyError as e:
+        return _busy_response(e)
     
     return {
         "bot_response": result.get("response", ""),
         "clean_text": result.get("clean_text", ""),
-        "suggestions": base_suggestions[:4]  # Limit to 4 suggestions
+        "suggestions": build_suggestions(result.get("response", ""))
+    }
+
+def _busy_response(error: ServerBusyError) -> JSONResponse:
+    """
+    Fast 429 reply in the usual /chat response shape
+    """
+    logger.warning(f"Rejecting chat request: {error}")
+    retry_after = max(1, round(error.retry_after))
+    return JSONResponse(
+        status_code=429,
+        headers={"Retry-After": str(retry_after)},
+        content={
+            "bot_response": BUSY_MESSAGE,
+            "clean_text": "",
+            "suggestions": build_suggestions(""),
+            "error": "busy",
+            "retry_after": retry_after
+        }
+    )
+
+def _sse_event(event: str, data: dict) -> str:
+    """
+    Format one Server-Sent Event with a JSON payload
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.post("/chat/stream")
+async def chat_stream_endpoint(req: ChatRequest):
+    """
+    Same pipeline as /chat, but streams the reply as Server-Sent Events:
+    a `token` event per generated chunk, then a final `done` event with the
+    full response, clean text and suggestions (plus an `error` event first
+    if generation fails part-way).
+    """
+    started = time.perf_counter()
+    deadline = time.monotonic() + Config.REQUEST_DEADLINE
+    with timed_stage("health_check"):
+        health = await check_llm_health_async()
+    if health.get("status") != "healthy":
+        logger.error(f"Local LLM not ready: {health.get('error', 'Unknown error')}")
+        prepared = {
+            "clean_text": "",
+            "response": "⚠️ The AI service is currently unavailable. Please ensure Ollama is running and the model is loaded.",
+            "error": health.get("error", "Unhealthy service")
+        }
+    else:
+        # Preprocessing and safety run before any token is generated
+        prepared = await prepare_user_message(req.message, req.session_id)
+        # Turn the request away before opening the stream if it can't get an LLM slot in time
+        if prepared["response"] is None and admission.check(prepared["priority"]) is not None:
+            observe_stage("total", time.perf_counter() - started)
+            return _busy_response(ServerBusyError("LLM queue is full", retry_after=admission.estimated_wait() or 5))
+
+    async def event_stream():
+        clean_text = prepared["clean_text"]
+        # Tags intents as tokens arrive, so the suggestions are ready when generation ends
+        intents = intent_engine.tracker()
+        chunks = []
+
+        if prepared["response"] is not None:
+            response = prepared["response"]
+            if prepared.get("error"):
+                yield _sse_event("error", {"error": prepared["error"]})
+            yield _sse_event("token", {"token": response})
+        else:
+            try:
+                async with admission.slot(prepared["priority"], timeout=deadline - time.monotonic()):
+                    async for chunk in stream_llm_response(clean_text, req.session_id, deadline=deadline):
+                        chunks.append(chunk)
+                        intents.feed(chunk)
+                        yield _sse_event("token", {"token": chunk})
+                response = "".join(chunks).strip()
+                store_cached_response(prepared, response)
+            except ServerBusyError as e:
+                yield _sse_event("error", {"error": "busy", "retry_after": e.retry_after})
+                response = BUSY_MESSAGE
+            except Exception as e:
+                kind = e.kind if isinstance(e, LLMError) else "internal"
+                logger.error(f"Streaming generation failed ({kind}): {e}")
+                yield _sse_event("error", {"error": str(e), "kind": kind})
+                response = "".join(chunks).strip() or "I'm sorry, I couldn't process your message right now. Please try again in a moment."
+
+        yield _sse_event("done", {
+            "bot_response": response,
+            "clean_text": clean_text,
+            # Streamed replies were tagged token by token; other replies are tagged here
+            "suggestions": intents.suggestions() if chunks and response == "".join(chunks).strip()
+                           else build_suggestions(response)
+        })
+        observe_stage("total", time.perf_counter() - started)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _batch_turn(message: str, session_id: Optional[str]):
+    """
+    One /chat/batch item: the /chat pipeline and reply shape, queued behind interactive users
+    """
+    result = await safe_process_message(message, session_id, priority=PRIORITY_BATCH)
+    reply = {
+        "bot_response": result.get("response", ""),
+        "clean_text": result.get("clean_text", ""),
+        "suggestions": build_suggestions(result.get("response", ""))
     }
+    if result.get("error"):
+        reply["error"] = result["error"]
+    return reply
+
+@router.post("/chat/batch")
+async def chat_batch_endpoint(request: Request, concurrency: Optional[int] = None):
+    """
+    Runs a JSONL body of messages ({"id", "message", "session_id"} per line)
+    through the chat pipeline with bounded concurrency, streaming one JSONL
+    result per item as it completes and a summary line at the end.
+    See batch.py.
+    """
+    items = parse_batch(await request.body())
+    if len(items) > Config.BATCH_MAX_ITEMS:
+        return JSONResponse(
+            status_code=413,
+            content={"error": "too_many_items", "max_items": Config.BATCH_MAX_ITEMS, "items": len(items)}
+        )
+    concurrency = max(1, min(concurrency or Config.BATCH_CONCURRENCY, Config.BATCH_MAX_CONCURRENCY))
+
+    async def result_lines():
+        async for result in run_batch(items, _batch_turn, concurrency=concurrency, max_wait=Config.BATCH_MAX_WAIT):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(result_lines(), media_type="application/x-ndjson", headers={"X-Accel-Buffering": "no"})
 
 # Add health check endpoint
 @router.get("/health")
@@ -103,7 +243,11 @@ async def health_check():
             "message": health.get("error", "OK"),
             "llm_ready": health.get("status") == "healthy",
             "available_models": health.get("available_models", 0),
-            "models": health.get("models", [])
+            "models": health.get("models", []),
+            "checked_at": health.get("checked_at"),
+            "stale": health.get("stale", True),
+            "last_error": health.get("last_error"),
+            "backends": health.get("backends")
         }
     except Exception as e:
         return {
@@ -118,15 +262,13 @@ async def list_models():
     """
     List available Ollama models
     """
-    import aiohttp
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get("http://localhost:11434/api/tags") as response:
-                if response.status == 200:
-                    data = await response.json()
-                    models = [model["name"] for model in data.get("models", [])]
-                    return {"models": models, "status": "success"}
-                else:
-                    return {"models": [], "status": "error", "message": f"Ollama API error: {response.status}"}
+        async with llm_client.request("GET", "/api/tags") as response:
+            if response.status == 200:
+                data = await response.json()
+                models = [model["name"] for model in data.get("models", [])]
+                return {"models": models, "status": "success"}
+            else:
+                return {"models": [], "status": "error", "message": f"Ollama API error: {response.status}"}
     except Exception as e:
         return {"models": [], "status": "error", "message": f"Cannot connect to Ollama: {str(e)}"}
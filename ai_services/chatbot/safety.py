@@ -1,15 +1,76 @@
-import re
+import json
+import os
+
+from ai_services.utils.config import Config
+from .matcher import KeywordMatcher
+
+# Keyword safety stage: scans every raw and preprocessed message, and is the
+# fallback risk_classifier.RiskClassifier uses when its model misses the
+# deadline or fails.
+# Phrases live in chatbot/data/safety/<lang>.json (SAFETY_KEYWORDS_DIR overrides),
+# one file per language with two lists:
+#   "crisis":        triggers the crisis reply and skips the LLM
+#   "elevated_risk": softer signals (PHQ-9 item 9 style wording) that don't trigger
+#                    the crisis reply but mark the session as at-risk so it gets
+#                    priority for an LLM slot
+CRISIS = "crisis"
+ELEVATED_RISK = "elevated_risk"
+
+CRISIS_MESSAGE = (
+    "⚠️ I'm really concerned about what you just said. "
+    "You are not alone — please reach out to a trusted friend, "
+    "a counselor, or call a local helpline (e.g., 9152987821 in India)."
+)
+
+
+def load_keyword_sets(directory: str) -> dict:
+    """
+    Returns {phrase: (category, language)} from every <lang>.json in directory
+    """
+    phrases = {}
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(".json"):
+            continue
+        with open(os.path.join(directory, name), encoding="utf-8") as f:
+            data = json.load(f)
+        language = data.get("language", name[:-len(".json")])
+        for category in (CRISIS, ELEVATED_RISK):
+            for phrase in data.get(category, []):
+                # A phrase listed as crisis anywhere stays crisis
+                if phrases.get(phrase, (None,))[0] != CRISIS:
+                    phrases[phrase] = (category, language)
+    return phrases
+
+
+_KEYWORDS = load_keyword_sets(Config.SAFETY_KEYWORDS_DIR)
+SUICIDE_KEYWORDS = [p for p, (category, _) in _KEYWORDS.items() if category == CRISIS]
+ELEVATED_RISK_KEYWORDS = [p for p, (category, _) in _KEYWORDS.items() if category == ELEVATED_RISK]
+
+# Built once; one pass over the message finds phrases from every list and language
+_matcher = KeywordMatcher(_KEYWORDS)
+
+
+def scan(text: str) -> set:
+    """
+    Categories (CRISIS / ELEVATED_RISK) whose phrases occur in text. Works on
+    raw user input in any of the configured languages, before translation
+    or preprocessing; stops early once a crisis phrase is found.
+    """
+    found = set()
+    for match in _matcher.iter_matches(text):
+        category = match.value[0]
+        found.add(category)
+        if category == CRISIS:
+            break
+    return found
 
-# Simple keyword-based filter (replace with ML classifier later)
-SUICIDE_KEYWORDS = ["suicide", "kill myself", "end my life", "self harm"]
 
 def check_safety(text: str):
-    text_lower = text.lower()
-    for keyword in SUICIDE_KEYWORDS:
-        if re.search(rf"\b{keyword}\b", text_lower):
-            return True, (
-                "⚠️ I'm really concerned about what you just said. "
-                "You are not alone — please reach out to a trusted friend, "
-                "a counselor, or call a local helpline (e.g., 9152987821 in India)."
-            )
+    if CRISIS in scan(text):
+        return True, CRISIS_MESSAGE
     return False, None
+
+
+def check_risk(text: str) -> bool:
+    # A crisis phrase is a risk signal too
+    return bool(scan(text))
@@ -0,0 +1,174 @@
+"""
+semantic_cache.py - Optional semantic response cache
+
+Catches paraphrases the exact-match cache misses ("I'm anxious all the
+time" vs "constant anxiety"). The preprocessed message is embedded with a
+local embedding model, and stored replies are served when the cosine
+similarity to a previous first-turn message is above a threshold.
+
+Vectors live in a fixed-capacity NumPy matrix of unit vectors, so a lookup
+is one matrix-vector product. The least recently used entry is overwritten
+once the index is full, and the index can be saved to / loaded from disk.
+"""
+
+import json
+import logging
+import os
+import time
+
+# NumPy is optional: without it the semantic cache simply stays disabled
+try:
+    import numpy as np
+    _HAS_NUMPY = True
+except Exception:
+    _HAS_NUMPY = False
+
+logger = logging.getLogger(__name__)
+
+
+class VectorIndex:
+    """Fixed-capacity cosine-similarity index over unit-normalized float32 vectors."""
+
+    def __init__(self, dim, capacity):
+        self.dim = dim
+        self.capacity = capacity
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.last_used = np.zeros(capacity, dtype=np.float64)
+        self.size = 0
+
+    @staticmethod
+    def normalize(vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def search(self, unit_vector):
+        """
+        Best (slot, cosine similarity), or (None, 0.0) when empty
+        """
+        if self.size == 0:
+            return None, 0.0
+        scores = self.vectors[:self.size] @ unit_vector
+        slot = int(np.argmax(scores))
+        return slot, float(scores[slot])
+
+    def add(self, unit_vector):
+        """
+        Store a vector, overwriting the least recently used slot when full; returns its slot
+        """
+        if self.size < self.capacity:
+            slot = self.size
+            self.size += 1
+        else:
+            slot = int(np.argmin(self.last_used))
+        self.vectors[slot] = unit_vector
+        self.touch(slot)
+        return slot
+
+    def touch(self, slot):
+        self.last_used[slot] = time.time()
+
+
+class SemanticCache:
+    def __init__(self, embed_fn, model, threshold=0.92, capacity=5000, path=None, enabled=True):
+        """
+        embed_fn: async callable text -> list of floats (e.g. LocalLLMClient.embed)
+        model: the chat model the cached replies came from; saved files from
+        another model are ignored on load
+        """
+        self.embed_fn = embed_fn
+        self.model = model
+        self.threshold = threshold
+        self.capacity = capacity
+        self.path = path
+        self.enabled = enabled and _HAS_NUMPY
+        self._index = None  # created on the first embedding, once the dimension is known
+        self._responses = []
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "embed_errors": 0}
+        self._lookup_seconds = 0.0
+
+    async def lookup(self, text):
+        """
+        Returns (cached_response or None, unit vector to store the reply under).
+        The vector is None if embedding failed.
+        """
+        if not self.enabled:
+            return None, None
+        try:
+            vector = VectorIndex.normalize(await self.embed_fn(text))
+        except Exception as e:
+            self._counters["embed_errors"] += 1
+            logger.warning(f"Semantic cache embedding failed: {e}")
+            return None, None
+
+        started = time.perf_counter()
+        if self._index is None or self._index.dim != vector.shape[0]:
+            self._index = VectorIndex(vector.shape[0], self.capacity)
+            self._responses = [None] * self.capacity
+        slot, score = self._index.search(vector)
+        self._lookup_seconds += time.perf_counter() - started
+
+        if slot is not None and score >= self.threshold:
+            self._index.touch(slot)
+            self._counters["hits"] += 1
+            return self._responses[slot], vector
+        self._counters["misses"] += 1
+        return None, vector
+
+    def store(self, vector, response):
+        if not self.enabled or vector is None or self._index is None or self._index.dim != vector.shape[0]:
+            return
+        if self._index.size == self.capacity:
+            self._counters["evictions"] += 1
+        slot = self._index.add(vector)
+        self._responses[slot] = response
+
+    def save(self, path=None):
+        """
+        Persist vectors and replies (called from the app shutdown hook)
+        """
+        path = path or self.path
+        if not path or self._index is None or self._index.size == 0:
+            return
+        size = self._index.size
+        np.savez(
+            path,
+            vectors=self._index.vectors[:size],
+            last_used=self._index.last_used[:size],
+            responses=np.array(json.dumps(self._responses[:size])),
+            model=np.array(self.model)
+        )
+        logger.info(f"Semantic cache saved {size} entries to {path}")
+
+    def load(self, path=None):
+        path = path or self.path
+        if not self.enabled or not path or not os.path.exists(path):
+            return
+        try:
+            with np.load(path) as data:
+                if str(data["model"]) != self.model:
+                    logger.info(f"Ignoring semantic cache at {path}: built for model {data['model']}")
+                    return
+                vectors = data["vectors"][:self.capacity]
+                last_used = data["last_used"][:self.capacity]
+                responses = json.loads(str(data["responses"]))[:self.capacity]
+        except Exception as e:
+            logger.warning(f"Could not load semantic cache from {path}: {e}")
+            return
+        self._index = VectorIndex(vectors.shape[1], self.capacity)
+        self._index.vectors[:len(vectors)] = vectors
+        self._index.last_used[:len(vectors)] = last_used
+        self._index.size = len(vectors)
+        self._responses = responses + [None] * (self.capacity - len(responses))
+        logger.info(f"Semantic cache loaded {len(vectors)} entries from {path}")
+
+    def stats(self):
+        lookups = self._counters["hits"] + self._counters["misses"]
+        return {
+            **self._counters,
+            "enabled": self.enabled,
+            "entries": self._index.size if self._index is not None else 0,
+            "capacity": self.capacity,
+            "threshold": self.threshold,
+            "avg_search_ms": round(self._lookup_seconds / lookups * 1000, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,163 @@
+"""
+translation.py - Translation stage in front of the English NLP pipeline
+
+Preprocessing, the risk classifier and the response cache all expect
+English. Most messages already are, so the stage checks first, locally and
+in one pass: text with no non-ASCII letters is treated as English and goes
+straight through. Everything else is translated by a pluggable backend,
+off the event loop and with a deadline, and the result is kept in an LRU
+cache (greetings and common phrases repeat a lot).
+
+Backends (TRANSLATION_BACKEND):
+  "none"          - returns the text unchanged (the default)
+  "googletrans"   - googletrans.Translator, one instance reused; works with
+                    both the async (4.0.2+) and the older sync API. Sends
+                    the user's message to Google, so it is opt-in
+  "pkg.module:Cls" - any class with translate(text, dest) -> str, sync or
+                    async, e.g. an offline local model
+
+A failed or slow translation never blocks the turn: the original text is
+used instead and the failure is counted.
+"""
+
+import asyncio
+import importlib
+import importlib.util
+import inspect
+import logging
+import time
+from collections import deque
+
+from ai_services.utils.config import Config
+from .cache import ResponseCache
+
+logger = logging.getLogger(__name__)
+
+
+def needs_translation(text: str) -> bool:
+    """
+    Cheap local language check: only letters outside ASCII (Devanagari,
+    Telugu, accented Latin, ...) mean the text isn't English. Emoji and
+    curly quotes don't count. Romanized text (e.g. Hinglish) is passed
+    through as-is.
+    """
+    if text.isascii():
+        return False
+    return any(ch.isalpha() and not ch.isascii() for ch in text)
+
+
+class NullBackend:
+    name = "none"
+
+    def translate(self, text, dest="en"):
+        return text
+
+
+class GoogleTransBackend:
+    name = "googletrans"
+
+    def __init__(self):
+        # Checked now, imported on first use (the import alone takes ~0.2 s)
+        if importlib.util.find_spec("googletrans") is None:
+            raise ImportError("googletrans is not installed")
+        self._translator = None
+
+    async def translate(self, text, dest="en"):
+        if self._translator is None:
+            from googletrans import Translator
+            self._translator = Translator()
+        if inspect.iscoroutinefunction(self._translator.translate):
+            result = await self._translator.translate(text, dest=dest)
+        else:
+            result = await asyncio.to_thread(self._translator.translate, text, dest=dest)
+        return result.text
+
+
+def load_backend(spec: str):
+    """
+    "googletrans", "none" or "package.module:ClassName"; falls back to the
+    null backend (logged) if the backend can't be created
+    """
+    try:
+        if spec in ("", "none"):
+            return NullBackend()
+        if spec == "googletrans":
+            return GoogleTransBackend()
+        module_name, _, class_name = spec.partition(":")
+        backend = getattr(importlib.import_module(module_name), class_name)()
+        if not hasattr(backend, "name"):
+            backend.name = spec
+        return backend
+    except Exception as e:
+        logger.warning(f"Translation backend {spec!r} unavailable ({e}); messages will not be translated")
+        return NullBackend()
+
+
+class TranslationStage:
+    def __init__(self, backend, dest="en", timeout=3.0, cache_entries=2048, cache_ttl=24 * 3600,
+                 ascii_bypass=True):
+        self.backend = backend
+        self.dest = dest
+        self.timeout = timeout
+        self.ascii_bypass = ascii_bypass
+        self.cache = ResponseCache(max_entries=cache_entries, ttl_seconds=cache_ttl)
+        self._timings = deque(maxlen=1000)  # seconds per backend call
+        self._counters = {"bypassed": 0, "cached": 0, "translated": 0, "errors": 0, "timeouts": 0}
+
+    async def to_english(self, text: str):
+        """
+        Returns (text to run the pipeline on, seconds spent in this stage)
+        """
+        started = time.perf_counter()
+        if isinstance(self.backend, NullBackend) or (self.ascii_bypass and not needs_translation(text)):
+            self._counters["bypassed"] += 1
+            return text, time.perf_counter() - started
+
+        key = (self.backend.name, self.dest, text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self._counters["cached"] += 1
+            return cached, time.perf_counter() - started
+
+        translate = self.backend.translate
+        try:
+            if inspect.iscoroutinefunction(translate):
+                call = translate(text, dest=self.dest)
+            else:  # blocking backends run on a worker thread
+                call = asyncio.to_thread(translate, text, dest=self.dest)
+            translated = await asyncio.wait_for(call, self.timeout)
+        except asyncio.TimeoutError:
+            self._counters["timeouts"] += 1
+            logger.warning(f"Translation timed out after {self.timeout}s; using the original text")
+            return text, time.perf_counter() - started
+        except Exception as e:
+            self._counters["errors"] += 1
+            logger.warning(f"Translation failed ({e}); using the original text")
+            return text, time.perf_counter() - started
+
+        elapsed = time.perf_counter() - started
+        self._timings.append(elapsed)
+        self._counters["translated"] += 1
+        if translated:
+            self.cache.put(key, translated)
+        return translated or text, elapsed
+
+    def stats(self):
+        timings = sorted(self._timings)
+        return {
+            **self._counters,
+            "backend": self.backend.name,
+            "cache_entries": self.cache.stats()["entries"],
+            "p50_translate_ms": round(timings[len(timings) // 2] * 1000, 1) if timings else 0.0,
+            "p99_translate_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000, 1) if timings else 0.0,
+        }
+
+
+# --- Shared stage (used by the chat pipeline and the legacy ai_client path) ---
+translator = TranslationStage(
+    load_backend(Config.TRANSLATION_BACKEND),
+    timeout=Config.TRANSLATION_TIMEOUT,
+    cache_entries=Config.TRANSLATION_CACHE_ENTRIES,
+    cache_ttl=Config.TRANSLATION_CACHE_TTL,
+    ascii_bypass=Config.TRANSLATION_ASCII_BYPASS
+)
@@ -1,32 +1,217 @@
-import requests
+"""
+cli_chat.py - Terminal client for the chatbot
+
+Interactive mode streams the reply from /chat/stream and prints tokens as
+they arrive. The whole conversation uses one keep-alive connection and one
+session id, so the bot remembers earlier turns.
+
+Replay mode sends the user turns of a JSONL transcript and prints
+time to first token and total time per turn, which makes it a quick
+throughput and latency check:
+
+    python -m ai_services.cli_chat
+    python -m ai_services.cli_chat --replay transcript.jsonl --concurrency 8 --json replay.json
+
+Transcript lines are {"message": ..., "session_id": ...} or chat-style
+{"role": "user", "content": ...} (other roles are skipped). Turns of one
+session are sent in order; different sessions run concurrently. Lines
+without a session_id are independent stateless turns.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+import uuid
+
+import aiohttp
+
+API_URL = "http://127.0.0.1:8000"
+
+
+async def stream_chat(session, url, message, session_id=None, on_token=None):
+    """
+    Send one turn to /chat/stream. Returns a dict with the final reply
+    ("bot_response", "suggestions"...), "error" if the server reported one,
+    and the client-side "ttft" and "total" in seconds.
+    """
+    started = time.perf_counter()
+    turn = {"ttft": None}
+    async with session.post(f"{url}/chat/stream", json={"message": message, "session_id": session_id}) as resp:
+        if resp.status != 200:
+            # 429 (busy) and other errors come back as plain JSON
+            body = await resp.json(content_type=None) if resp.content_type == "application/json" else {}
+            turn.update(body)
+            turn["error"] = body.get("error", f"HTTP {resp.status}")
+            turn["total"] = time.perf_counter() - started
+            return turn
+
+        event = None
+        async for raw in resp.content:
+            line = raw.decode("utf-8").rstrip("\r\n")
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                data = json.loads(line[len("data: "):])
+                if event == "token":
+                    if turn["ttft"] is None:
+                        turn["ttft"] = time.perf_counter() - started
+                    if on_token is not None:
+                        on_token(data["token"])
+                elif event == "error":
+                    turn["error"] = data.get("kind") or data.get("error")
+                elif event == "done":
+                    turn.update(data)
+    turn["total"] = time.perf_counter() - started
+    return turn
+
+
+async def interactive(args):
+    session_id = args.session or uuid.uuid4().hex[:12]
+    print(f"🤖 Chatbot (type 'quit' to exit) - session {session_id}\n")
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=args.timeout)) as session:
+        while True:
+            try:
+                user_input = await asyncio.to_thread(input, "You: ")
+            except EOFError:
+                user_input = "quit"
+            if user_input.strip().lower() in ["quit", "exit"]:
+                print("Bot: Goodbye! 👋")
+                return
+            if not user_input.strip():
+                continue
+
+            print("Bot: ", end="", flush=True)
+            try:
+                turn = await stream_chat(session, args.url, user_input, session_id,
+                                         on_token=lambda token: print(token, end="", flush=True))
+            except aiohttp.ClientConnectionError:
+                print("\n⚠️ Could not connect to chatbot server.")
+                print("   Did you start FastAPI with: uvicorn ai_services.app:app --port 8000 ?")
+                return
+            except asyncio.TimeoutError:
+                print(f"\n⚠️ No reply within {args.timeout:.0f}s.")
+                continue
+
+            if turn["ttft"] is None:  # nothing streamed (e.g. busy): show the final reply
+                print(turn.get("bot_response", "⚠️ No response."), end="")
+            print()
+            if turn.get("error"):
+                print(f"   ⚠️ {turn['error']}")
+            if args.timings:
+                ttft = f"{turn['ttft'] * 1000:.0f} ms" if turn["ttft"] is not None else "-"
+                print(f"   (first token {ttft}, total {turn['total'] * 1000:.0f} ms)")
+            if turn.get("suggestions"):
+                print("   Suggestions: " + " | ".join(turn["suggestions"]))
+            print()
+
+
+def read_transcript(path):
+    """
+    Turns to replay, grouped by session: {session key: [message, ...]} in file order.
+    Lines that are not a valid turn are skipped with a warning.
+    """
+    sessions = {}
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError as e:
+                print(f"{path}:{line_number}: skipped, not valid JSON ({e})", file=sys.stderr)
+                continue
+            if isinstance(data, str):
+                data = {"message": data}
+            if not isinstance(data, dict):
+                print(f"{path}:{line_number}: skipped, expected an object or a string", file=sys.stderr)
+                continue
+            if data.get("role", "user") != "user":
+                continue
+            message = data.get("message", data.get("content"))
+            if not isinstance(message, str):
+                print(f'{path}:{line_number}: skipped, expected a "message" or "content" string', file=sys.stderr)
+                continue
+            session_id = data.get("session_id")
+            # A stateless line is a session of its own (and is sent without an id)
+            key = ("session", session_id) if session_id is not None else ("line", line_number)
+            sessions.setdefault(key, []).append(message)
+    return sessions
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+async def replay(args):
+    sessions = read_transcript(args.replay)
+    limit = asyncio.Semaphore(args.concurrency)
+    turns = []
+
+    async def replay_session(key, messages, session):
+        session_id = key[1] if key[0] == "session" else None
+        for number, message in enumerate(messages, 1):
+            async with limit:
+                try:
+                    turn = await stream_chat(session, args.url, message, session_id)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    turn = {"ttft": None, "total": None, "error": type(e).__name__}
+            record = {"session": session_id, "turn": number, "ttft": turn["ttft"], "total": turn["total"],
+                      "error": turn.get("error")}
+            turns.append(record)
+            ttft = f"{turn['ttft'] * 1000:7.0f} ms" if turn["ttft"] is not None else "      - ms"
+            total = f"{turn['total'] * 1000:7.0f} ms" if turn["total"] is not None else "      - ms"
+            label = f"{session_id or 'stateless'} #{number}"
+            print(f"{label:<24} ttft {ttft}  total {total}  {turn.get('error') or 'ok':<10} {message[:40]!r}")
+
+    started = time.perf_counter()
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=args.timeout), connector=connector) as session:
+        await asyncio.gather(*(replay_session(key, messages, session) for key, messages in sessions.items()))
+    elapsed = time.perf_counter() - started
+
+    ttfts = [t["ttft"] for t in turns if t["ttft"] is not None and not t["error"]]
+    totals = [t["total"] for t in turns if t["total"] is not None and not t["error"]]
+    ms = lambda values, q: round(percentile(values, q) * 1000, 1)
+    summary = {
+        "turns": len(turns),
+        "sessions": len(sessions),
+        "errors": sum(1 for t in turns if t["error"]),
+        "concurrency": args.concurrency,
+        "seconds": round(elapsed, 2),
+        "turns_per_s": round(len(turns) / elapsed, 2) if elapsed else 0.0,
+        "ttft_p50_ms": ms(ttfts, 0.50), "ttft_p95_ms": ms(ttfts, 0.95),
+        "total_p50_ms": ms(totals, 0.50), "total_p95_ms": ms(totals, 0.95),
+    }
+    print(f"\n{summary['turns']} turns in {summary['sessions']} sessions, {summary['errors']} errors, "
+          f"{summary['seconds']}s ({summary['turns_per_s']} turns/s at concurrency {args.concurrency})")
+    print(f"  ttft  p50 {summary['ttft_p50_ms']} ms  p95 {summary['ttft_p95_ms']} ms")
+    print(f"  total p50 {summary['total_p50_ms']} ms  p95 {summary['total_p95_ms']} ms")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"summary": summary, "turns": turns}, f, indent=2)
 
-API_URL = "http://127.0.0.1:8000/chat/"
 
 def main():
-    print("🤖 Chatbot (type 'quit' to exit)\n")
-
-    while True:
-        user_input = input("You: ")
-
-        if user_input.strip().lower() in ["quit", "exit"]:
-            print("Bot: Goodbye! 👋")
-            break
-
-        try:
-            response = requests.post(API_URL, json={"message": user_input})
-
-            if response.status_code == 200:
-                data = response.json()
-                print("Bot:", data.get("response", "⚠️ No response."))
-            else:
-                print(f"⚠️ Server error {response.status_code}: {response.text}")
-
-        except requests.exceptions.ConnectionError:
-            print("⚠️ Could not connect to chatbot server.")
-            print("   Did you start FastAPI with: uvicorn app:app --reload --port 8000 ?")
-            break
-        except Exception as e:
-            print("⚠️ Unexpected error:", e)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=API_URL)
+    parser.add_argument("--session", help="session id to continue (default: a new one)")
+    parser.add_argument("--timings", action="store_true", help="show time to first token and total per reply")
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds per turn")
+    parser.add_argument("--replay", metavar="TRANSCRIPT", help="replay the user turns of a JSONL transcript")
+    parser.add_argument("--concurrency", type=int, default=1, help="turns in flight during --replay")
+    parser.add_argument("--json", help="write --replay timings to this file")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(replay(args) if args.replay else interactive(args))
+    except KeyboardInterrupt:
+        print("\nBot: Goodbye! 👋")
+    except aiohttp.ClientConnectionError:
+        print(f"⚠️ Could not connect to chatbot server at {args.url}", file=sys.stderr)
+        sys.exit(1)
 
 
 if __name__ == "__main__":
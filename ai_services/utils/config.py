@@ -7,3 +7,125 @@ load_dotenv()
 class Config:
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
     DEBUG = os.getenv("DEBUG", "false").lower() == "true"
+
+    # --- Local LLM (Ollama) ---
+    OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+    # Several Ollama servers, comma-separated; requests go to the least busy one
+    OLLAMA_BASE_URLS = [url.strip().rstrip("/") for url in os.getenv("OLLAMA_BASE_URLS", OLLAMA_BASE_URL).split(",") if url.strip()]
+    OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2:latest")
+    # "chat" sends structured messages to /api/chat so Ollama can reuse the KV cache
+    # for the unchanged system prompt and earlier turns; "generate" is the legacy
+    # flattened /api/generate prompt
+    OLLAMA_API_MODE = os.getenv("OLLAMA_API_MODE", "chat")
+    # How long Ollama keeps the model (and its KV cache) loaded between requests
+    OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+    # --- Shared outbound HTTP connection pool ---
+    HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+    HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "20"))
+    HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "60"))
+    HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    HTTP_REQUEST_TIMEOUT = float(os.getenv("HTTP_REQUEST_TIMEOUT", "60"))
+
+    # --- Per-session conversation memory ---
+    MEMORY_MAX_MESSAGES = int(os.getenv("MEMORY_MAX_MESSAGES", "10"))
+    MEMORY_MAX_SESSIONS = int(os.getenv("MEMORY_MAX_SESSIONS", "1000"))
+    MEMORY_SESSION_TTL = float(os.getenv("MEMORY_SESSION_TTL", "1800"))
+    # One session's messages + summary, and all sessions together
+    MEMORY_MAX_SESSION_BYTES = int(os.getenv("MEMORY_MAX_SESSION_BYTES", str(64 * 1024)))
+    MEMORY_MAX_TOTAL_BYTES = int(os.getenv("MEMORY_MAX_TOTAL_BYTES", str(8 * 1024 * 1024)))
+
+    # --- Prompt token budget (see chatbot/prompt_builder.py) ---
+    # Context window requested from Ollama (num_ctx) and the reply length within it (num_predict)
+    LLM_CONTEXT_TOKENS = int(os.getenv("LLM_CONTEXT_TOKENS", "4096"))
+    LLM_REPLY_TOKENS = int(os.getenv("LLM_REPLY_TOKENS", "400"))
+    # Recent exchanges sent verbatim; older ones are folded into a rolling summary
+    PROMPT_HISTORY_TOKENS = int(os.getenv("PROMPT_HISTORY_TOKENS", "1024"))
+    PROMPT_SUMMARY_TOKENS = int(os.getenv("PROMPT_SUMMARY_TOKENS", "200"))
+    # Refine the summary with a background LLM call (false: extractive summary only)
+    PROMPT_SUMMARY_LLM = os.getenv("PROMPT_SUMMARY_LLM", "true").lower() == "true"
+    PROMPT_SUMMARY_TIMEOUT = float(os.getenv("PROMPT_SUMMARY_TIMEOUT", "30"))
+    # "estimate" or "module:function" returning the token count of a string
+    PROMPT_TOKENIZER = os.getenv("PROMPT_TOKENIZER", "estimate")
+
+    # --- Background LLM health monitor ---
+    HEALTH_CHECK_INTERVAL = float(os.getenv("HEALTH_CHECK_INTERVAL", "10"))
+    HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", "5"))
+    HEALTH_STALE_AFTER = float(os.getenv("HEALTH_STALE_AFTER", "30"))
+
+    # --- Per-backend circuit breaker (consecutive failures before ejecting a backend) ---
+    BACKEND_FAILURE_THRESHOLD = int(os.getenv("BACKEND_FAILURE_THRESHOLD", "3"))
+    # Seconds an ejected backend sits out before one trial request (or a good health probe) re-admits it
+    BACKEND_RESET_TIMEOUT = float(os.getenv("BACKEND_RESET_TIMEOUT", "15"))
+
+    # --- LLM admission control ---
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "2"))
+    LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "32"))
+    LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "20"))
+
+    # --- End-to-end deadline per chat request; bounds the LLM queue wait and the Ollama call ---
+    REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE", "60"))
+    # Retries of the LLM call only (connection errors, 5xx, broken streams before the first token)
+    LLM_RETRIES = int(os.getenv("LLM_RETRIES", "2"))
+    LLM_RETRY_BACKOFF = float(os.getenv("LLM_RETRY_BACKOFF", "0.5"))
+    # Hedged requests: a second call after the recent p95 latency, to another backend
+    LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+    LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", "0.5"))
+    LLM_HEDGE_MAX_RATIO = float(os.getenv("LLM_HEDGE_MAX_RATIO", "0.1"))
+
+    # --- Offline batch runs (/chat/batch) ---
+    # Items in flight per batch request (each waits for an LLM slot at batch priority)
+    BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", str(LLM_MAX_CONCURRENCY * 2)))
+    BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "16"))
+    BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "5000"))
+    # Seconds an item keeps retrying while the LLM queue turns it away
+    BATCH_MAX_WAIT = float(os.getenv("BATCH_MAX_WAIT", "300"))
+
+    # --- Exact-match response cache (stateless first turns only) ---
+    RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+    RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+    RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(4 * 1024 * 1024)))
+
+    # --- Semantic response cache (optional, needs numpy + an Ollama embedding model) ---
+    SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+    EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "nomic-embed-text")
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+    SEMANTIC_CACHE_CAPACITY = int(os.getenv("SEMANTIC_CACHE_CAPACITY", "5000"))
+    SEMANTIC_CACHE_PATH = os.getenv("SEMANTIC_CACHE_PATH", "semantic_cache.npz")
+
+    # --- Safety keyword lists (one <lang>.json per language) ---
+    SAFETY_KEYWORDS_DIR = os.getenv(
+        "SAFETY_KEYWORDS_DIR",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "chatbot", "data", "safety")
+    )
+
+    # --- Suggestion intents (phrases, quick replies and priorities) ---
+    INTENTS_PATH = os.getenv(
+        "INTENTS_PATH",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "chatbot", "data", "intents.json")
+    )
+
+    # --- ML risk classifier stage (micro-batched, falls back to keywords past the deadline) ---
+    RISK_CLASSIFIER_ENABLED = os.getenv("RISK_CLASSIFIER_ENABLED", "true").lower() == "true"
+    RISK_MODEL_PATH = os.getenv(
+        "RISK_MODEL_PATH",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "chatbot", "data", "risk_model.json")
+    )
+    RISK_CLASSIFIER_DEADLINE = float(os.getenv("RISK_CLASSIFIER_DEADLINE", "0.05"))
+    RISK_BATCH_MAX = int(os.getenv("RISK_BATCH_MAX", "32"))
+    RISK_BATCH_WAIT = float(os.getenv("RISK_BATCH_WAIT", "0"))
+
+    # --- Executor for CPU-bound preprocessing + safety scans ("inline", "thread" or "process") ---
+    NLP_POOL_MODE = os.getenv("NLP_POOL_MODE", "thread")
+    NLP_POOL_WORKERS = int(os.getenv("NLP_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+    # --- Translation to English ahead of preprocessing ("none", "googletrans" or "module:Class") ---
+    # Opt-in: "googletrans" sends user messages to an external web service
+    TRANSLATION_BACKEND = os.getenv("TRANSLATION_BACKEND", "none")
+    TRANSLATION_TIMEOUT = float(os.getenv("TRANSLATION_TIMEOUT", "3"))
+    TRANSLATION_CACHE_ENTRIES = int(os.getenv("TRANSLATION_CACHE_ENTRIES", "2048"))
+    TRANSLATION_CACHE_TTL = int(os.getenv("TRANSLATION_CACHE_TTL", str(24 * 3600)))
+    # Skip the backend for text without non-ASCII letters (treated as English)
+    TRANSLATION_ASCII_BYPASS = os.getenv("TRANSLATION_ASCII_BYPASS", "true").lower() == "true"
@@ -0,0 +1,183 @@
+"""
+metrics.py - Per-stage latency histograms and counters in Prometheus text format
+
+A small in-process registry (no prometheus_client dependency) rendered by
+the /metrics endpoint. Metrics are updated from the event loop thread only;
+work done on executors reports its timings back to the caller, which
+records them.
+
+Chat pipeline stages (panah_stage_seconds{stage=...}):
+  translation     translation to English (0 for bypassed / cached text)
+  nlp_queue       wait for an NLP pool worker
+  safety          keyword safety scans
+  preprocess      TextPreprocessor cleaning
+  risk_classifier ML risk classifier, including its batching queue
+  cache_lookup    exact + semantic response cache
+  health_check    the request path's (cached) health check
+  health_probe    the background monitor's Ollama probe (off the request path)
+  llm_queue       wait for an LLM slot (admission control)
+  llm_request     Ollama call as seen by the client, first byte to last
+  llm_first_token time to the first streamed token
+  ollama_prefill  prompt evaluation, as reported by Ollama
+  ollama_decode   token generation, as reported by Ollama
+  total           whole turn (/chat and /chat/stream)
+"""
+
+import bisect
+import math
+import time
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [per-bucket counts..., +Inf count, sum]
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series):
+                cumulative += count
+                labels = _labels(self.labelnames + ("le",), key + (_number(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """
+    Read from a callback at scrape time (queue depths, in-flight counts).
+    With labelnames, read() returns {label values tuple: value}.
+    """
+
+    def __init__(self, name, help_text, read, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.read = read
+        self.labelnames = tuple(labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        if not self.labelnames:
+            return lines + [f"{self.name} {_number(self.read())}"]
+        for key, value in sorted(self.read().items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def gauge(self, name, help_text, read, labelnames=()):
+        return self._register(Gauge(name, help_text, read, labelnames))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# --- Shared registry and the chat pipeline's metrics ---
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram("panah_stage_seconds", "Time spent per chat pipeline stage", ("stage",))
+OLLAMA_TOKENS_PER_SECOND = metrics.histogram(
+    "panah_ollama_tokens_per_second", "Ollama throughput per generation (phase: prefill or decode)",
+    ("phase",), buckets=RATE_BUCKETS
+)
+OLLAMA_TOKENS = metrics.counter("panah_ollama_tokens_total", "Tokens processed by Ollama", ("phase",))
+LLM_REQUESTS = metrics.counter("panah_llm_requests_total", "Ollama generation calls by outcome", ("outcome",))
+
+
+def observe_stage(stage: str, seconds: float):
+    STAGE_SECONDS.observe(seconds, stage=stage)
+
+
+@contextmanager
+def timed_stage(stage: str):
+    """Time the block as one observation of `stage` (also when it raises)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - started)
+
+
+def observe_ollama_stats(stats: dict):
+    """Prefill/decode time and tokens/sec from the timing fields of a finished Ollama generation"""
+    for phase, count_field, duration_field in (("prefill", "prompt_eval_count", "prompt_eval_duration"),
+                                               ("decode", "eval_count", "eval_duration")):
+        count = stats.get(count_field, 0)
+        seconds = stats.get(duration_field, 0) / 1e9
+        if count:
+            OLLAMA_TOKENS.inc(count, phase=phase)
+        if seconds > 0:
+            observe_stage(f"ollama_{phase}", seconds)
+            if count:
+                OLLAMA_TOKENS_PER_SECOND.observe(count / seconds, phase=phase)
@@ -9,47 +9,46 @@ Author: Your Name
 Version: 1.1.0
 """
 
+import importlib
 import re
 import string
-from typing import List, Union, Optional, Dict, Any
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, List, Tuple, Union, Optional, Dict, Any
 import warnings
 
-# --- Try to import optional dependencies individually (do NOT raise here) ---
+# --- Optional dependencies, imported on first use (do NOT raise here) ---
+# emoji/textblob/spaCy/NLTK take most of a second to import, so they are only
+# loaded when a TextPreprocessor actually needs them (see warm_up()). pandas was
+# imported here but never used, so it is no longer loaded at all.
 MISSING_DEPS = {}
-_HAS_NLTK = _HAS_TEXTBLOB = _HAS_EMOJI = _HAS_SPACY = _HAS_PANDAS = False
-
-try:
-    import pandas as pd
-    _HAS_PANDAS = True
-except Exception as e:
-    MISSING_DEPS['pandas'] = str(e)
-
-try:
-    import emoji as _emoji
-    _HAS_EMOJI = True
-except Exception as e:
-    MISSING_DEPS['emoji'] = str(e)
-
-try:
-    from textblob import TextBlob as _TextBlob
-    _HAS_TEXTBLOB = True
-except Exception as e:
-    MISSING_DEPS['textblob'] = str(e)
-
-try:
-    import spacy as _spacy
-    _HAS_SPACY = True
-except Exception as e:
-    MISSING_DEPS['spacy'] = str(e)
-
-try:
-    import nltk as _nltk
-    from nltk import word_tokenize as _word_tokenize
-    from nltk.stem import PorterStemmer as _PorterStemmer
-    from nltk.stem import WordNetLemmatizer as _WordNetLemmatizer
-    _HAS_NLTK = True
-except Exception as e:
-    MISSING_DEPS['nltk'] = str(e)
+_OPTIONAL_MODULES: Dict[str, Any] = {}
+
+
+def _optional(name: str):
+    """Import an optional dependency once; returns None (and records why in MISSING_DEPS) if unavailable."""
+    if name not in _OPTIONAL_MODULES:
+        try:
+            _OPTIONAL_MODULES[name] = importlib.import_module(name)
+        except Exception as e:
+            _OPTIONAL_MODULES[name] = None
+            MISSING_DEPS[name.split('.')[0]] = str(e)
+    return _OPTIONAL_MODULES[name]
+
+
+# --- Patterns compiled once at import ---
+_HTML_TAG_RE = re.compile(r'<.*?>')
+_URL_RE = re.compile(r'https?://\S+|www\.\S+')
+_NUMBER_RE = re.compile(r'\b\d+\b')
+_SINGLE_CHAR_RE = re.compile(r'\b(?![aI]\b)[a-zA-Z]\b')
+# Numbers and stray letters in one pass; only used when the two steps are adjacent
+# (punctuation removal off), where removing a number can never change whether a
+# neighbouring letter stands alone
+_NUMBER_OR_SINGLE_CHAR_RE = re.compile(r'\b\d+\b|\b(?![aI]\b)[a-zA-Z]\b')
+_PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
 
 
 class TextPreprocessor:
@@ -80,7 +79,8 @@ class TextPreprocessor:
             'tokenize': True,
             'stem_words': False,
             'lemmatize_words': True,
-            'spacy_model': 'en_core_web_sm'
+            'spacy_model': 'en_core_web_sm',
+            'lemma_cache_size': 50000
         }
         self.config = {**default_config, **config}
 
@@ -91,37 +91,73 @@ class TextPreprocessor:
 
         # Initialize NLP components lazily
         self._initialize_components()
+        self._build_pipeline()
+
+    def _build_pipeline(self):
+        """Resolve the config into a fixed list of cleaning steps (call again after changing self.config)."""
+        cfg = self.config
+        steps = []
+        if cfg['remove_html']:
+            steps.append(self._remove_html_tags)
+        if cfg['remove_urls']:
+            steps.append(self._remove_urls)
+        if cfg['remove_emojis'] and self._timed('emoji', _optional, 'emoji') is not None:
+            steps.append(self._remove_emojis)
+        if cfg['expand_slang']:
+            steps.append(self._expand_slang)
+        if cfg['convert_lowercase']:
+            steps.append(str.lower)
+        if cfg['correct_spelling'] and self._timed('textblob', _optional, 'textblob') is not None:
+            steps.append(self._correct_spelling)
+        if cfg['remove_numbers'] and cfg['remove_single_chars'] and not cfg['remove_punctuation']:
+            steps.append(self._remove_numbers_and_single_characters)
+        else:
+            if cfg['remove_numbers']:
+                steps.append(self._remove_numbers)
+            if cfg['remove_punctuation']:
+                steps.append(self._remove_punctuation)
+            if cfg['remove_single_chars']:
+                steps.append(self._remove_single_characters)
+        if cfg['normalize_whitespace']:
+            steps.append(self._normalize_whitespace)
+        self._clean_steps = tuple(steps)
+
+        self._tokenize = self._analyze if cfg['tokenize'] else _split_without_lemmas
+        self._filter_stopwords = cfg['remove_stopwords']
+        self._lemmatize = cfg['lemmatize_words']
+        self._stem = cfg['stem_words']
 
     def _initialize_components(self):
-        """Initialize NLP components safely and lazily."""
+        """Initialize NLP components safely; load_times records seconds spent per component."""
         self.stemmer = None
         self.lemmatizer = None
         self.nlp = None
         self.stop_words = set()
-
-        if self.config['stem_words'] and _HAS_NLTK:
+        self.load_times: Dict[str, float] = {}
+        self._word_tokenize = None
+        # token -> WordNet lemma, least recently used first; WordNet lemmas don't
+        # depend on context, so chat's small vocabulary makes this mostly hits
+        self._lemma_cache: OrderedDict = OrderedDict()
+        self._lemma_counters = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+        nltk = self._timed('nltk', _optional, 'nltk')
+        if nltk is not None:
+            self._word_tokenize = nltk.word_tokenize
+
+        if self.config['stem_words'] and nltk is not None:
             try:
-                self.stemmer = _PorterStemmer()
+                self.stemmer = nltk.stem.PorterStemmer()
             except Exception:
                 self.stemmer = None
 
-        if self.config['lemmatize_words']:
-            if _HAS_NLTK:
-                try:
-                    self.lemmatizer = _WordNetLemmatizer()
-                except Exception:
-                    self.lemmatizer = None
-            if self.lemmatizer is None and _HAS_SPACY:
-                try:
-                    self.nlp = _spacy.load(self.config.get('spacy_model', 'en_core_web_sm'))
-                except Exception:
-                    self.nlp = None
-
-        if _HAS_SPACY and self.nlp is None:
+        if self.config['lemmatize_words'] and nltk is not None:
             try:
-                self.nlp = _spacy.load(self.config.get('spacy_model', 'en_core_web_sm'))
+                self.lemmatizer = nltk.stem.WordNetLemmatizer()
             except Exception:
-                self.nlp = None
+                self.lemmatizer = None
+
+        # spaCy backs tokenization/lemmatization fallbacks and the stopword list
+        self.nlp = self._timed('spacy_model', self._load_spacy_model)
 
         if self.nlp is not None:
             try:
@@ -129,80 +165,142 @@ class TextPreprocessor:
             except Exception:
                 self.stop_words = set()
 
-        if not self.stop_words and _HAS_NLTK:
+        if not self.stop_words and nltk is not None:
             try:
                 from nltk.corpus import stopwords as _nltk_stopwords
-                self.stop_words = set(_nltk_stopwords.words('english'))
+                self.stop_words = self._timed('nltk_stopwords', lambda: set(_nltk_stopwords.words('english')))
             except Exception:
                 self.stop_words = set()
 
+    def _load_spacy_model(self):
+        spacy = _optional('spacy')
+        if spacy is None:
+            return None
+        try:
+            return spacy.load(self.config.get('spacy_model', 'en_core_web_sm'))
+        except Exception:
+            return None
+
+    def _timed(self, component: str, fn, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.load_times[component] = self.load_times.get(component, 0.0) + time.perf_counter() - started
+
     # --- Helper methods ---
     def _remove_html_tags(self, text: str) -> str:
-        return re.sub(r'<.*?>', '', text)
+        return _HTML_TAG_RE.sub('', text)
 
     def _remove_urls(self, text: str) -> str:
-        return re.sub(r'https?://\S+|www\.\S+', '', text)
+        return _URL_RE.sub('', text)
 
     def _remove_punctuation(self, text: str) -> str:
-        return text.translate(str.maketrans('', '', string.punctuation))
+        return text.translate(_PUNCTUATION_TABLE)
 
     def _expand_slang(self, text: str) -> str:
         return ' '.join([self.SLANG_DICT.get(w.upper(), w) for w in text.split()])
 
     def _remove_emojis(self, text: str) -> str:
-        if _HAS_EMOJI:
+        emoji = _optional('emoji')
+        if emoji is not None:
             try:
-                return _emoji.demojize(text)
+                return emoji.demojize(text)
             except Exception:
                 return text
         return text
 
     def _correct_spelling(self, text: str) -> str:
-        if _HAS_TEXTBLOB:
+        textblob = _optional('textblob')
+        if textblob is not None:
             try:
-                return str(_TextBlob(text).correct())
+                return str(textblob.TextBlob(text).correct())
             except Exception:
                 return text
         return text
 
     def _normalize_whitespace(self, text: str) -> str:
-        return re.sub(r'\s+', ' ', text.strip())
+        # Same result as re.sub(r'\s+', ' ', text.strip()): str.split() and \s agree on whitespace
+        return ' '.join(text.split())
 
     def _remove_numbers(self, text: str) -> str:
-        return re.sub(r'\b\d+\b', '', text)
+        return _NUMBER_RE.sub('', text)
 
     def _remove_single_characters(self, text: str) -> str:
-        return re.sub(r'\b(?![aI]\b)[a-zA-Z]\b', '', text)
+        return _SINGLE_CHAR_RE.sub('', text)
+
+    def _remove_numbers_and_single_characters(self, text: str) -> str:
+        return _NUMBER_OR_SINGLE_CHAR_RE.sub('', text)
 
     def _tokenize_text(self, text: str) -> List[str]:
+        return self._analyze(text)[0]
+
+    def _analyze(self, text: str) -> Tuple[List[str], Optional[List[str]]]:
+        """Tokenize; when spaCy does the tokenizing, also return its lemmas for those tokens (else None)."""
         if not text.strip():
-            return []
-        if _HAS_NLTK:
+            return [], None
+        if self._word_tokenize:
             try:
-                return _word_tokenize(text)
+                return self._word_tokenize(text), None
             except Exception:
                 pass
         if self.nlp:
             try:
-                return [tok.text for tok in self.nlp(text)]
+                doc = self.nlp(text)
+                return [tok.text for tok in doc], self._doc_lemmas(doc)
             except Exception:
                 pass
-        return text.split()
+        return text.split(), None
+
+    def _doc_lemmas(self, doc) -> Optional[List[str]]:
+        return [tok.lemma_ for tok in doc] if self._lemmatize else None
 
     def _remove_stopwords(self, tokens: List[str]) -> List[str]:
         return [t for t in tokens if t.lower() not in self.stop_words]
 
+    def _drop_stopwords(self, tokens: List[str], lemmas: Optional[List[str]]) -> Tuple[List[str], Optional[List[str]]]:
+        """_remove_stopwords that keeps spaCy lemmas (if any) aligned with the remaining tokens."""
+        if lemmas is None:
+            return self._remove_stopwords(tokens), None
+        keep = [i for i, t in enumerate(tokens) if t.lower() not in self.stop_words]
+        return [tokens[i] for i in keep], [lemmas[i] for i in keep]
+
     def _stem_tokens(self, tokens: List[str]) -> List[str]:
         return [self.stemmer.stem(t) for t in tokens] if self.stemmer else tokens
 
-    def _lemmatize_tokens(self, tokens: List[str]) -> List[str]:
+    def _lemmatize_word(self, token: str) -> str:
+        """WordNet lemma for one token, memoized in a bounded LRU."""
+        cache = self._lemma_cache
+        lemma = cache.get(token)
+        if lemma is not None:
+            self._lemma_counters['hits'] += 1
+            try:
+                cache.move_to_end(token)
+            except KeyError:  # evicted by another thread in between
+                pass
+            return lemma
+        lemma = self.lemmatizer.lemmatize(token)
+        self._lemma_counters['misses'] += 1
+        cache[token] = lemma
+        if len(cache) > self.config['lemma_cache_size']:
+            try:
+                cache.popitem(last=False)
+                self._lemma_counters['evictions'] += 1
+            except KeyError:
+                pass
+        return lemma
+
+    def _lemmatize_tokens(self, tokens: List[str], doc_lemmas: Optional[List[str]] = None) -> List[str]:
+        """doc_lemmas: spaCy lemmas from tokenization, used instead of re-parsing the tokens."""
         if not tokens:
             return tokens
         if self.lemmatizer:
             try:
-                return [self.lemmatizer.lemmatize(t) for t in tokens]
+                return [self._lemmatize_word(t) for t in tokens]
             except Exception:
                 pass
+        if doc_lemmas is not None:
+            return doc_lemmas
         if self.nlp:
             try:
                 doc = self.nlp(" ".join(tokens))
@@ -211,42 +309,35 @@ class TextPreprocessor:
                 pass
         return tokens
 
+    def lemma_cache_stats(self) -> Dict[str, Any]:
+        lookups = self._lemma_counters['hits'] + self._lemma_counters['misses']
+        return {
+            **self._lemma_counters,
+            'hit_rate': round(self._lemma_counters['hits'] / lookups, 3) if lookups else 0.0,
+            'entries': len(self._lemma_cache),
+            'max_entries': self.config['lemma_cache_size'],
+        }
+
     # --- Main preprocessing ---
+    def _clean_text(self, text: str) -> str:
+        """String-level cleaning steps, before tokenization."""
+        for step in self._clean_steps:
+            text = step(text)
+        return text
+
     def _preprocess_single(self, text: str, return_tokens: bool = False) -> Union[str, List[str]]:
         if not isinstance(text, str):
             text = str(text)
         if not text.strip():
             return [] if return_tokens else ''
 
-        processed = text
-        if self.config['remove_html']:
-            processed = self._remove_html_tags(processed)
-        if self.config['remove_urls']:
-            processed = self._remove_urls(processed)
-        if self.config['remove_emojis']:
-            processed = self._remove_emojis(processed)
-        if self.config['expand_slang']:
-            processed = self._expand_slang(processed)
-        if self.config['convert_lowercase']:
-            processed = processed.lower()
-        if self.config['correct_spelling']:
-            processed = self._correct_spelling(processed)
-        if self.config['remove_numbers']:
-            processed = self._remove_numbers(processed)
-        if self.config['remove_punctuation']:
-            processed = self._remove_punctuation(processed)
-        if self.config['remove_single_chars']:
-            processed = self._remove_single_characters(processed)
-        if self.config['normalize_whitespace']:
-            processed = self._normalize_whitespace(processed)
-
-        tokens = self._tokenize_text(processed) if self.config['tokenize'] else processed.split()
-        if self.config['remove_stopwords'] and tokens:
-            tokens = self._remove_stopwords(tokens)
+        tokens, doc_lemmas = self._tokenize(self._clean_text(text))
+        if self._filter_stopwords and tokens:
+            tokens, doc_lemmas = self._drop_stopwords(tokens, doc_lemmas)
         if tokens:
-            if self.config['lemmatize_words']:
-                tokens = self._lemmatize_tokens(tokens)
-            elif self.config['stem_words']:
+            if self._lemmatize:
+                tokens = self._lemmatize_tokens(tokens, doc_lemmas)
+            elif self._stem:
                 tokens = self._stem_tokens(tokens)
         return tokens if return_tokens else ' '.join(tokens)
 
@@ -255,6 +346,190 @@ class TextPreprocessor:
             return [self._preprocess_single(t, return_tokens) for t in text]
         return self._preprocess_single(text, return_tokens)
 
+    # --- Batch preprocessing ---
+    def preprocess_batch(self, texts: Iterable[str], return_tokens: bool = False,
+                         batch_size: int = 1000, n_process: int = 1) -> Union[List[str], List[List[str]]]:
+        """Preprocess many texts at once; output order matches input order.
+
+        With a spaCy model loaded, texts are tokenized and lemmatized by
+        nlp.pipe (batch_size / n_process are passed through), so tokens can
+        differ slightly from preprocess(), which uses NLTK per message.
+        Otherwise the result matches preprocess() on each text, and
+        n_process > 1 spreads chunks of batch_size texts over worker
+        processes.
+        """
+        return list(self.iter_preprocess(texts, return_tokens, batch_size, n_process))
+
+    def iter_preprocess(self, texts: Iterable[str], return_tokens: bool = False,
+                        batch_size: int = 1000, n_process: int = 1) -> Iterator[Union[str, List[str]]]:
+        """Lazy version of preprocess_batch for large or streamed inputs."""
+        batch_size = max(1, batch_size)
+        chunks = _chunked(texts, batch_size)
+        if n_process > 1 and not self._pipes_batches():
+            yield from _iter_chunks_in_processes(self.config, chunks, return_tokens, n_process)
+            return
+        for chunk in chunks:
+            yield from self._preprocess_chunk(chunk, return_tokens, batch_size, n_process)
+
+    def _pipes_batches(self) -> bool:
+        """Whether batches are tokenized by nlp.pipe, which does its own multiprocessing."""
+        return self.nlp is not None and self.config['tokenize']
+
+    def _preprocess_chunk(self, chunk: List[Any], return_tokens: bool,
+                          batch_size: int, n_process: int) -> List[Union[str, List[str]]]:
+        texts = [t if isinstance(t, str) else str(t) for t in chunk]
+        cleaned = [self._clean_text(t) if t.strip() else None for t in texts]
+        live = [i for i, c in enumerate(cleaned) if c is not None]
+
+        if self.config['tokenize']:
+            token_lists, lemma_lists = self._tokenize_many([cleaned[i] for i in live], batch_size, n_process)
+        else:
+            token_lists, lemma_lists = [cleaned[i].split() for i in live], [None] * len(live)
+        if self._filter_stopwords:
+            for j, tokens in enumerate(token_lists):
+                if tokens:
+                    token_lists[j], lemma_lists[j] = self._drop_stopwords(tokens, lemma_lists[j])
+        if self._lemmatize:
+            token_lists = self._lemmatize_many(token_lists, lemma_lists, batch_size, n_process)
+        elif self._stem:
+            token_lists = [self._stem_tokens(tokens) if tokens else tokens for tokens in token_lists]
+
+        results: List[Union[str, List[str]]] = [[] if return_tokens else '' for _ in texts]
+        for i, tokens in zip(live, token_lists):
+            results[i] = tokens if return_tokens else ' '.join(tokens)
+        return results
+
+    def _tokenize_many(self, texts: List[str], batch_size: int,
+                       n_process: int) -> Tuple[List[List[str]], List[Optional[List[str]]]]:
+        """Batched _analyze: spaCy nlp.pipe (with its lemmas) when loaded, else NLTK per text."""
+        results: List[Optional[List[str]]] = [None] * len(texts)
+        lemmas: List[Optional[List[str]]] = [None] * len(texts)
+        pending = []
+        for i, text in enumerate(texts):
+            if text.strip():
+                pending.append(i)
+            else:
+                results[i] = []
+
+        if pending and self.nlp:
+            try:
+                # Keep nothing from a pipe that fails part-way: every text then goes to NLTK, without spaCy lemmas
+                docs = list(self.nlp.pipe((texts[i] for i in pending), batch_size=batch_size, n_process=n_process))
+            except Exception:
+                docs = None
+            if docs is not None:
+                for i, doc in zip(pending, docs):
+                    results[i] = [tok.text for tok in doc]
+                    lemmas[i] = self._doc_lemmas(doc)
+                pending = []
+        for i in pending:
+            try:
+                results[i] = self._word_tokenize(texts[i]) if self._word_tokenize else texts[i].split()
+            except Exception:
+                results[i] = texts[i].split()
+        return results, lemmas
+
+    def _lemmatize_many(self, token_lists: List[List[str]], lemma_lists: List[Optional[List[str]]],
+                        batch_size: int, n_process: int) -> List[List[str]]:
+        """Batched _lemmatize_tokens: spaCy lemmas from nlp.pipe tokenization, then WordNet per text, then nlp.pipe."""
+        results = list(token_lists)
+        pending = []
+        for i, tokens in enumerate(token_lists):
+            if not tokens:
+                continue
+            if lemma_lists[i] is not None:
+                results[i] = lemma_lists[i]
+                continue
+            if self.lemmatizer:
+                try:
+                    results[i] = [self._lemmatize_word(t) for t in tokens]
+                    continue
+                except Exception:
+                    pass
+            pending.append(i)
+
+        if pending and self.nlp:
+            try:
+                docs = list(self.nlp.pipe((" ".join(token_lists[i]) for i in pending),
+                                          batch_size=batch_size, n_process=n_process))
+            except Exception:
+                docs = []  # all or nothing, as in _tokenize_many
+            for i, doc in zip(pending, docs):
+                results[i] = [tok.lemma_ for tok in doc]
+        return results
+
+
+def _split_without_lemmas(text: str) -> Tuple[List[str], None]:
+    """Tokenizer used when config['tokenize'] is off: whitespace split, no spaCy lemmas."""
+    return text.split(), None
+
+
+# --- Shared instance ---
+_shared_preprocessor: Optional["TextPreprocessor"] = None
+_shared_lock = threading.Lock()
+
+
+def get_preprocessor() -> "TextPreprocessor":
+    """The process-wide default TextPreprocessor, built (and its models loaded) on first use."""
+    global _shared_preprocessor
+    if _shared_preprocessor is None:
+        with _shared_lock:
+            if _shared_preprocessor is None:
+                _shared_preprocessor = TextPreprocessor()
+    return _shared_preprocessor
+
+
+def warm_up(sample: str = "I can't sleep and feel stressed about my exams") -> Dict[str, float]:
+    """Build the shared preprocessor and run one message through it.
+
+    Also pulls in data NLTK/spaCy only load on first call (tokenizer models,
+    WordNet), so the first real request doesn't pay for it. Returns seconds
+    spent per component.
+    """
+    started = time.perf_counter()
+    preprocessor = get_preprocessor()
+    built = time.perf_counter()
+    preprocessor.preprocess(sample)
+    times = dict(preprocessor.load_times)
+    times['construct'] = built - started
+    times['first_message'] = time.perf_counter() - built
+    return times
+
+
+# --- Batch helpers (module level so worker processes can pickle them) ---
+def _chunked(iterable: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+_worker_preprocessor: Optional["TextPreprocessor"] = None
+
+
+def _init_batch_worker(config: Dict[str, Any]) -> None:
+    global _worker_preprocessor
+    _worker_preprocessor = TextPreprocessor(**config)
+
+
+def _preprocess_chunk_in_worker(chunk: List[Any], return_tokens: bool) -> List[Union[str, List[str]]]:
+    return _worker_preprocessor._preprocess_chunk(chunk, return_tokens, len(chunk), 1)
+
+
+def _iter_chunks_in_processes(config: Dict[str, Any], chunks: Iterator[List[Any]],
+                              return_tokens: bool, n_process: int) -> Iterator[Union[str, List[str]]]:
+    """Run chunks on a process pool, keeping a bounded window in flight and yielding in order."""
+    with ProcessPoolExecutor(max_workers=n_process, initializer=_init_batch_worker, initargs=(dict(config),)) as pool:
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(pool.submit(_preprocess_chunk_in_worker, chunk, return_tokens))
+            if len(in_flight) >= n_process * 2:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
 # --- Demo ---
 def demo():
     print("=== TEXT PREPROCESSOR DEMONSTRATION ===")
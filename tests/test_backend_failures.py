@@ -0,0 +1,62 @@
+"""
+Which request outcomes count against an Ollama backend's circuit breaker
+"""
+
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from ai_services.chatbot.ai_client import LocalLLMClient
+from ai_services.chatbot.errors import LLMResponseError
+
+
+async def run_against(status, raise_error):
+    async def handler(request):
+        return web.Response(status=status, text="error")
+
+    app = web.Application()
+    app.router.add_route("*", "/api/test", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    client = LocalLLMClient(base_urls=[f"http://127.0.0.1:{port}"])
+    try:
+        with pytest.raises(Exception):
+            async with client.request("POST", "/api/test") as response:
+                raise_error(response)
+        return client.backends.backends[0]
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+
+def raise_status(response):
+    raise LLMResponseError(f"Ollama API error: {response.status}", status=response.status)
+
+
+def test_5xx_counts_as_backend_failure():
+    backend = asyncio.run(run_against(503, raise_status))
+    assert backend.consecutive_failures == 1
+
+
+def test_4xx_does_not_count_as_backend_failure():
+    backend = asyncio.run(run_against(400, raise_status))
+    assert backend.consecutive_failures == 0
+
+
+def test_stream_error_counts_as_backend_failure():
+    def raise_stream_error(response):
+        raise LLMResponseError("Ollama API error: model runner crashed")
+    backend = asyncio.run(run_against(200, raise_stream_error))
+    assert backend.consecutive_failures == 1
+
+
+def test_caller_error_does_not_count_as_backend_failure():
+    def raise_value_error(response):
+        raise ValueError("malformed JSON")
+    backend = asyncio.run(run_against(200, raise_value_error))
+    assert backend.consecutive_failures == 0
+    assert backend._counters["failures"] == 0
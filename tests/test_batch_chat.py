@@ -0,0 +1,37 @@
+"""
+batch_chat input parsing: bad lines become failed items, as on the server
+"""
+
+import json
+
+from ai_services.batch_chat import finished_ids, read_items
+
+
+def test_read_items_reports_invalid_lines(tmp_path):
+    path = tmp_path / "prompts.jsonl"
+    path.write_text("\n".join([
+        json.dumps({"id": "a", "message": "hello"}),
+        json.dumps("just a string"),
+        json.dumps([1, 2]),
+        "42",
+        json.dumps({"id": "b", "message": 7}),
+        "{not json",
+        "",
+        json.dumps({"message": "no id", "session_id": "s1"}),
+    ]) + "\n", encoding="utf-8")
+
+    items = read_items(path)
+
+    assert items[0] == {"id": "a", "message": "hello"}
+    assert items[1] == {"id": 2, "message": "just a string"}
+    assert [item["id"] for item in items[2:6]] == [3, 4, "b", 6]
+    assert all(item["error"].startswith("invalid line:") for item in items[2:6])
+    assert items[6] == {"id": 8, "message": "no id", "session_id": "s1"}
+
+
+def test_finished_ids_ignores_non_object_lines(tmp_path):
+    path = tmp_path / "results.jsonl"
+    path.write_text('[1]\n"x"\n{"type": "result", "id": "a"}\n{"type": "result", "id": 2, "error": "busy"}\n',
+                    encoding="utf-8")
+    assert finished_ids(path) == {'"a"', "2"}
+    assert finished_ids(path, retry_failed=True) == {'"a"'}
@@ -0,0 +1,57 @@
+"""
+/chat/stream replies that never reach the LLM (crisis, unavailable service)
+must still end with a `done` event.
+"""
+
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from ai_services.chatbot import routes
+from ai_services.chatbot.safety import CRISIS_MESSAGE
+
+
+def stream_events(client, message):
+    events = []
+    with client.stream("POST", "/chat/stream", json={"message": message}) as response:
+        assert response.status_code == 200
+        event = None
+        for line in response.iter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                events.append((event, json.loads(line[len("data: "):])))
+    return events
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(routes.router)
+    return TestClient(app)
+
+
+def test_crisis_reply_ends_with_done(client, monkeypatch):
+    async def healthy():
+        return {"status": "healthy"}
+    monkeypatch.setattr(routes, "check_llm_health_async", healthy)
+
+    events = stream_events(client, "I want to kill myself")
+
+    assert [name for name, _ in events] == ["token", "done"]
+    done = events[-1][1]
+    assert done["bot_response"] == CRISIS_MESSAGE
+    assert done["suggestions"]
+
+
+def test_unavailable_reply_ends_with_done(client, monkeypatch):
+    async def unhealthy():
+        return {"status": "unhealthy", "error": "Ollama is not running"}
+    monkeypatch.setattr(routes, "check_llm_health_async", unhealthy)
+
+    events = stream_events(client, "hello")
+
+    assert [name for name, _ in events] == ["error", "token", "done"]
+    assert "unavailable" in events[-1][1]["bot_response"]
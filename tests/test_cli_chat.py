@@ -0,0 +1,30 @@
+"""
+cli_chat --replay transcript parsing: bad lines are skipped and reported
+"""
+
+import json
+
+from ai_services.cli_chat import read_transcript
+
+
+def test_read_transcript_skips_malformed_lines(tmp_path, capsys):
+    path = tmp_path / "transcript.jsonl"
+    path.write_text("\n".join([
+        json.dumps({"message": "hello", "session_id": "s1"}),
+        "{not json",
+        json.dumps([1, 2]),
+        "42",
+        json.dumps({"role": "user", "session_id": "s1"}),
+        json.dumps({"role": "user", "content": None}),
+        json.dumps({"role": "assistant", "content": "hi"}),
+        json.dumps({"role": "user", "content": "I can't sleep", "session_id": "s1"}),
+        json.dumps("a stateless turn"),
+    ]) + "\n", encoding="utf-8")
+
+    sessions = read_transcript(path)
+
+    assert sessions == {("session", "s1"): ["hello", "I can't sleep"], ("line", 9): ["a stateless turn"]}
+    warnings = capsys.readouterr().err
+    for line_number in (2, 3, 4, 5, 6):
+        assert f"{path}:{line_number}: skipped" in warnings
+    assert f"{path}:7:" not in warnings
@@ -0,0 +1,33 @@
+"""
+Import-time budgets: importing the service must not pull in the heavy NLP
+dependencies (spaCy, NLTK, googletrans...), which load on warm-up instead.
+Each module is imported in a fresh interpreter; IMPORT_TIME_BUDGET_SCALE
+multiplies the budgets on slow machines.
+"""
+
+import importlib.util
+import os
+
+import pytest
+
+from ai_services.benchmarks.check_import_time import BUDGETS_MS, HEAVY_MODULES, measure
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET_SCALE = float(os.getenv("IMPORT_TIME_BUDGET_SCALE", "1"))
+
+
+@pytest.mark.parametrize("module", list(BUDGETS_MS))
+def test_import_within_budget(module):
+    millis, heavy = measure(module, cwd=ROOT)
+    assert heavy == [], f"importing {module} loaded {', '.join(heavy)}"
+    # 0 ms would mean the -X importtime line for the module was not found
+    assert 0 < millis <= BUDGETS_MS[module] * BUDGET_SCALE, \
+        f"{module} took {millis:.0f} ms to import (budget {BUDGETS_MS[module] * BUDGET_SCALE:.0f} ms)"
+
+
+def test_heavy_modules_are_detected():
+    assert {"spacy", "nltk", "googletrans"} <= set(HEAVY_MODULES)
+    if importlib.util.find_spec("nltk") is None:
+        pytest.skip("nltk is not installed")
+    _, heavy = measure("nltk", cwd=ROOT)
+    assert heavy == ["nltk"]
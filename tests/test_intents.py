@@ -0,0 +1,68 @@
+"""
+Quick-reply suggestions from IntentEngine, for whole replies and for
+replies fed to an IntentTracker chunk by chunk
+"""
+
+import pytest
+
+from ai_services.chatbot.intents import IntentEngine, intent_engine
+from ai_services.chatbot.safety import CRISIS_MESSAGE
+
+DEFAULTS = ["Tell me more", "Can we talk about something else?"]
+
+
+def make_engine(**kwargs):
+    intents = [
+        {"name": "sleep", "priority": 20, "phrases": ["sleep*", "rest"], "suggestions": ["Sleep tips please"]},
+        {"name": "anxiety", "priority": 30, "phrases": ["anxious", "worry"], "suggestions": ["What helps with anxiety?"]},
+        {"name": "exams", "priority": 8, "phrases": ["exam*"], "suggestions": ["Study stress", "Exam tips"]},
+    ]
+    return IntentEngine(intents, default_suggestions=DEFAULTS, **kwargs)
+
+
+def feed_in_chunks(engine, text, size):
+    tracker = engine.tracker()
+    for start in range(0, len(text), size):
+        tracker.feed(text[start:start + size])
+    return tracker
+
+
+def test_highest_priority_intent_wins():
+    engine = make_engine()
+    assert engine.tag("Exams make you sleepless and anxious") == ["anxiety", "sleep", "exams"]
+    assert engine.suggest("Exams make you sleepless and anxious") == ["What helps with anxiety?"] + DEFAULTS
+
+
+def test_equal_priority_prefers_earliest_match():
+    engine = IntentEngine(
+        [{"name": "a", "priority": 1, "phrases": ["alpha"], "suggestions": ["A"]},
+         {"name": "b", "priority": 1, "phrases": ["beta"], "suggestions": ["B"]}],
+        max_intent_suggestions=2,
+    )
+    assert engine.suggest("beta then alpha") == ["B", "A"]
+
+
+def test_limits():
+    engine = make_engine(max_suggestions=3, max_intent_suggestions=2)
+    assert engine.suggest("exam stress and a restless night of sleep") == ["Sleep tips please", "Study stress", "Tell me more"]
+    assert engine.suggest("nothing to see here") == DEFAULTS
+
+
+def test_whole_word_matching():
+    engine = make_engine()
+    assert engine.tag("I have an interest in art") == []
+    assert engine.tag("Try to rest.") == ["sleep"]
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 1000])
+def test_streamed_tagging_matches_whole_text(size):
+    engine = make_engine(max_intent_suggestions=3)
+    text = "Worry before exams is common; rest, and an interest in sleep hygiene helps."
+    tracker = feed_in_chunks(engine, text, size)
+    assert tracker.intents() == engine.tag(text)
+    assert tracker.suggestions() == engine.suggest(text)
+
+
+def test_crisis_reply_is_not_tagged_as_loneliness():
+    assert "loneliness" not in intent_engine.tag(CRISIS_MESSAGE)
+    assert "loneliness" in intent_engine.tag("It sounds like you feel alone right now.")
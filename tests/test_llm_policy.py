@@ -0,0 +1,47 @@
+"""
+Hedged LLM calls take a free admission slot, and are skipped without one
+"""
+
+import asyncio
+
+from ai_services.chatbot.admission import AdmissionController, PRIORITY_NORMAL
+from ai_services.chatbot.llm_policy import LLMCallPolicy
+
+
+def make_policy(admission):
+    policy = LLMCallPolicy(hedge=True, hedge_min_delay=0.01, hedge_max_ratio=1.0, min_samples=1,
+                           available_backends=lambda: 2, admission=admission)
+    policy.record(seconds=0.01)
+    return policy
+
+
+async def hedged_call(admission):
+    """One call whose first attempt is slow, made while holding a slot like a user turn does"""
+    policy = make_policy(admission)
+    attempts = []
+
+    async def call(deadline):
+        attempts.append(admission.stats()["active"])
+        await asyncio.sleep(0.2 if len(attempts) == 1 else 0.0)
+        return f"attempt {len(attempts)}"
+
+    async with admission.slot(PRIORITY_NORMAL):
+        result = await policy.run(call)
+    await asyncio.sleep(0)  # let the hedge's done callback run
+    return result, attempts, policy.stats(), admission.stats()
+
+
+def test_hedge_runs_on_a_free_slot_and_gives_it_back():
+    result, attempts, policy_stats, admission_stats = asyncio.run(hedged_call(AdmissionController(max_concurrency=2)))
+    assert result == "attempt 2"
+    assert attempts == [1, 2]
+    assert policy_stats["hedges"] == 1 and policy_stats["hedge_wins"] == 1
+    assert admission_stats["active"] == 0
+
+
+def test_hedge_is_skipped_when_no_slot_is_free():
+    result, attempts, policy_stats, admission_stats = asyncio.run(hedged_call(AdmissionController(max_concurrency=1)))
+    assert result == "attempt 1"
+    assert attempts == [1]
+    assert policy_stats["hedges"] == 0 and policy_stats["hedges_skipped_busy"] == 1
+    assert admission_stats["active"] == 0
@@ -0,0 +1,42 @@
+"""
+ConversationMemory byte limits: one per session, one across all sessions
+"""
+
+from ai_services.chatbot.memory import ConversationMemory
+
+
+def test_session_cap_drops_oldest_exchanges_only_from_that_session():
+    memory = ConversationMemory(max_messages=100, max_session_bytes=100, max_total_bytes=10_000)
+    memory.append("other", "hi", "hello")
+    dropped = []
+    for turn in range(5):
+        dropped += memory.append("s1", f"q{turn}" + "x" * 20, f"a{turn}" + "y" * 20)
+
+    assert [m["content"][:2] for m in dropped] == ["q0", "a0", "q1", "a1", "q2", "a2"]
+    assert [m["content"][:2] for m in memory.get("s1")] == ["q3", "a3", "q4", "a4"]
+    assert memory.get("other") == [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "hello"}]
+    assert memory.stats()["evictions"] == 0
+
+
+def test_total_cap_evicts_least_recently_used_sessions():
+    memory = ConversationMemory(max_messages=100, max_session_bytes=1_000, max_total_bytes=250)
+    for session_id in ("a", "b", "c"):
+        memory.append(session_id, "q" * 50, "a" * 50)
+
+    assert memory.get("a") == []
+    assert len(memory.get("b")) == 2 and len(memory.get("c")) == 2
+    stats = memory.stats()
+    assert stats["bytes"] == 200
+    assert stats["evictions"] == 1
+    assert (stats["max_session_bytes"], stats["max_total_bytes"]) == (1_000, 250)
+
+
+def test_exchange_larger_than_session_cap_is_kept():
+    memory = ConversationMemory(max_messages=10, max_session_bytes=100, max_total_bytes=10_000)
+    memory.append("s1", "short", "reply")
+    dropped = memory.append("s1", "q" * 80, "a" * 80)
+
+    assert dropped == [{"role": "user", "content": "short"}, {"role": "assistant", "content": "reply"}]
+    assert memory.get("s1") == [{"role": "user", "content": "q" * 80}, {"role": "assistant", "content": "a" * 80}]
+    assert memory.append("s2", "x" * 200, "y" * 200) == []
+    assert len(memory.get("s2")) == 2
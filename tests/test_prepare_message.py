@@ -0,0 +1,35 @@
+"""
+prepare_user_message: the raw message is safety-scanned before translation
+and preprocessing, whatever its language
+"""
+
+import asyncio
+import os
+
+import pytest
+
+from ai_services.chatbot import processor
+from ai_services.chatbot.safety import CRISIS_MESSAGE
+from ai_services.chatbot.translation import translator
+from ai_services.utils.config import Config
+
+
+@pytest.fixture
+def no_pipeline(monkeypatch):
+    async def unexpected(*args, **kwargs):
+        raise AssertionError("a crisis message must not wait for translation or preprocessing")
+    monkeypatch.setattr(processor.translator, "to_english", unexpected)
+    monkeypatch.setattr(processor.nlp_pool, "analyze", unexpected)
+
+
+@pytest.mark.parametrize("message", ["I want to kill myself", "I Want To KILL MYSELF tonight 😞"])
+def test_raw_crisis_message_short_circuits(no_pipeline, message):
+    prepared = asyncio.run(processor.prepare_user_message(message))
+    assert prepared["response"] == CRISIS_MESSAGE
+    assert prepared["priority"] == processor.PRIORITY_HIGH
+
+
+@pytest.mark.skipif("TRANSLATION_BACKEND" in os.environ, reason="backend chosen by the environment")
+def test_translation_is_opt_in():
+    assert Config.TRANSLATION_BACKEND == "none"
+    assert translator.stats()["backend"] == "none"
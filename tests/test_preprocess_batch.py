@@ -0,0 +1,77 @@
+"""
+TextPreprocessor.preprocess_batch: spaCy batches go through nlp.pipe with
+batch_size / n_process, and n_process > 1 is honoured without spaCy too
+"""
+
+from types import SimpleNamespace
+
+from ai_services.utils import text_processor
+from ai_services.utils.text_processor import TextPreprocessor
+
+TEXTS = ["I can't sleep before exams", "", "Feeling stressed and tired"]
+
+
+class FakeNLP:
+    """Stands in for a spaCy Language: whitespace tokens, upper-cased lemmas"""
+
+    def __init__(self):
+        self.pipe_calls = []
+
+    def pipe(self, texts, batch_size=1000, n_process=1):
+        texts = list(texts)
+        self.pipe_calls.append((len(texts), batch_size, n_process))
+        return [[SimpleNamespace(text=t, lemma_=t.upper()) for t in text.split()] for text in texts]
+
+
+def test_spacy_batches_use_nlp_pipe():
+    preprocessor = TextPreprocessor(remove_stopwords=False)
+    preprocessor.nlp = FakeNLP()
+    preprocessor._word_tokenize = lambda text: (_ for _ in ()).throw(AssertionError("NLTK used"))
+
+    result = preprocessor.preprocess_batch(TEXTS, batch_size=2, n_process=3)
+
+    assert result == ["CANT SLEEP BEFORE EXAMS", "", "FEELING STRESSED AND TIRED"]
+    assert preprocessor.nlp.pipe_calls == [(1, 2, 3), (1, 2, 3)]
+
+
+def test_without_spacy_matches_preprocess():
+    preprocessor = TextPreprocessor()
+    preprocessor.nlp = None
+    assert preprocessor.preprocess_batch(TEXTS, batch_size=2) == [preprocessor.preprocess(t) for t in TEXTS]
+
+
+def test_n_process_without_spacy_uses_worker_processes(monkeypatch):
+    calls = []
+
+    def fake_pool(config, chunks, return_tokens, n_process):
+        chunks = list(chunks)
+        calls.append((len(chunks), n_process))
+        return [text for chunk in chunks for text in chunk]
+
+    monkeypatch.setattr(text_processor, "_iter_chunks_in_processes", fake_pool)
+    preprocessor = TextPreprocessor()
+    preprocessor.nlp = None
+    assert preprocessor.preprocess_batch(TEXTS, batch_size=2, n_process=2) == TEXTS
+    assert calls == [(2, 2)]
+
+    # Tokenization off: nlp.pipe has nothing to parallelise, so workers are used
+    preprocessor = TextPreprocessor(tokenize=False)
+    preprocessor.nlp = FakeNLP()
+    preprocessor.preprocess_batch(TEXTS, n_process=4)
+    assert calls[-1] == (1, 4)
+
+
+def test_pipe_failing_part_way_falls_back_without_spacy_lemmas():
+    class FailingNLP(FakeNLP):
+        def pipe(self, texts, batch_size=1000, n_process=1):
+            docs = super().pipe(texts, batch_size, n_process)
+            yield docs[0]
+            raise RuntimeError("worker died")
+
+    texts = ["I can't sleep before exams", "Feeling stressed and tired"]
+    preprocessor = TextPreprocessor(remove_stopwords=False)
+    preprocessor.nlp = FailingNLP()
+    result = preprocessor.preprocess_batch(texts)
+
+    preprocessor.nlp = None
+    assert result == [preprocessor.preprocess(t) for t in texts]
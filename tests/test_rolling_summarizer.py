@@ -0,0 +1,57 @@
+"""
+Background LLM summaries go through admission control
+"""
+
+import asyncio
+
+from ai_services.chatbot.admission import AdmissionController, ServerBusyError, PRIORITY_BATCH
+from ai_services.chatbot.memory import ConversationMemory
+from ai_services.chatbot.prompt_builder import RollingSummarizer
+
+DROPPED = [{"role": "user", "content": "I can't sleep"}, {"role": "assistant", "content": "Try a routine"}]
+
+
+def test_llm_summary_holds_a_batch_slot():
+    async def main():
+        admission = AdmissionController(max_concurrency=1)
+        slots_in_use = []
+
+        async def complete(prompt, max_tokens, temperature, deadline):
+            slots_in_use.append(admission.stats()["active"])
+            return "The user has trouble sleeping.", {}
+
+        memory = ConversationMemory()
+        memory.append("s1", "hello", "hi")
+        summarizer = RollingSummarizer(memory, complete=complete,
+                                       admit=lambda: admission.slot(PRIORITY_BATCH))
+        summarizer.schedule("s1", DROPPED)
+        await summarizer._task
+        return memory.get_summary("s1"), slots_in_use
+
+    summary, slots_in_use = asyncio.run(main())
+    assert summary == "The user has trouble sleeping."
+    assert slots_in_use == [1]
+
+
+def test_busy_admission_keeps_the_extractive_summary():
+    async def main():
+        async def complete(prompt, max_tokens, temperature, deadline):
+            raise AssertionError("the LLM must not be called without a slot")
+
+        class Busy:
+            async def __aenter__(self):
+                raise ServerBusyError("busy")
+
+            async def __aexit__(self, *exc):
+                return False
+
+        memory = ConversationMemory()
+        memory.append("s1", "hello", "hi")
+        summarizer = RollingSummarizer(memory, complete=complete, admit=Busy)
+        summarizer.schedule("s1", DROPPED)
+        await summarizer._task
+        return memory.get_summary("s1"), summarizer.stats()
+
+    summary, stats = asyncio.run(main())
+    assert summary == "The user said: I can't sleep"
+    assert stats["llm_failures"] == 1